@@ -0,0 +1,196 @@
+"""
+Benchmarks for the recommendation engine in rec.py.
+
+Run from this directory, e.g.:
+
+    python benchmarks.py encode --workers 1 2 4 8
+    python benchmarks.py quantization "Data Scientist" "Web Developer"
+    python benchmarks.py snapshot
+    python benchmarks.py batch --url http://localhost:5001 --postings 100
+    python benchmarks.py skills --taxonomy 45 500 5000
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+import numpy as np
+import requests
+
+from dataset_snapshot import read_dataset_csv, load_snapshot, write_snapshot
+from skill_extractor import SkillExtractor, build_taxonomy
+from rec import (COMMON_SKILLS, SKILL_MAPPINGS, job_to_major, EMBEDDING_MODEL_NAME, NUMPY_INDEX_DIR, VECTOR_COLLECTIONS, EmbeddingIndex, QuantizedEmbeddings,
+                 benchmark_encoding, get_abs_path, numpy_aliases)
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dataset")
+
+
+def load_documents(csv_specs, limit=None):
+    """Collect vector-collection documents (GT descriptions, MOOC 'About' text) from dataset_key=path CSVs"""
+    documents = []
+    text_fields = [spec["text_field"] for spec in VECTOR_COLLECTIONS.values()]
+    for spec in csv_specs:
+        dataset_key, path = spec.split("=", 1)
+        df = read_dataset_csv(dataset_key, path)
+        for field in text_fields:
+            if field in df.columns:
+                documents.extend(df[field].fillna("").astype(str).tolist())
+    return documents[:limit] if limit else documents
+
+
+def run_encode(args):
+    from sentence_transformers import SentenceTransformer
+
+    documents = load_documents(args.csv, args.limit)
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    print(f"Encoding {len(documents)} documents with {EMBEDDING_MODEL_NAME} on {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'threads':>8} {'seconds':>9} {'docs/sec':>10}")
+    for result in benchmark_encoding(model, documents, args.workers, args.threads):
+        threads = result["threads_per_worker"] or "default"
+        print(f"{result['workers']:>8} {threads:>8} {result['seconds']:>9} {result['docs_per_sec']:>10}")
+
+
+def run_quantization(args):
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    queries = model.encode(args.queries)
+    for name in VECTOR_COLLECTIONS:
+        path = os.path.join(get_abs_path(NUMPY_INDEX_DIR), numpy_aliases.resolve(name))
+        if not os.path.exists(os.path.join(path, "embeddings.npy")):
+            print(f"{name}: no NumPy index under {path}, build it first")
+            continue
+        exact = EmbeddingIndex.load(name, path)
+        expected = exact.query(queries, args.top_k)["ids"]
+        print(f"{name}: {len(exact)} vectors, top-{args.top_k} for {len(args.queries)} queries")
+        print(f"{'storage':>8} {'MB':>8} {'identical':>10} {'overlap':>8} {'ms/query':>9}")
+        for kind in ("none",) + QuantizedEmbeddings.KINDS:
+            index = EmbeddingIndex.load(name, path, quantization=kind)
+            start = time.perf_counter()
+            found = index.query(queries, args.top_k)["ids"]
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(args.queries)
+            identical = sum(f == e for f, e in zip(found, expected))
+            overlap = np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)])
+            print(f"{kind:>8} {index.resident_bytes / 2**20:>8.2f} {identical:>7}/{len(expected):<2} "
+                  f"{overlap:>8.3f} {elapsed_ms:>9.2f}")
+
+
+def run_snapshot(args):
+    print(f"{'dataset':>10} {'rows':>6} {'csv ms':>8} {'snapshot ms':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        for spec in args.csv:
+            dataset_key, path = spec.split("=", 1)
+            df = read_dataset_csv(dataset_key, path)
+            snapshot = os.path.join(snapshot_dir, dataset_key)
+            write_snapshot(dataset_key, df, snapshot, source=path)
+            timings = {}
+            for name, load in (("csv", lambda: read_dataset_csv(dataset_key, path)), ("snapshot", lambda: load_snapshot(snapshot))):
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    load()
+                timings[name] = (time.perf_counter() - start) * 1000 / args.repeat
+            print(f"{dataset_key:>10} {len(df):>6} {timings['csv']:>8.1f} {timings['snapshot']:>12.1f} "
+                  f"{timings['csv'] / timings['snapshot']:>7.1f}x")
+
+
+def synthetic_postings(count, duplicate_rate, seed=0):
+    """Job postings built from the known job titles and skills; about duplicate_rate of them repeat an earlier one"""
+    rng = random.Random(seed)
+    postings = []
+    for _ in range(count):
+        if postings and rng.random() < duplicate_rate:
+            postings.append(dict(rng.choice(postings)))
+            continue
+        title = rng.choice(list(job_to_major))
+        skills = rng.sample(COMMON_SKILLS, 6)
+        postings.append({"jobTitle": title, "userSkills": "",
+                         "jobDescription": f"We are hiring a {title} with experience in {', '.join(skills)}."})
+    return postings
+
+
+def run_batch(args):
+    postings = synthetic_postings(args.postings, args.duplicates)
+    print(f"{len(postings)} postings against {args.url}")
+
+    start = time.perf_counter()
+    for posting in postings:
+        requests.post(f"{args.url}/rec/getrec", json=posting).raise_for_status()
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = requests.post(f"{args.url}/rec/getrec/batch", json={"postings": postings})
+    response.raise_for_status()
+    batch = time.perf_counter() - start
+
+    print(f"{'path':>8} {'seconds':>9} {'postings/sec':>13}")
+    print(f"{'single':>8} {single:>9.2f} {len(postings) / single:>13.2f}")
+    print(f"{'batch':>8} {batch:>9.2f} {len(postings) / batch:>13.2f}")
+
+
+def run_skills(args):
+    """Skill extraction time per description: one regex search per skill vs the taxonomy automaton"""
+    descriptions = read_dataset_csv("gt_courses", args.csv)["Description"].dropna().astype(str).tolist()[:args.limit]
+    # No large taxonomy ships with the repo, so random course description words (at most a few
+    # thousand in --limit descriptions) stand in for one
+    words = sorted({word for text in descriptions for word in re.findall(r"[a-z]{5,}", text.lower())})
+    rng = random.Random(0)
+    print(f"{len(descriptions)} descriptions, synthetic taxonomies of up to {len(COMMON_SKILLS) + len(words)} skills")
+    print(f"{'skills':>7} {'regex ms':>9} {'automaton ms':>13} {'speedup':>8}")
+    for size in args.taxonomy:
+        skills = COMMON_SKILLS + rng.sample(words, min(len(words), max(0, size - len(COMMON_SKILLS))))
+        extractor = SkillExtractor(build_taxonomy(COMMON_SKILLS, SKILL_MAPPINGS, taxonomy_path=None, extra_skills=skills))
+        start = time.perf_counter()
+        for text in descriptions:
+            text = text.lower()
+            [skill for skill in skills if re.search(rf'\b{re.escape(skill)}\b', text)]
+        regex = (time.perf_counter() - start) * 1000 / len(descriptions)
+        start = time.perf_counter()
+        for text in descriptions:
+            extractor.extract("", text)
+        automaton = (time.perf_counter() - start) * 1000 / len(descriptions)
+        print(f"{len(skills):>7} {regex:>9.2f} {automaton:>13.3f} {regex / automaton:>7.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    encode = commands.add_parser("encode", help="bulk encoding throughput (docs/sec) by worker count")
+    encode.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    encode.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cores / workers)")
+    encode.add_argument("--limit", type=int, default=None, help="encode at most this many documents")
+    encode.add_argument("--csv", nargs="+", default=[f"gt_courses={os.path.join(DATASET_DIR, 'gatech_courses.csv')}"],
+                        help="dataset_key=path pairs")
+    encode.set_defaults(run=run_encode)
+
+    quantization = commands.add_parser("quantization", help="compressed NumPy index: memory and top-k agreement with float32")
+    quantization.add_argument("queries", nargs="+", help="query texts, e.g. job titles")
+    quantization.add_argument("--top-k", type=int, default=20)
+    quantization.set_defaults(run=run_quantization)
+
+    snapshot = commands.add_parser("snapshot", help="dataset load time: CSV parse vs binary snapshot")
+    snapshot.add_argument("--csv", nargs="+", default=[f"gt_courses={os.path.join(DATASET_DIR, 'gatech_courses.csv')}"],
+                          help="dataset_key=path pairs")
+    snapshot.add_argument("--repeat", type=int, default=10)
+    snapshot.set_defaults(run=run_snapshot)
+
+    batch = commands.add_parser("batch", help="postings/sec: serial /rec/getrec calls vs one /rec/getrec/batch call")
+    batch.add_argument("--url", default="http://localhost:5001", help="running backend")
+    batch.add_argument("--postings", type=int, default=100)
+    batch.add_argument("--duplicates", type=float, default=0.2, help="fraction of repeated postings")
+    batch.set_defaults(run=run_batch)
+
+    skills = commands.add_parser("skills", help="skill extraction ms/description: regex per skill vs taxonomy automaton")
+    skills.add_argument("--taxonomy", type=int, nargs="+", default=[len(COMMON_SKILLS), 500, 5000], help="taxonomy sizes")
+    skills.add_argument("--limit", type=int, default=500, help="course descriptions to extract from")
+    skills.add_argument("--csv", default=os.path.join(DATASET_DIR, "gatech_courses.csv"), help="Georgia Tech courses CSV")
+    skills.set_defaults(run=run_skills)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
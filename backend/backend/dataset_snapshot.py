@@ -0,0 +1,293 @@
+"""
+Binary snapshots of the recommendation datasets, so workers do not parse the CSVs on every cold start.
+
+A snapshot is a directory of .npy files plus manifest.json:
+
+- string columns: one UTF-8 buffer, int64 character offsets and a missing-value mask
+- categorical columns (the GT Major and the course prefix): int32 codes, categories in the manifest
+- numeric columns: the array itself
+
+Loading parses no CSV: numeric columns are memory-mapped, categorical codes are read as they are,
+and each string column is decoded from its buffer in one pass into an object array, so snapshots
+are not memory-mapped as a whole. load_dataset uses a snapshot only when the CSV still has the size
+recorded in the manifest and either its recorded mtime or, when the mtime changed, its recorded
+SHA-256. The CSV is hashed only in that case, so touching or re-checking out an unchanged CSV keeps
+its snapshot without every start reading the whole file. Compile snapshots from this directory with:
+
+    python dataset_snapshot.py --gt-courses Dataset/gatech_courses.csv --moocs Dataset/moocs.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+SNAPSHOT_FORMAT = 1
+# Where snapshots are written, one directory per source CSV
+SNAPSHOT_DIR = os.environ.get("REC_DATASET_SNAPSHOT_DIR", "~/dataset_snapshots")
+# "off": always parse the CSVs; "read": use fresh snapshots; "auto": also rewrite stale snapshots after parsing
+SNAPSHOT_MODE = os.environ.get("REC_DATASET_SNAPSHOTS", "read")
+
+# Columns stored and loaded as pandas categoricals
+CATEGORICAL_COLUMNS = {"gt_courses": ["Major"]}
+# Columns a snapshot must have to be written
+REQUIRED_COLUMNS = {
+    "gt_courses": ["Course ID", "Course Name", "Description"],
+    "moocs": ["Name", "About"]
+}
+
+
+class SnapshotError(ValueError):
+    """Raised when a dataset cannot be snapshotted or a snapshot is unusable"""
+
+
+def course_prefixes(course_ids):
+    """Course prefix of each GT course ID, as CatalogSnapshot splits it"""
+    return course_ids.str.split(" ", n=1).str[0]
+
+
+# Per-dataset columns derived once at compile time and stored as categoricals
+DERIVED_COLUMNS = {"gt_courses": {"prefix": lambda df: course_prefixes(df["Course ID"])}}
+
+
+def read_dataset_csv(dataset_key, path):
+    """Parse a dataset CSV the way load_datasets always has"""
+    if dataset_key == "gt_courses":
+        df = pd.read_csv(path, sep=';', on_bad_lines='skip', engine='python')
+    else:
+        df = pd.read_csv(path)
+    for column in CATEGORICAL_COLUMNS.get(dataset_key, []):
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def snapshot_path(csv_path, snapshot_dir=None):
+    csv_path = os.path.abspath(os.path.expanduser(csv_path))
+    digest = hashlib.sha1(csv_path.encode("utf-8")).hexdigest()[:8]
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.expanduser(snapshot_dir or SNAPSHOT_DIR), f"{name}-{digest}")
+
+
+def _write_strings(directory, stem, values):
+    mask = pd.isna(values)
+    strings = ["" if missing else str(value) for value, missing in zip(values, mask)]
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in strings], out=offsets[1:])
+    np.save(os.path.join(directory, f"{stem}.values.npy"), np.frombuffer("".join(strings).encode("utf-8"), dtype=np.uint8))
+    np.save(os.path.join(directory, f"{stem}.offsets.npy"), offsets)
+    np.save(os.path.join(directory, f"{stem}.mask.npy"), np.asarray(mask, dtype=bool))
+
+
+def _read_strings(directory, stem):
+    values = np.load(os.path.join(directory, f"{stem}.values.npy"), mmap_mode="r")
+    offsets = np.load(os.path.join(directory, f"{stem}.offsets.npy"), mmap_mode="r").tolist()
+    mask = np.load(os.path.join(directory, f"{stem}.mask.npy"), mmap_mode="r")
+    # Decode once and slice by character offsets
+    text = values.tobytes().decode("utf-8")
+    strings = np.array([text[start:end] for start, end in zip(offsets[:-1], offsets[1:])], dtype=object)
+    strings[mask] = np.nan
+    return strings
+
+
+def _write_categorical(directory, stem, values):
+    categorical = pd.Categorical(values)
+    np.save(os.path.join(directory, f"{stem}.codes.npy"), categorical.codes.astype(np.int32))
+    return [str(category) for category in categorical.categories]
+
+
+def _read_categorical(directory, stem, categories, dtype):
+    codes = np.load(os.path.join(directory, f"{stem}.codes.npy"), mmap_mode="r")
+    return pd.Categorical.from_codes(np.asarray(codes), categories=pd.Index(categories, dtype=dtype))
+
+
+def write_snapshot(dataset_key, df, path, source=None):
+    """
+    Write df as a snapshot directory at path, replacing any previous one atomically.
+    The snapshot is read back and compared with df before it is moved into place.
+    """
+    missing = [column for column in REQUIRED_COLUMNS.get(dataset_key, []) if column not in df.columns]
+    if missing:
+        raise SnapshotError(f"{dataset_key} is missing columns {missing}")
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        raise SnapshotError(f"{dataset_key} must have a default RangeIndex")
+
+    tmp = f"{path}.tmp-{uuid.uuid4().hex[:6]}"
+    os.makedirs(tmp)
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            stem = f"c{i}"
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                categories = _write_categorical(tmp, stem, series)
+                columns.append({"name": name, "kind": "categorical", "file": stem, "categories": categories,
+                                "categories_dtype": str(series.cat.categories.dtype)})
+            elif pd.api.types.is_string_dtype(series.dtype):
+                if not series.map(lambda value: isinstance(value, str) or pd.isna(value)).all():
+                    raise SnapshotError(f"{dataset_key} column {name!r} mixes strings and other values")
+                _write_strings(tmp, stem, series.to_numpy(dtype=object))
+                columns.append({"name": name, "kind": "string", "file": stem, "dtype": str(series.dtype)})
+            elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+                np.save(os.path.join(tmp, f"{stem}.npy"), series.to_numpy())
+                columns.append({"name": name, "kind": "numeric", "file": stem, "dtype": str(series.dtype)})
+            else:
+                raise SnapshotError(f"{dataset_key} column {name!r} has unsupported dtype {series.dtype}")
+
+        derived = {}
+        for name, derive in DERIVED_COLUMNS.get(dataset_key, {}).items():
+            values = derive(df)
+            stem = f"d_{name}"
+            derived[name] = {"file": stem, "categories": _write_categorical(tmp, stem, values),
+                             "categories_dtype": str(values.dtype)}
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "dataset": dataset_key,
+            "rows": len(df),
+            "columns": columns,
+            "derived": derived,
+            "created_at": time.time()
+        }
+        if source:
+            stat = os.stat(source)
+            manifest.update(source=os.path.abspath(source), source_size=stat.st_size,
+                            source_mtime_ns=stat.st_mtime_ns, source_sha256=file_sha256(source))
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Validate the round trip before the snapshot can be used
+        loaded, loaded_derived = load_snapshot(tmp)
+        try:
+            pd.testing.assert_frame_equal(loaded, df)
+        except AssertionError as e:
+            raise SnapshotError(f"{dataset_key} snapshot does not match the CSV: {e}")
+        for name in derived:
+            if not loaded_derived[name].equals(pd.Categorical(DERIVED_COLUMNS[dataset_key][name](df))):
+                raise SnapshotError(f"{dataset_key} derived column {name!r} does not match")
+
+        # Swap the new snapshot in, then drop the old one
+        old = None
+        if os.path.exists(path):
+            old = f"{path}.old-{uuid.uuid4().hex[:6]}"
+            os.replace(path, old)
+        os.replace(tmp, path)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return manifest
+
+
+def compile_snapshot(dataset_key, csv_path, snapshot_dir=None):
+    """Parse csv_path and write its snapshot; returns the snapshot path"""
+    csv_path = os.path.expanduser(csv_path)
+    path = snapshot_path(csv_path, snapshot_dir)
+    write_snapshot(dataset_key, read_dataset_csv(dataset_key, csv_path), path, source=csv_path)
+    return path
+
+
+def load_snapshot(path):
+    """Load a snapshot; returns (dataframe, {derived name: Categorical})"""
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} has snapshot format {manifest.get('format')}, expected {SNAPSHOT_FORMAT}")
+
+    data = {}
+    for column in manifest["columns"]:
+        stem = column["file"]
+        if column["kind"] == "categorical":
+            data[column["name"]] = _read_categorical(path, stem, column["categories"], column["categories_dtype"])
+        elif column["kind"] == "string":
+            data[column["name"]] = pd.Series(_read_strings(path, stem), dtype=column["dtype"])
+        else:
+            data[column["name"]] = pd.Series(np.load(os.path.join(path, f"{stem}.npy"), mmap_mode="r"),
+                                             dtype=column["dtype"])
+    df = pd.DataFrame(data, columns=[column["name"] for column in manifest["columns"]])
+    if len(df) != manifest["rows"]:
+        raise SnapshotError(f"{path} has {len(df)} rows, manifest says {manifest['rows']}")
+
+    derived = {
+        name: _read_categorical(path, spec["file"], spec["categories"], spec["categories_dtype"])
+        for name, spec in manifest["derived"].items()
+    }
+    return df, derived
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_fresh(csv_path, path):
+    """
+    Whether the snapshot at path was written from csv_path as it is now: same size, and same mtime
+    or (only hashed when the mtime differs) same SHA-256
+    """
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return False
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except ValueError:
+        return False
+    stat = os.stat(csv_path)
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("source_size") != stat.st_size:
+        return False
+    return (manifest.get("source_mtime_ns") == stat.st_mtime_ns
+            or manifest.get("source_sha256") == file_sha256(csv_path))
+
+
+def load_dataset(dataset_key, csv_path, mode=None):
+    """
+    Load one dataset as (dataframe, derived columns): from its snapshot when that is fresh,
+    otherwise from the CSV (derived is then empty). In "auto" mode a stale snapshot is rewritten.
+    """
+    mode = mode or SNAPSHOT_MODE
+    if mode != "off":
+        path = snapshot_path(csv_path)
+        if is_fresh(csv_path, path):
+            try:
+                return load_snapshot(path)
+            except Exception as e:
+                logger.warning(f"Ignoring snapshot {path}: {e}")
+
+    df = read_dataset_csv(dataset_key, csv_path)
+    if mode == "auto":
+        try:
+            write_snapshot(dataset_key, df, snapshot_path(csv_path), source=csv_path)
+            logger.info(f"Wrote {dataset_key} snapshot to {snapshot_path(csv_path)}")
+        except Exception as e:
+            logger.warning(f"Could not snapshot {dataset_key}: {e}")
+    return df, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gt-courses", help="Georgia Tech courses CSV")
+    parser.add_argument("--moocs", help="MOOCs CSV")
+    parser.add_argument("--jobskills", help="job skills CSV")
+    parser.add_argument("--snapshot-dir", default=None, help=f"default: {SNAPSHOT_DIR}")
+    args = parser.parse_args()
+
+    for dataset_key in ("gt_courses", "moocs", "jobskills"):
+        csv_path = getattr(args, dataset_key)
+        if csv_path:
+            path = compile_snapshot(dataset_key, csv_path, args.snapshot_dir)
+            print(f"{dataset_key}: {csv_path} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
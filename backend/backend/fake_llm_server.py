@@ -0,0 +1,135 @@
+"""
+Local stand-in for the Gemini REST API, for exercising LLM timeouts and the circuit breaker.
+
+Answers POST .../models/<model>:generateContent with a fixed skills response,
+after an optional delay and with an optional error rate. Run it and point the
+API at it:
+
+    python fake_llm_server.py --port 8089 --delay 0.5 --error-rate 0.2
+    GEMINI_API_ENDPOINT=http://localhost:8089 GEMINI_API_KEY=fake poetry run flask -A backend run -p 5001
+
+The behaviour can be changed while it runs, e.g. to simulate an outage:
+
+    curl -X POST localhost:8089/control -d '{"delay": 30}'
+    curl -X POST localhost:8089/control -d '{"error_rate": 1.0, "status": 503}'
+    curl localhost:8089/control
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TEXT = (
+    "Skills: python, machine learning, statistics, sql, data visualization\n"
+    "Relevant Majors: Computer Science, Mathematics\n"
+    "Recommended GT Courses: CS 7641: Machine Learning, ISYE 6501: Introduction to Analytics Modeling"
+)
+
+
+class FakeLLMState:
+    def __init__(self, delay=0.0, error_rate=0.0, status=503, text=DEFAULT_TEXT):
+        self.lock = threading.Lock()
+        self.settings = {"delay": delay, "error_rate": error_rate, "status": status, "text": text}
+        self.requests = 0
+        self.failures = 0
+
+    def update(self, changes):
+        with self.lock:
+            self.settings.update({key: value for key, value in changes.items() if key in self.settings})
+            return self.snapshot()
+
+    def snapshot(self):
+        return {**self.settings, "requests": self.requests, "failures": self.failures}
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up waiting, which is what delays are injected for
+                pass
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path.startswith("/control"):
+                with state.lock:
+                    self._send_json(200, state.snapshot())
+            else:
+                self._send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+        def do_POST(self):
+            if self.path.startswith("/control"):
+                self._send_json(200, state.update(self._read_json()))
+                return
+            if ":generateContent" not in self.path:
+                self._send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+                return
+
+            self._read_json()
+            with state.lock:
+                state.requests += 1
+                settings = dict(state.settings)
+                fail = random.random() < settings["error_rate"]
+                if fail:
+                    state.failures += 1
+            time.sleep(settings["delay"])
+            if fail:
+                self._send_json(settings["status"], {
+                    "error": {"code": settings["status"], "message": "injected failure", "status": "UNAVAILABLE"}
+                })
+                return
+            self._send_json(200, {
+                "candidates": [{
+                    "content": {"parts": [{"text": settings["text"]}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0
+                }],
+                "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0}
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8089, **settings):
+    """Start the fake server in a background thread and return (server, state)"""
+    state = FakeLLMState(**settings)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--status", type=int, default=503, help="HTTP status of injected failures")
+    args = parser.parse_args()
+
+    state = FakeLLMState(args.delay, args.error_rate, args.status)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Fake LLM server on http://{args.host}:{args.port} ({json.dumps(state.snapshot())})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Job-title skill profiles mined from jobskills.csv, so common titles get their skills without an LLM call.
+
+The builder groups the postings by normalized job title (lowercase, without seniority words or
+suffixes such as "- Remote") and keeps, for every title with enough postings, its most frequent
+skills weighted by how often they occur relative to the most frequent one. The profiles are
+written as one compact JSON file and looked up by exact normalized title, then fuzzily with
+difflib among titles sharing a word. Build them from this directory with:
+
+    python job_profiles.py --jobskills Dataset/jobskills.csv
+    python job_profiles.py --lookup "Sr. Data Scientist (Remote)"
+"""
+import argparse
+import difflib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from loguru import logger
+
+try:
+    from backend.rec import normalize_skills, LRUCache
+    from backend.dataset_snapshot import read_dataset_csv
+except ImportError:
+    # Run as a script from this directory
+    from rec import normalize_skills, LRUCache
+    from dataset_snapshot import read_dataset_csv
+
+PROFILES_FORMAT = 1
+# Where the builder writes the profiles and the API reads them from
+JOB_PROFILES_PATH = os.environ.get("REC_JOB_PROFILES", "~/job_profiles.json")
+# Lowest difflib similarity (0-1) accepted for a fuzzy title match
+PROFILE_MATCH_CUTOFF = float(os.environ.get("REC_JOB_PROFILE_CUTOFF", "0.85"))
+
+# Column names (compared lowercase, without spaces and underscores) the builder recognizes
+TITLE_COLUMNS = ["jobtitle", "title", "position", "role", "jobname", "occupation"]
+SKILLS_COLUMNS = ["jobskills", "skills", "skill", "requiredskills", "skillslist", "skillset"]
+
+# Skills the LLM prompt excludes too; they describe nearly every posting and no course
+EXCLUDED_SKILLS = {
+    "communication", "communication skills", "teamwork", "team player", "collaboration", "leadership",
+    "problem solving", "problem-solving", "time management", "attention to detail", "interpersonal skills",
+    "organizational skills", "customer service", "written communication", "verbal communication",
+    "critical thinking", "adaptability", "multitasking", "self-motivated", "work ethic"
+}
+
+# Title words that do not change which skills a job needs
+SENIORITY_WORDS = {
+    "senior", "sr", "junior", "jr", "lead", "principal", "staff", "associate", "intern",
+    "entry", "level", "mid", "i", "ii", "iii", "iv", "1", "2", "3", "4"
+}
+
+
+def normalize_title(job_title):
+    """Lowercased title without seniority words, parentheticals and "- location"-style suffixes"""
+    title = (job_title or "").lower()
+    title = re.sub(r"\(.*?\)|\[.*?\]", " ", title)
+    title = re.split(r"\s[-|–—]\s|,|\|", title)[0]
+    words = re.findall(r"[a-z0-9+#/]+", title.replace(".", ""))
+    return " ".join(word for word in words if word not in SENIORITY_WORDS)
+
+
+def split_skills(value):
+    """Skill names in one cell, whether a comma/semicolon/pipe-separated string or a "['a', 'b']" list"""
+    if not isinstance(value, str):
+        return []
+    value = value.strip().strip("[]")
+    return [skill.strip().strip("'\"").strip() for skill in re.split(r"[,;|\n]", value) if skill.strip().strip("'\"").strip()]
+
+
+def detect_column(columns, candidates, what):
+    by_name = {re.sub(r"[\s_]", "", str(column).lower()): column for column in columns}
+    for candidate in candidates:
+        if candidate in by_name:
+            return by_name[candidate]
+    raise ValueError(f"No {what} column in jobskills data (columns: {', '.join(map(str, columns))})")
+
+
+def build_profiles(df, min_postings=3, top_skills=15, title_column=None, skills_column=None):
+    """
+    Profiles of every normalized title with at least min_postings rows:
+    {title: {"postings": n, "skills": [[skill, weight], ...]}}, at most top_skills skills each,
+    weight 1.0 for the title's most frequent skill
+    """
+    title_column = title_column or detect_column(df.columns, TITLE_COLUMNS, "job title")
+    skills_column = skills_column or detect_column(df.columns, SKILLS_COLUMNS, "skills")
+
+    postings = Counter()
+    skill_counts = defaultdict(Counter)
+    for job_title, cell in zip(df[title_column], df[skills_column]):
+        title = normalize_title(job_title if isinstance(job_title, str) else "")
+        if not title:
+            continue
+        skills = [skill for skill in normalize_skills(split_skills(cell)) if skill not in EXCLUDED_SKILLS]
+        if not skills:
+            continue
+        postings[title] += 1
+        skill_counts[title].update(skills)
+
+    profiles = {}
+    for title, count in postings.items():
+        if count < min_postings:
+            continue
+        ranked = skill_counts[title].most_common(top_skills)
+        top = ranked[0][1]
+        profiles[title] = {"postings": count, "skills": [[skill, round(n / top, 3)] for skill, n in ranked]}
+    return profiles
+
+
+def write_profiles(profiles, path, source=None):
+    """Write the profiles JSON atomically"""
+    path = os.path.expanduser(path)
+    data = {"format": PROFILES_FORMAT, "created_at": time.time(), "source": source and os.path.abspath(source),
+            "profiles": profiles}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class JobProfileIndex:
+    """
+    Lookup of skill profiles by job title: the exact normalized title first, then the closest
+    title by difflib ratio (at least cutoff) among the titles sharing a word with it.
+    Lookups are cached, hit/miss counters are per process.
+    """
+
+    def __init__(self, profiles, cutoff=PROFILE_MATCH_CUTOFF, cache_size=4096, version=""):
+        self.profiles = profiles
+        # Identifies the profiles file in response cache keys
+        self.version = version
+        self.cutoff = cutoff
+        self._titles_by_word = defaultdict(list)
+        for title in profiles:
+            for word in set(title.split()):
+                self._titles_by_word[word].append(title)
+        self._cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self.exact = 0
+        self.fuzzy = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def _match(self, title):
+        if title in self.profiles:
+            return title, "exact"
+        candidates = {candidate for word in set(title.split()) for candidate in self._titles_by_word.get(word, ())}
+        matches = difflib.get_close_matches(title, sorted(candidates), n=1, cutoff=self.cutoff)
+        return (matches[0], "fuzzy") if matches else (None, "misses")
+
+    def lookup(self, job_title):
+        """(matched title, profile) for job_title, or None"""
+        title = normalize_title(job_title)
+        if not title:
+            return None
+        cached = self._cache.get(title)
+        if cached is None:
+            cached = self._match(title)
+            self._cache.put(title, cached)
+        matched, kind = cached
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+        return (matched, self.profiles[matched]) if matched else None
+
+    def skill_names(self):
+        """Every skill of every profile"""
+        return {skill for profile in self.profiles.values() for skill, _ in profile["skills"]}
+
+    def skills(self, job_title, limit=None):
+        """Profile skills of job_title, most frequent first, or None without a matching profile"""
+        found = self.lookup(job_title)
+        if found is None:
+            return None
+        return [skill for skill, _ in found[1]["skills"][:limit]]
+
+    def stats(self):
+        lookups = self.exact + self.fuzzy + self.misses
+        return {
+            "titles": len(self.profiles),
+            "exact": self.exact,
+            "fuzzy": self.fuzzy,
+            "misses": self.misses,
+            "hit_rate": round((self.exact + self.fuzzy) / lookups, 3) if lookups else None
+        }
+
+
+def load_profiles(path=None):
+    """JobProfileIndex of the profiles file at path (default JOB_PROFILES_PATH), or None if there is none"""
+    path = os.path.expanduser(path or JOB_PROFILES_PATH)
+    if not os.path.exists(path):
+        logger.info(f"No job profiles at {path}; every posting's skills come from the LLM")
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("format") != PROFILES_FORMAT:
+        logger.warning(f"Ignoring job profiles {path}: format {data.get('format')}, expected {PROFILES_FORMAT}")
+        return None
+    return JobProfileIndex(data["profiles"], version=str(data.get("created_at", "")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobskills", help="job skills CSV to build the profiles from")
+    parser.add_argument("--out", default=JOB_PROFILES_PATH, help=f"profiles file (default: {JOB_PROFILES_PATH})")
+    parser.add_argument("--min-postings", type=int, default=3, help="postings a title needs to get a profile")
+    parser.add_argument("--top-skills", type=int, default=15, help="skills kept per title")
+    parser.add_argument("--title-column", help="job title column, if it is not detected")
+    parser.add_argument("--skills-column", help="skills column, if it is not detected")
+    parser.add_argument("--lookup", nargs="*", default=[], help="job titles to look up in the profiles file")
+    args = parser.parse_args()
+
+    if args.jobskills:
+        start = time.perf_counter()
+        df = read_dataset_csv("jobskills", os.path.expanduser(args.jobskills))
+        profiles = build_profiles(df, args.min_postings, args.top_skills, args.title_column, args.skills_column)
+        write_profiles(profiles, args.out, source=args.jobskills)
+        print(f"{len(profiles)} title profiles from {len(df)} postings -> {args.out} "
+              f"({os.path.getsize(os.path.expanduser(args.out)) / 1024:.0f} KiB, {time.perf_counter() - start:.1f}s)")
+
+    if args.lookup:
+        index = load_profiles(args.out)
+        for job_title in args.lookup:
+            found = index.lookup(job_title) if index else None
+            if found:
+                print(f"{job_title!r} -> {found[0]!r} ({found[1]['postings']} postings): "
+                      f"{', '.join(f'{skill} {weight}' for skill, weight in found[1]['skills'])}")
+            else:
+                print(f"{job_title!r} -> no profile")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from loguru import logger
+
+# Wall-clock budget for one LLM call, in seconds
+LLM_TIMEOUT = float(os.environ.get("REC_LLM_TIMEOUT", "8"))
+# Consecutive failures or timeouts that open the circuit
+LLM_FAILURE_THRESHOLD = int(os.environ.get("REC_LLM_FAILURE_THRESHOLD", "3"))
+# Seconds the circuit stays open before a half-open probe is let through
+LLM_RESET_TIMEOUT = float(os.environ.get("REC_LLM_RESET_TIMEOUT", "30"))
+# Threads available for LLM calls; calls that time out keep theirs until the client gives up
+LLM_MAX_CONCURRENCY = int(os.environ.get("REC_LLM_MAX_CONCURRENCY", "8"))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit is open"""
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when an LLM call misses its deadline"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with a per-call deadline for a remote LLM.
+
+    closed: calls go through; LLM_FAILURE_THRESHOLD consecutive failures or
+    timeouts open the circuit. open: calls fail immediately with
+    CircuitOpenError so the caller can use its fallback. After reset_timeout
+    seconds the circuit is half-open and lets a single probe call through;
+    its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=LLM_FAILURE_THRESHOLD, reset_timeout=LLM_RESET_TIMEOUT,
+                 timeout=LLM_TIMEOUT, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"llm-{name}")
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.calls = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def _acquire(self):
+        """
+        (allowed, is_probe) for a call now; in half-open only one probe at a time,
+        until that probe's own result is recorded
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                self.calls += 1
+                return True, False
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                self.calls += 1
+                return True, True
+            self.rejected += 1
+            return False, False
+
+    def _record(self, success, counter=None, is_probe=False):
+        with self._lock:
+            # A call admitted before the circuit opened can finish while the probe is still running
+            if is_probe:
+                self._probing = False
+            if counter:
+                setattr(self, counter, getattr(self, counter) + 1)
+            if success:
+                if self._state != self.CLOSED:
+                    logger.info(f"{self.name} circuit closed")
+                self._state = self.CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"{self.name} circuit opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, fn, *args, timeout=None, **kwargs):
+        """
+        Run fn(*args, **kwargs) with a deadline of timeout (default self.timeout) seconds.
+        Raises CircuitOpenError without calling fn while the circuit is open, LLMTimeoutError
+        when the deadline passes, and re-raises fn's own exceptions; all but the first count as failures.
+        """
+        allowed, is_probe = self._acquire()
+        if not allowed:
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # The worker thread finishes in the background; the caller moves on now
+            future.cancel()
+            self._record(False, "timeouts", is_probe)
+            raise LLMTimeoutError(f"{self.name} call exceeded {timeout:.1f}s")
+        except Exception:
+            self._record(False, "errors", is_probe)
+            raise
+        self._record(True, is_probe=is_probe)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "timeout": self.timeout,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout
+            }
+
+
+gemini_breaker = CircuitBreaker("gemini")
@@ -1,14 +1,30 @@
-import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+import json
+import hashlib
+import sqlite3
+import threading
+import queue
+import shutil
+import time
+import uuid
+import atexit
+import math
 from sentence_transformers import SentenceTransformer
 import chromadb
 import requests
 import re
 from functools import lru_cache
-
-# Configure page
-st.set_page_config(page_title="Course Recommender", layout="wide")
+from collections import OrderedDict
+from loguru import logger
+try:
+    from backend.dataset_snapshot import load_dataset, course_prefixes
+    from backend.skill_extractor import SkillExtractor, build_taxonomy, skill_weight
+except ImportError:
+    # Run as a script from this directory (streamlit_app.py, benchmarks.py)
+    from dataset_snapshot import load_dataset, course_prefixes
+    from skill_extractor import SkillExtractor, build_taxonomy, skill_weight
 
 # Job-to-major mapping
 job_to_major = {
@@ -65,23 +81,140 @@ prefix_to_major = {
     'CP': 'City Planning'
 }
 
+# Sentence embedding model used for all vector collections and queries
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# SQLite file caching embeddings by (model, text hash); empty string disables the cache
+EMBEDDING_CACHE_PATH = os.environ.get("REC_EMBEDDING_CACHE", "~/embedding_cache.sqlite")
+
+# Query embeddings kept in the in-process LRU cache
+QUERY_CACHE_SIZE = int(os.environ.get("REC_QUERY_CACHE_SIZE", "4096"))
+# Build uncached composite queries from cached job title and skill vectors instead of encoding them
+COMPOSE_QUERY_VECTORS = os.environ.get("REC_COMPOSE_QUERY_VECTORS", "false").lower() in ("1", "true", "yes")
+
+# Per-skill direct-search score components kept in the in-process LRU cache
+DIRECT_SEARCH_CACHE_SIZE = int(os.environ.get("REC_DIRECT_SEARCH_CACHE_SIZE", "1024"))
+
+# Worker processes used for bulk (ingest) encoding; 0 or 1 encodes in the calling process
+ENCODE_WORKERS = int(os.environ.get("REC_ENCODE_WORKERS", "0"))
+# Torch threads per encode worker; 0 divides the host's cores evenly between the workers
+ENCODE_WORKER_THREADS = int(os.environ.get("REC_ENCODE_WORKER_THREADS", "0"))
+
+# Compressed form the NumPy index scans for first-pass top-k: "none", "float16" or "int8".
+# Candidates are re-scored exactly against the memory-mapped float32 matrix.
+INDEX_QUANTIZATION = os.environ.get("REC_INDEX_QUANTIZATION", "none")
+
+# Chroma persistence directory
+CHROMA_DB_PATH = "~/chroma_db"
+
+# Vector search backend: "chroma" (PersistentClient at ~/chroma_db) or "numpy" (in-process EmbeddingIndex)
+VECTOR_BACKEND = os.environ.get("REC_VECTOR_BACKEND", "chroma")
+NUMPY_INDEX_DIR = os.environ.get("REC_NUMPY_INDEX_DIR", "~/numpy_index")
+
+# Document text and metadata stored for each vector collection; key_field identifies a course in results
+VECTOR_COLLECTIONS = {
+    "gt_courses": {"text_field": "Description", "metadata_fields": ["Course ID", "Course Name"], "id_prefix": "gt",
+                   "key_field": "Course ID"},
+    "moocs": {"text_field": "About", "metadata_fields": ["Name", "Link"], "id_prefix": "mooc",
+              "key_field": "Name"}
+}
+
+# Nearest courses retrieved per weighted skill by batched_semantic_search
+SKILL_QUERY_RESULTS = 10
+
+# Text fields searched by improved_direct_search and indexed by KeywordIndex
+DIRECT_SEARCH_FIELDS = {
+    "gt_courses": ["Course Name", "Description"],
+    "moocs": ["Name", "About"]
+}
+
 # Function to get absolute path relative to the script location
 def get_abs_path(relative_path):
     return os.path.expanduser(relative_path)
 
-@st.cache_resource
+class ResourceRegistry:
+    """
+    Process-wide owner of the engine's heavy resources (embedding model, vector store client, datasets).
+
+    Each resource is registered with a factory and created on first get(), once per process even
+    when several requests ask for it at the same time. Lifecycle hooks: startup() creates resources
+    ahead of the first request, close() releases one resource (the next get() recreates it) and
+    shutdown() releases everything in reverse creation order, calling each resource's close hook.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._factories = {}
+        self._closers = {}
+        self._resources = {}
+
+    def register(self, name, factory, close=None):
+        """Set the factory (and optional close(resource) hook) for name; a loaded instance is kept"""
+        with self._lock:
+            self._factories[name] = factory
+            self._closers[name] = close
+
+    def get(self, name):
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._lock:
+            if name not in self._resources:
+                if name not in self._factories:
+                    raise KeyError(f"No resource registered as {name!r}")
+                start = time.perf_counter()
+                self._resources[name] = self._factories[name]()
+                logger.info(f"Loaded {name} in {time.perf_counter() - start:.2f}s")
+            return self._resources[name]
+
+    def put(self, name, resource):
+        """Replace name with an instance built elsewhere, closing the previous one"""
+        with self._lock:
+            self.close(name)
+            self._resources[name] = resource
+
+    def loaded(self, name):
+        return name in self._resources
+
+    def registered(self, name):
+        return name in self._factories
+
+    def startup(self, names=None):
+        """Create the given (default: all registered) resources now instead of on first use"""
+        for name in names or list(self._factories):
+            self.get(name)
+
+    def close(self, name):
+        with self._lock:
+            resource = self._resources.pop(name, None)
+            close = self._closers.get(name)
+        if resource is not None and close is not None:
+            try:
+                close(resource)
+            except Exception as e:
+                logger.warning(f"Closing {name} failed: {e}")
+
+    def shutdown(self):
+        for name in reversed(list(self._resources)):
+            self.close(name)
+
+    def status(self):
+        """{name: loaded} for every registered resource"""
+        with self._lock:
+            return {name: name in self._resources for name in self._factories}
+
+
+resources = ResourceRegistry()
+resources.register("embedding_model", lambda: SentenceTransformer(EMBEDDING_MODEL_NAME))
+resources.register("vector_db", lambda: chromadb.PersistentClient(path=get_abs_path(CHROMA_DB_PATH)))
+atexit.register(resources.shutdown)
+
 def load_embedding_model():
-    # Load and return the embedding model
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    return model
+    return resources.get("embedding_model")
 
-@st.cache_resource
 def setup_vector_db():
-    # Set up ChromaDB client
-    client = chromadb.PersistentClient(path=get_abs_path("~/chroma_db"))
-    return client
+    return resources.get("vector_db")
 
-@st.cache_data
 def load_datasets(jobskills_path, gt_courses_path, moocs_path):
     datasets = {}
     paths = {
@@ -90,25 +223,34 @@ def load_datasets(jobskills_path, gt_courses_path, moocs_path):
         "moocs": moocs_path
     }
     
+    derived = {}
     for key, path in paths.items():
         path = get_abs_path(path)
         if os.path.exists(path):
             try:
-                if key == "gt_courses":
-                    datasets[key] = pd.read_csv(path, sep=';', on_bad_lines='skip', engine='python')
-                else:
-                    datasets[key] = pd.read_csv(path)
-                st.success(f"Loaded {key} data from {path}")
+                # From the binary snapshot when it was written from this exact CSV
+                datasets[key], derived[key] = load_dataset(key, path)
+                logger.info(f"Loaded {key} data from {path}")
             except Exception as e:
-                st.warning(f"Could not load {key} data: {str(e)}")
+                logger.warning(f"Could not load {key} data: {str(e)}")
         else:
-            st.warning(f"{key} path does not exist: {path}")
+            logger.warning(f"{key} path does not exist: {path}")
+
+    # Precompute per-course columns once instead of re-deriving them on every request
+    if "gt_courses" in datasets:
+        datasets["catalog"] = CatalogSnapshot(datasets["gt_courses"], prefix=derived["gt_courses"].get("prefix"))
+    
+    # Index the searchable text once so direct search is posting-list lookups instead of regex scans
+    datasets["keyword_index"] = build_keyword_indexes(datasets)
+    
+    # Cached direct-search components belong to the previous load
+    direct_search_cache.clear()
     
     return datasets
 
-def extract_skills_ollama(job_title, job_description):
+def extract_skills_ollama(job_title, job_description, config):
     """Extract skills using locally hosted Ollama API"""
-    API_URL = st.session_state.get("llm_api_url", "http://localhost:11434/api/generate")
+    API_URL = config.get("llm_api_url", "http://localhost:11434/api/generate")
     
     prompt = f"""You are a career skills expert with deep knowledge of technical fields.
 
@@ -131,7 +273,7 @@ Skills:"""
 
     try:
         payload = {
-            "model": st.session_state.get("llm_model_name", "llama3.2"),
+            "model": config.get("llm_model_name", "llama3.2"),
             "prompt": prompt,
             "stream": False,
             "temperature": 0.1
@@ -144,24 +286,24 @@ Skills:"""
         
         return skills_list
     except Exception as e:
-        st.error(f"LLM API Error: {str(e)}")
+        logger.error(f"LLM API Error: {str(e)}")
         return []
 
-def extract_skills_gemini(job_title, job_description):
+def extract_skills_gemini(job_title, job_description, config):
     """Extract skills using Google's Gemini API"""
     import google.generativeai as genai
     
     # Setup the API with your key (store this securely)
     # Get your API key from https://aistudio.google.com/app/apikey
-    if "api_key" not in st.session_state:
-        st.error("Please enter your Gemini API key in settings")
+    if "api_key" not in config:
+        logger.error("Please enter your Gemini API key in settings")
         return []
         
-    genai.configure(api_key=st.session_state.get("api_key"))
+    genai.configure(api_key=config.get("api_key"))
     
     # Create a model instance
     model = genai.GenerativeModel(
-        model_name=st.session_state.get("llm_model_name", "models/gemini-1.5-pro-latest"),
+        model_name=config.get("llm_model_name", "models/gemini-1.5-pro-latest"),
         generation_config={
             "temperature": 0.1,
             "max_output_tokens": 250,
@@ -207,17 +349,17 @@ Recommended GT Courses: [Course ID 1]: [Course Name 1], [Course ID 2]: [Course N
             gt_course_recommendations = courses_section.split(",")
         
         # Store LLM-recommended courses for later reference
-        st.session_state["llm_gt_recommendations"] = gt_course_recommendations
+        config["llm_gt_recommendations"] = gt_course_recommendations
         
         return skills_list
     except Exception as e:
-        st.error(f"Gemini API Error: {str(e)}")
+        logger.error(f"Gemini API Error: {str(e)}")
         return []
-def extract_skills_together(job_title, job_description):
+def extract_skills_together(job_title, job_description, config):
     """Extract skills using Together.ai API"""
     API_URL = "https://api.together.xyz/v1/completions"
     headers = {
-        "Authorization": f"Bearer {st.session_state.get('api_key', '')}",
+        "Authorization": f"Bearer {config.get('api_key', '')}",
         "Content-Type": "application/json"
     }
     
@@ -242,7 +384,7 @@ Skills:"""
 
     try:
         payload = {
-            "model": st.session_state.get("llm_model_name", "togethercomputer/llama-2-7b-chat"),
+            "model": config.get("llm_model_name", "togethercomputer/llama-2-7b-chat"),
             "prompt": prompt,
             "max_tokens": 100,
             "temperature": 0.1
@@ -255,14 +397,14 @@ Skills:"""
         
         return skills_list
     except Exception as e:
-        st.error(f"Together API Error: {str(e)}")
+        logger.error(f"Together API Error: {str(e)}")
         return []
 
-def extract_skills_deepseek(job_title, job_description):
+def extract_skills_deepseek(job_title, job_description, config):
     """Extract skills using DeepSeek API"""
     API_URL = "https://api.deepseek.com/v1/chat/completions"
     headers = {
-        "Authorization": f"Bearer {st.session_state.get('api_key', '')}",
+        "Authorization": f"Bearer {config.get('api_key', '')}",
         "Content-Type": "application/json"
     }
     
@@ -286,7 +428,7 @@ Example output format: Python, SQL, TensorFlow, data visualization, cloud comput
 
     try:
         payload = {
-            "model": st.session_state.get("llm_model_name", "deepseek-chat"),
+            "model": config.get("llm_model_name", "deepseek-chat"),
             "messages": [
                 {"role": "user", "content": prompt}
             ],
@@ -302,87 +444,100 @@ Example output format: Python, SQL, TensorFlow, data visualization, cloud comput
         
         return skills_list
     except Exception as e:
-        st.error(f"DeepSeek API Error: {str(e)}")
+        logger.error(f"DeepSeek API Error: {str(e)}")
         return []
 
-def extract_skills(job_title, job_description, api_type="ollama"):
-    """Extract skills using the selected API method"""
+def extract_skills(job_title, job_description, api_type="ollama", config=None):
+    """
+    Extract skills using the selected API method.
+    config holds api_key, llm_model_name and llm_api_url (the Streamlit app passes st.session_state).
+    """
+    config = {} if config is None else config
     if api_type == "ollama":
-        return extract_skills_ollama(job_title, job_description)
+        return extract_skills_ollama(job_title, job_description, config)
     elif api_type == "together":
-        return extract_skills_together(job_title, job_description)
+        return extract_skills_together(job_title, job_description, config)
     elif api_type == "deepseek":
-        return extract_skills_deepseek(job_title, job_description)
+        return extract_skills_deepseek(job_title, job_description, config)
     elif api_type=="gemini":
-        return extract_skills_gemini(job_title, job_description)
+        return extract_skills_gemini(job_title, job_description, config)
     else:
-        st.error(f"Unknown API type: {api_type}")
+        logger.error(f"Unknown API type: {api_type}")
         return []
 # New helper functions for advanced recommendation system
 
-def fallback_skill_extraction(job_description):
-    """Extract potential skills using keyword analysis when LLM extraction fails"""
-    # Common technical skills to look for
-    common_skills = [
-        "python", "java", "javascript", "c++", "sql", "nosql", "aws", "azure", 
-        "docker", "kubernetes", "machine learning", "deep learning", "data analysis",
-        "visualization", "tensorflow", "pytorch", "nlp", "computer vision", "agile",
-        "cloud", "devops", "ci/cd", "git", "data science", "statistics", "r programming",
-        "big data", "hadoop", "spark", "tableau", "power bi", "excel", "web development",
-        "mobile development", "api", "microservices", "security", "networking", "linux",
-        "windows", "databases", "data engineering", "etl", "analytics", "full stack"
-    ]
-    
-    # Find matches
-    job_desc_lower = job_description.lower()
-    found_skills = []
-    
-    # Check for skills
-    for skill in common_skills:
-        if re.search(rf'\b{re.escape(skill)}\b', job_desc_lower):
-            found_skills.append(skill)
+# Common technical skills to look for in fallback extraction
+COMMON_SKILLS = [
+    "python", "java", "javascript", "c++", "sql", "nosql", "aws", "azure", 
+    "docker", "kubernetes", "machine learning", "deep learning", "data analysis",
+    "visualization", "tensorflow", "pytorch", "nlp", "computer vision", "agile",
+    "cloud", "devops", "ci/cd", "git", "data science", "statistics", "r programming",
+    "big data", "hadoop", "spark", "tableau", "power bi", "excel", "web development",
+    "mobile development", "api", "microservices", "security", "networking", "linux",
+    "windows", "databases", "data engineering", "etl", "analytics", "full stack"
+]
+
+# Common skill variations and synonyms used by normalize_skills
+SKILL_MAPPINGS = {
+    "python programming": "python",
+    "python coding": "python",
+    "ml": "machine learning",
+    "tensorflow": "tensorflow/keras",
+    "pytorch": "pytorch",
+    "artificial intelligence": "machine learning",
+    "visualization": "data visualization",
+    "postgresql": "sql",
+    "mysql": "sql",
+    "database": "databases",
+    "cloud computing": "cloud",
+    "aws cloud": "aws",
+    "amazon web services": "aws",
+    "azure cloud": "azure",
+    "google cloud": "gcp",
+    "software development": "software engineering",
+    "javascript": "js/javascript",
+    "js": "js/javascript",
+    "react": "react/frontend",
+    "ui/ux": "ux design",
+    "statistics": "statistics/math",
+    "mathematical": "statistics/math",
+    "deep learning": "deep learning/neural networks",
+    "nn": "deep learning/neural networks",
+    "data analytics": "data analysis",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "ci/cd": "devops/ci/cd",
+    "linux": "linux/unix",
+    "unix": "linux/unix",
+}
+
+# Every skill name the keyword index prepares postings for up front
+SKILL_VOCABULARY = sorted(set(COMMON_SKILLS) | set(SKILL_MAPPINGS) | set(SKILL_MAPPINGS.values()))
+
+def build_skill_extractor(extra_skills=None):
+    """
+    SkillExtractor over COMMON_SKILLS, every SKILL_MAPPINGS synonym, the REC_SKILL_TAXONOMY file and extra_skills,
+    by default every skill of the job profiles when a "job_profiles" resource is registered (the API does)
+    """
+    if extra_skills is None:
+        profiles = resources.get("job_profiles") if resources.registered("job_profiles") else None
+        extra_skills = profiles.skill_names() if profiles is not None else ()
+    return SkillExtractor(build_taxonomy(COMMON_SKILLS, SKILL_MAPPINGS, extra_skills=extra_skills))
+
+resources.register("skill_extractor", build_skill_extractor)
+
+def fallback_skill_extraction(job_description, job_title=""):
+    """Extract potential skills using keyword analysis when LLM extraction fails, most important first"""
+    # One pass of the taxonomy automaton finds and normalizes every known skill and synonym
+    found_skills = resources.get("skill_extractor").extract(job_title, job_description)
     
-    st.write("Extracted Skills (fallback method):", found_skills)
+    logger.debug(f"Extracted Skills (fallback method): {found_skills}")
     return found_skills
 
 def normalize_skills(skills):
     """
     Normalize extracted skills to handle variations and synonyms
     """
-    # Define common variations and synonyms
-    skill_mappings = {
-        "python programming": "python",
-        "python coding": "python",
-        "ml": "machine learning",
-        "tensorflow": "tensorflow/keras",
-        "pytorch": "pytorch",
-        "artificial intelligence": "machine learning",
-        "visualization": "data visualization",
-        "postgresql": "sql",
-        "mysql": "sql",
-        "database": "databases",
-        "cloud computing": "cloud",
-        "aws cloud": "aws",
-        "amazon web services": "aws",
-        "azure cloud": "azure",
-        "google cloud": "gcp",
-        "software development": "software engineering",
-        "javascript": "js/javascript",
-        "js": "js/javascript",
-        "react": "react/frontend",
-        "ui/ux": "ux design",
-        "statistics": "statistics/math",
-        "mathematical": "statistics/math",
-        "deep learning": "deep learning/neural networks",
-        "nn": "deep learning/neural networks",
-        "data analytics": "data analysis",
-        "nlp": "natural language processing",
-        "cv": "computer vision",
-        "ci/cd": "devops/ci/cd",
-        "linux": "linux/unix",
-        "unix": "linux/unix",
-    }
-    
     # Clean and normalize skills
     normalized_skills = []
     seen_skills = set()
@@ -391,7 +546,7 @@ def normalize_skills(skills):
         skill_lower = skill.lower().strip()
         
         # Apply mappings if they exist
-        normalized_skill = skill_mappings.get(skill_lower, skill_lower)
+        normalized_skill = SKILL_MAPPINGS.get(skill_lower, skill_lower)
         
         # Avoid duplicates
         if normalized_skill not in seen_skills:
@@ -407,27 +562,23 @@ def weight_skills(skills, job_title, job_description):
     weighted_skills = []
     job_title_lower = job_title.lower()
     job_desc_lower = job_description.lower()
+    first_paragraph = job_desc_lower.split("\n")[0]
+    
+    # Title, occurrence and first-paragraph features of every taxonomy skill (through any synonym) in one pass
+    extractor = resources.get("skill_extractor")
+    features = extractor.analyze(job_title, job_description)
     
     for skill in skills:
-        # Base weight
-        weight = 1.0
+        if skill in features or skill in extractor.canonical_skills:
+            found = features.get(skill)
+            weight = found.weight if found else skill_weight(False, 0, False)
+        else:
+            # Skills outside the taxonomy (free-form LLM output) are matched as substrings
+            skill_lower = skill.lower()
+            weight = skill_weight(skill_lower in job_title_lower, job_desc_lower.count(skill_lower),
+                                  skill_lower in first_paragraph)
         
-        # If skill appears in title, it's more important
-        if skill.lower() in job_title_lower:
-            weight += 0.5
-            
-        # Count occurrences in description
-        skill_occurrences = job_desc_lower.count(skill.lower())
-        # More occurrences suggest higher importance
-        if skill_occurrences > 1:
-            weight += min(0.3, skill_occurrences * 0.1)  # Cap at +0.3
-            
-        # Check if skill appears early in description (likely more important)
-        first_paragraph = job_desc_lower.split("\n")[0]
-        if skill.lower() in first_paragraph:
-            weight += 0.2
-            
-        weighted_skills.append({"skill": skill, "weight": min(2.0, weight)})  # Cap at 2.0
+        weighted_skills.append({"skill": skill, "weight": weight})
     
     # Sort by weight
     weighted_skills.sort(key=lambda x: x["weight"], reverse=True)
@@ -474,17 +625,29 @@ def is_relevant_major_course(course_id, relevant_majors):
         
     return major in relevant_majors
 
+def relevant_major_mask(datasets, relevant_majors):
+    """
+    Boolean mask over datasets["gt_courses"] for courses in one of relevant_majors.
+    Uses the precomputed CatalogSnapshot bitmaps when available.
+    """
+    catalog = datasets.get("catalog")
+    if catalog is not None:
+        return catalog.relevant_mask(relevant_majors)
+    return datasets["gt_courses"]['Course ID'].apply(
+        lambda x: is_relevant_major_course(x, relevant_majors)
+    ).to_numpy(dtype=bool)
+
 # Enhanced skill extraction that combines LLM extraction with user-provided skills
-def enhanced_skill_extraction(job_title, job_description, user_skills=None, api_type="gemini"):
+def enhanced_skill_extraction(job_title, job_description, user_skills=None, api_type="gemini", config=None):
     """
     Extract skills using the selected API method and combine with user-provided skills
     """
     # Get skills from LLM
-    extracted_skills = extract_skills(job_title, job_description, api_type)
+    extracted_skills = extract_skills(job_title, job_description, api_type, config)
     
     # If LLM extraction failed, use fallback
     if not extracted_skills:
-        extracted_skills = fallback_skill_extraction(job_description)
+        extracted_skills = fallback_skill_extraction(job_description, job_title)
     
     # Include user-provided skills if any
     if user_skills:
@@ -502,7 +665,419 @@ def enhanced_skill_extraction(job_title, job_description, user_skills=None, api_
     # Limit to reasonable number (prioritizing user skills)
     return normalized_skills[:10]
 
-def initialize_vector_database(datasets, embedding_model):
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry once it holds maxsize entries"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model name, sha256 of the text).
+
+    Vectors are stored as float16 blobs in a SQLite file, so rebuilding a
+    collection or index from unchanged data, or in a new environment that
+    shares the file, skips the model entirely for texts already seen.
+    """
+
+    # Keep IN (...) lists under SQLite's bound-parameter limit
+    LOOKUP_BATCH = 500
+
+    def __init__(self, path, model_name=EMBEDDING_MODEL_NAME):
+        self.path = get_abs_path(path)
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._writer = None
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash))"
+            )
+
+    def get_many(self, hashes):
+        """Return {text_hash: float32 vector} for the hashes that are cached"""
+        hashes = list(hashes)
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), self.LOOKUP_BATCH):
+                batch = hashes[start:start + self.LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [self.model_name, *batch]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+        return found
+
+    def put_many(self, vectors):
+        """Store {text_hash: vector} as float16"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(self.model_name, key, np.asarray(vector, dtype=np.float16).tobytes()) for key, vector in vectors.items()]
+            )
+
+    def put_many_later(self, vectors):
+        """Queue {text_hash: vector} for a background thread to store, without waiting for SQLite"""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="embedding-cache-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+        self._pending.put(vectors)
+
+    def _write_pending(self):
+        while True:
+            vectors = dict(self._pending.get())
+            batches = 1
+            # Everything queued meanwhile goes in the same transaction
+            while True:
+                try:
+                    vectors.update(self._pending.get_nowait())
+                    batches += 1
+                except queue.Empty:
+                    break
+            try:
+                self.put_many(vectors)
+            except Exception as e:
+                logger.warning(f"Embedding cache write of {len(vectors)} vectors failed: {e}")
+            finally:
+                for _ in range(batches):
+                    self._pending.task_done()
+
+    def flush(self):
+        """Wait until every vector queued by put_many_later is stored"""
+        self._pending.join()
+
+    def encode(self, embedding_model, texts, write_behind=False):
+        """
+        Encode texts like embedding_model.encode, reading through the cache.
+        Only texts missing from the cache reach the model. Their vectors are returned
+        at full precision and stored as float16; cached texts come back float16-rounded.
+        With write_behind the new vectors are stored by a background thread (put_many_later).
+        """
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.get_many(set(hashes))
+        
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing[key] = text
+        if missing:
+            encoded = np.asarray(embedding_model.encode(list(missing.values())), dtype=np.float32)
+            fresh = dict(zip(missing.keys(), encoded))
+            if write_behind:
+                self.put_many_later(fresh)
+            else:
+                self.put_many(fresh)
+            vectors.update(fresh)
+        
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        result = np.stack([vectors[key] for key in hashes])
+        return result[0] if single else result
+
+_embedding_cache = None
+
+def get_embedding_cache():
+    """Return the shared EmbeddingCache, or None when REC_EMBEDDING_CACHE is empty"""
+    global _embedding_cache
+    if _embedding_cache is None and EMBEDDING_CACHE_PATH:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+    return _embedding_cache
+
+def cached_encode(embedding_model, texts, write_behind=False):
+    """Encode texts through the persistent embedding cache when it is enabled"""
+    cache = get_embedding_cache()
+    if cache is None:
+        return embedding_model.encode(texts)
+    return cache.encode(embedding_model, texts, write_behind=write_behind)
+
+class QueryEmbeddings:
+    """
+    Query-time embedding lookup that keeps the encoder off the hot path.
+
+    Vectors for the canonical skill vocabulary and known job titles are
+    precomputed into a table that is never evicted; every other query text
+    goes through an LRUCache. Only texts found in neither reach the model
+    (via cached_encode, so they also land in the persistent embedding cache;
+    on the request path that write is queued to a background thread).
+    """
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.cache = LRUCache(maxsize)
+        self.table = {}
+        self._lock = threading.Lock()
+
+    def precompute(self, embedding_model, texts):
+        """Encode texts missing from the precomputed table in one call and add them to it"""
+        with self._lock:
+            missing = [text for text in dict.fromkeys(texts) if text not in self.table]
+            if missing:
+                self.table.update(zip(missing, np.atleast_2d(cached_encode(embedding_model, missing))))
+
+    def lookup(self, text):
+        """Cached vector for text, or None"""
+        vector = self.table.get(text)
+        return vector if vector is not None else self.cache.get(text)
+
+    def encode(self, embedding_model, texts):
+        """Encode a list of query texts, sending only the uncached ones to the model in a single call"""
+        vectors = {text: self.lookup(text) for text in dict.fromkeys(texts)}
+        missing = [text for text, vector in vectors.items() if vector is None]
+        if missing:
+            encoded = cached_encode(embedding_model, missing, write_behind=True)
+            for text, vector in zip(missing, np.atleast_2d(encoded)):
+                self.cache.put(text, vector)
+                vectors[text] = vector
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([vectors[text] for text in texts])
+
+    def stats(self):
+        return {"precomputed": len(self.table), **self.cache.stats()}
+
+_query_embeddings = None
+_query_embeddings_lock = threading.Lock()
+
+def get_query_embeddings(embedding_model):
+    """Return the shared QueryEmbeddings, precomputing the skill vocabulary and job title vectors on first use"""
+    global _query_embeddings
+    if _query_embeddings is None:
+        # Warmup, the warm_query_embeddings task and requests can all get here first; one of them encodes
+        with _query_embeddings_lock:
+            if _query_embeddings is None:
+                query_embeddings = QueryEmbeddings()
+                query_embeddings.precompute(embedding_model, SKILL_VOCABULARY + list(job_to_major))
+                _query_embeddings = query_embeddings
+    return _query_embeddings
+
+def warm_query_embeddings(embedding_model, texts):
+    """Put texts (e.g. a job title) in the query embedding cache ahead of the request that needs them"""
+    get_query_embeddings(embedding_model).encode(embedding_model, list(texts))
+
+def compose_query_vector(parts):
+    """Unit-length weighted sum of (vector, weight) parts, approximating the embedding of their combined text"""
+    composed = sum(weight * _normalize_rows(vector)[0] for vector, weight in parts)
+    return _normalize_rows(composed)[0]
+
+class EncodePool:
+    """
+    Bulk encoder that shards texts across worker processes.
+
+    Each worker is a spawned process holding its own copy of the embedding model
+    (sentence-transformers' multi-process pool), with its torch thread count pinned
+    through OMP_NUM_THREADS/MKL_NUM_THREADS so the workers do not oversubscribe the cores.
+    encode() splits a call into one chunk per worker and returns the embeddings in input order,
+    so a pool can be passed anywhere an embedding model's encode is used.
+    """
+
+    THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS")
+
+    def __init__(self, embedding_model, workers, threads_per_worker=0):
+        self.model = embedding_model
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        
+        # Spawned workers read the thread limits from the environment when torch starts
+        saved = {var: os.environ.get(var) for var in self.THREAD_ENV_VARS}
+        os.environ.update({var: str(self.threads_per_worker) for var in self.THREAD_ENV_VARS})
+        try:
+            self.pool = embedding_model.start_multi_process_pool(target_devices=["cpu"] * workers)
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        embeddings = self.model.encode_multi_process(
+            texts, self.pool, chunk_size=math.ceil(len(texts) / self.workers)
+        )
+        return embeddings[0] if single else embeddings
+
+    def close(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+_encode_pool = None
+
+def bulk_encoder(embedding_model):
+    """
+    Encoder for ingest and index builds: a shared EncodePool when REC_ENCODE_WORKERS > 1,
+    otherwise the embedding model itself. The pool is started on first use and stopped at exit.
+    """
+    global _encode_pool
+    if ENCODE_WORKERS <= 1:
+        return embedding_model
+    if _encode_pool is None:
+        _encode_pool = EncodePool(embedding_model, ENCODE_WORKERS, ENCODE_WORKER_THREADS)
+        atexit.register(_encode_pool.close)
+    return _encode_pool
+
+def benchmark_encoding(embedding_model, texts, worker_counts=(1, 2, 4), threads_per_worker=0):
+    """
+    Time bulk encoding of texts (bypassing the embedding cache) for each worker count.
+    Returns a list of {"workers", "threads_per_worker", "docs", "seconds", "docs_per_sec"}.
+    """
+    texts = list(texts)
+    results = []
+    for workers in worker_counts:
+        if workers <= 1:
+            encoder, threads = embedding_model, None
+        else:
+            encoder = EncodePool(embedding_model, workers, threads_per_worker)
+            threads = encoder.threads_per_worker
+            # Warm up so process start-up and model loading are not timed
+            encoder.encode(texts[:workers])
+        try:
+            start = time.perf_counter()
+            encoder.encode(texts)
+            elapsed = time.perf_counter() - start
+        finally:
+            if encoder is not embedding_model:
+                encoder.close()
+        results.append({
+            "workers": workers,
+            "threads_per_worker": threads,
+            "docs": len(texts),
+            "seconds": round(elapsed, 3),
+            "docs_per_sec": round(len(texts) / elapsed, 1) if elapsed else None
+        })
+    return results
+
+# Rows encoded per ingest batch for each collection
+INGEST_BATCH_SIZES = {"gt_courses": 500, "moocs": 250}
+
+def stream_ingest(batches, encode, write, queue_size=2):
+    """
+    Run encode and write over batches as a two-stage pipeline.
+
+    The calling thread encodes batch N+1 while a writer thread stores batch N;
+    encoded arrays are handed over through a bounded queue, so at most
+    queue_size batches wait for the writer. batches yields (rows, texts),
+    encode(texts) returns an array of embeddings and write(rows, embeddings)
+    stores them. An exception from either stage stops the pipeline and is re-raised.
+    """
+    handoff = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def writer():
+        while True:
+            item = handoff.get()
+            if item is None:
+                return
+            # Keep draining after a failure so the encoder never blocks on a full queue
+            if not errors:
+                try:
+                    write(*item)
+                except Exception as e:
+                    errors.append(e)
+
+    thread = threading.Thread(target=writer, name="vector-ingest-writer", daemon=True)
+    thread.start()
+    try:
+        for rows, texts in batches:
+            if errors:
+                break
+            handoff.put((rows, encode(texts)))
+    finally:
+        handoff.put(None)
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def report_progress(progress, message, fraction=None):
+    """Log a step of a long-running operation and pass it to the caller's progress(message, fraction) callback"""
+    logger.info(message)
+    if progress is not None:
+        progress(message, fraction)
+
+def ingest_collection(collection, df, dataset_key, embedding_model, batch_size, rows=None, records=None,
+                      progress=None):
+    """
+    Encode and upsert a dataset's rows (all rows, or the given row positions) into a collection,
+    overlapping encoding with collection writes through stream_ingest.
+    records may pass in already computed collection_records(df, dataset_key).
+    progress(message, fraction) is called before each batch is encoded.
+    """
+    ids, documents, metadatas = records or collection_records(df, dataset_key)
+    rows = list(range(len(ids))) if rows is None else list(rows)
+    encoder = bulk_encoder(embedding_model)
+    if isinstance(encoder, EncodePool):
+        # Give every worker a full batch per pipeline step
+        batch_size *= encoder.workers
+
+    def batches():
+        for start_idx in range(0, len(rows), batch_size):
+            batch = rows[start_idx:start_idx + batch_size]
+            # Log batch size
+            report_progress(progress, f"{dataset_key} - Encoding batch {start_idx}-{start_idx + len(batch)} of {len(rows)}",
+                            min(100, int(((start_idx + len(batch)) / len(rows)) * 100)) / 100)
+            yield batch, [documents[i] for i in batch]
+
+    def write(batch, embeddings):
+        collection.upsert(
+            embeddings=embeddings,
+            documents=[documents[i] for i in batch],
+            ids=[ids[i] for i in batch],
+            metadatas=[metadatas[i] for i in batch]
+        )
+
+    stream_ingest(batches(), lambda texts: cached_encode(encoder, texts), write)
+    return len(rows)
+
+def initialize_vector_database(datasets, embedding_model, progress=None):
     client = setup_vector_db()
     
     # Create or get collections for our datasets
@@ -510,221 +1085,710 @@ def initialize_vector_database(datasets, embedding_model):
         # Get existing collection names
         existing_collection_names = client.list_collections()
         
-        st.write(f"Existing collections: {existing_collection_names}")
+        logger.info(f"Existing collections: {existing_collection_names}")
         
-        # Georgia Tech courses collection
-        if "gt_courses" not in existing_collection_names and "gt_courses" in datasets:
-            gt_collection = client.create_collection(name="gt_courses")
-            gt_df = datasets["gt_courses"]
-            
-            # Process in smaller batches
-            batch_size = 500  # Smaller batch size for safety
-            total_rows = len(gt_df)
-            
-            for start_idx in range(0, total_rows, batch_size):
-                end_idx = min(start_idx + batch_size, total_rows)
-                batch_df = gt_df.iloc[start_idx:end_idx]
-                
-                # Prepare batch data
-                documents = batch_df["Description"].fillna("").tolist()
-                ids = [f"gt_{i}" for i in range(start_idx, end_idx)]
-                metadatas = batch_df[["Course ID", "Course Name"]].to_dict('records')
-                
-                # Generate embeddings for batch
-                embeddings = embedding_model.encode(documents)
-                embeddings_list = [emb.tolist() for emb in embeddings]
-                
-                # Log batch size
-                st.write(f"GT Courses - Initializing batch {start_idx}-{end_idx}: {len(embeddings_list)} embeddings")
-                
-                # Add batch to collection
-                gt_collection.add(
-                    embeddings=embeddings_list,
-                    documents=documents,
-                    ids=ids,
-                    metadatas=metadatas
-                )
-                
-                # Show progress
-                progress = min(100, int((end_idx / total_rows) * 100))
-                st.progress(progress / 100)
-                
-            st.success(f"Georgia Tech courses vectorized and stored ({total_rows} items)")
-        elif "gt_courses" in existing_collection_names:
-            st.info("Georgia Tech courses collection already exists")
-        
-        # MOOCs collection - also process in smaller batches
-        if "moocs" not in existing_collection_names and "moocs" in datasets:
-            mooc_collection = client.create_collection(name="moocs")
-            mooc_df = datasets["moocs"]
-            
-            # Process in smaller batches
-            batch_size = 250  # Significantly smaller batch size for MOOCs
-            total_rows = len(mooc_df)
-            
-            for start_idx in range(0, total_rows, batch_size):
-                end_idx = min(start_idx + batch_size, total_rows)
-                batch_df = mooc_df.iloc[start_idx:end_idx]
-                
-                # Prepare batch data
-                documents = batch_df["About"].fillna("").tolist()
-                ids = [f"mooc_{i}" for i in range(start_idx, end_idx)]
-                metadatas = batch_df[["Name", "Link"]].to_dict('records')
-                
-                # Generate embeddings for batch
-                embeddings = embedding_model.encode(documents)
-                embeddings_list = [emb.tolist() for emb in embeddings]
-                
-                # Log batch size
-                st.write(f"MOOCs - Initializing batch {start_idx}-{end_idx}: {len(embeddings_list)} embeddings")
-                
-                # Add batch to collection
-                mooc_collection.add(
-                    embeddings=embeddings_list,
-                    documents=documents,
-                    ids=ids,
-                    metadatas=metadatas
+        for dataset_key in VECTOR_COLLECTIONS:
+            active = chroma_aliases.resolve(dataset_key)
+            if active not in existing_collection_names and dataset_key in datasets:
+                # Build a new version and point the alias at it once it is complete
+                version = new_collection_version(dataset_key)
+                collection = client.create_collection(name=version)
+                total_rows = ingest_collection(
+                    collection, datasets[dataset_key], dataset_key, embedding_model, INGEST_BATCH_SIZES[dataset_key],
+                    progress=progress
                 )
-                
-                # Show progress
-                progress = min(100, int((end_idx / total_rows) * 100))
-                st.progress(progress / 100)
-                
-            st.success(f"MOOC courses vectorized and stored ({total_rows} items)")
-        elif "moocs" in existing_collection_names:
-            st.info("MOOCs collection already exists")
+                chroma_aliases.swap(dataset_key, version)
+                report_progress(progress, f"{dataset_key} vectorized and stored as {version} ({total_rows} items)")
+            elif active in existing_collection_names:
+                report_progress(progress, f"{dataset_key} collection already exists ({active})")
             
         return True
     except Exception as e:
-        st.error(f"Error initializing vector database: {str(e)}")
-        # Print more detailed error information
-        import traceback
-        st.code(traceback.format_exc())
+        # Log the error with the full traceback
+        logger.exception(f"Error initializing vector database: {str(e)}")
         return False
-def refresh_vector_database(datasets, embedding_model):
+
+def text_hash(text):
+    """sha256 hex digest of a document's text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def document_ids(df, dataset_key):
+    """
+    Content-derived vector ids for a dataset's rows.
+    Each id hashes the row's identifying metadata (Course ID/Course Name, Name/Link),
+    so inserting or removing a row does not renumber the others. Repeated keys get a numeric suffix.
+    """
+    spec = VECTOR_COLLECTIONS[dataset_key]
+    columns = [df[field].fillna("").astype(str).tolist() for field in spec["metadata_fields"]]
+    ids = []
+    seen = {}
+    for values in zip(*columns):
+        digest = hashlib.sha1("\x1f".join(values).encode("utf-8")).hexdigest()[:16]
+        count = seen.get(digest, 0)
+        seen[digest] = count + 1
+        ids.append(f"{spec['id_prefix']}_{digest}" if count == 0 else f"{spec['id_prefix']}_{digest}_{count}")
+    return ids
+
+def collection_records(df, dataset_key):
+    """ids, documents and metadatas (including each document's text_hash) to store for a dataset"""
+    spec = VECTOR_COLLECTIONS[dataset_key]
+    documents = df[spec["text_field"]].fillna("").tolist()
+    metadatas = df[spec["metadata_fields"]].to_dict('records')
+    for metadata, document in zip(metadatas, documents):
+        metadata["text_hash"] = text_hash(document)
+    return document_ids(df, dataset_key), documents, metadatas
+
+# Metadata stored alongside vectors for bookkeeping, not returned with search results
+INTERNAL_METADATA_KEYS = {"text_hash"}
+
+# Largest id list Chroma accepts in one call
+CHROMA_MAX_BATCH = 5461
+
+def sync_collection(collection, df, dataset_key, embedding_model, batch_size=500, source=None, progress=None):
+    """
+    Make a collection match a dataset by diffing ids and text hashes against what is stored.
+    
+    Without source the collection is updated in place: added or changed rows are encoded
+    and upserted and rows no longer in the dataset are deleted. With source, collection is
+    an empty shadow version: unchanged rows are copied over from source with their stored
+    vectors and only added or changed rows are encoded.
+    Returns {"embedded": ..., "skipped": ..., "deleted": ...}. progress is passed to ingest_collection.
+    """
+    ids, documents, metadatas = collection_records(df, dataset_key)
+    
+    stored_collection = source if source is not None else collection
+    stored = stored_collection.get(include=["metadatas"])
+    stored_hashes = {
+        stored_id: (metadata or {}).get("text_hash")
+        for stored_id, metadata in zip(stored["ids"], stored["metadatas"])
+    }
+    
+    changed = [i for i, (doc_id, metadata) in enumerate(zip(ids, metadatas))
+               if stored_hashes.get(doc_id) != metadata["text_hash"]]
+    removed = list(set(stored_hashes) - set(ids))
+    
+    if source is None:
+        # Delete in batches to avoid exceeding the limit
+        for start_idx in range(0, len(removed), CHROMA_MAX_BATCH):
+            collection.delete(ids=removed[start_idx:start_idx + CHROMA_MAX_BATCH])
+    else:
+        # Carry unchanged rows into the shadow version without re-encoding them
+        changed_set = set(changed)
+        unchanged_ids = [doc_id for i, doc_id in enumerate(ids) if i not in changed_set]
+        for start_idx in range(0, len(unchanged_ids), CHROMA_MAX_BATCH):
+            batch = source.get(
+                ids=unchanged_ids[start_idx:start_idx + CHROMA_MAX_BATCH],
+                include=["embeddings", "documents", "metadatas"]
+            )
+            collection.add(
+                ids=batch["ids"],
+                embeddings=batch["embeddings"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"]
+            )
+    
+    # Encode and upsert only the added or changed rows
+    if changed:
+        ingest_collection(collection, df, dataset_key, embedding_model, batch_size, rows=changed,
+                          records=(ids, documents, metadatas), progress=progress)
+    
+    return {"embedded": len(changed), "skipped": len(ids) - len(changed), "deleted": len(removed)}
+
+def refresh_vector_database(datasets, embedding_model, progress=None):
+    """
+    Refresh the gt_courses and moocs collections from the datasets without disturbing queries.
+    
+    Each collection is rebuilt into a new shadow version (re-embedding only added or changed
+    rows), the alias is swapped to it once complete, and versions older than the previous
+    one are deleted. Returns the per-collection counts from sync_collection plus the new
+    version, or False on error. progress(message, fraction) receives the steps as they happen.
+    """
     client = setup_vector_db()
     
-    # Get existing collection names - FIXED LINE
     existing_collection_names = client.list_collections()
-    st.write(f"Existing collections: {existing_collection_names}")
+    logger.info(f"Existing collections: {existing_collection_names}")
 
+    # Larger batches for MOOCs, smaller for GT courses for safety
+    batch_sizes = {"gt_courses": 500, "moocs": 1000}
+    
     try:
-        # Handle GT courses collection refresh
-        if "gt_courses" in datasets:
-            if "gt_courses" in existing_collection_names:
-                # Get the collection and delete all existing data
-                gt_collection = client.get_collection(name="gt_courses")
-                all_ids = gt_collection.get()["ids"]
-                if all_ids:
-                    gt_collection.delete(ids=all_ids)
-                st.warning("Deleted existing GT courses data for refresh")
-            else:
-                # Create new collection if it doesn't exist
-                gt_collection = client.create_collection(name="gt_courses")
-                
-            # Process the GT courses data
-            gt_df = datasets["gt_courses"]
+        stats = {}
+        for dataset_key in VECTOR_COLLECTIONS:
+            if dataset_key not in datasets:
+                continue
+            active = chroma_aliases.resolve(dataset_key)
+            source = client.get_collection(name=active) if active in existing_collection_names else None
             
-            # Process in smaller batches for GT courses
-            batch_size = 500  # Reduced batch size for safety
-            total_rows = len(gt_df)
+            # Queries keep reading the active version while the shadow is built
+            version = new_collection_version(dataset_key)
+            shadow = client.create_collection(name=version)
+            counts = sync_collection(
+                shadow, datasets[dataset_key], dataset_key, embedding_model, batch_sizes[dataset_key], source=source,
+                progress=progress
+            )
+            chroma_aliases.swap(dataset_key, version)
+            garbage_collect_chroma_versions(client, dataset_key)
             
-            for start_idx in range(0, total_rows, batch_size):
-                end_idx = min(start_idx + batch_size, total_rows)
-                batch_df = gt_df.iloc[start_idx:end_idx]
-                
-                # Prepare batch data
-                documents = batch_df["Description"].fillna("").tolist()
-                ids = [f"gt_{i}" for i in range(start_idx, end_idx)]
-                metadatas = batch_df[["Course ID", "Course Name"]].to_dict('records')
-                
-                # Generate embeddings for batch
-                embeddings = embedding_model.encode(documents)
-                embeddings_list = [emb.tolist() for emb in embeddings]
-                
-                # Log the batch size for debugging
-                st.write(f"GT Courses - Processing batch {start_idx}-{end_idx}: {len(embeddings_list)} embeddings")
-                
-                # Add batch to collection
-                gt_collection.add(
-                    embeddings=embeddings_list,
-                    documents=documents,
-                    ids=ids,
-                    metadatas=metadatas
-                )
-                
-                # Show progress
-                progress = min(100, int((end_idx / total_rows) * 100))
-                st.progress(progress / 100)
-                
-            st.success(f"Georgia Tech courses refreshed and stored ({total_rows} items)")
+            stats[dataset_key] = dict(counts, version=version)
+            report_progress(progress, f"{dataset_key} refreshed as {version}: {counts['embedded']} re-embedded, "
+                                      f"{counts['skipped']} unchanged, {counts['deleted']} deleted")
+            
+        return stats
+    except Exception as e:
+        # Log the error with the full traceback
+        logger.exception(f"Error refreshing vector database: {str(e)}")
+        return False
+
+def _normalize_rows(matrix):
+    """L2-normalize each row of a 2D float32 matrix"""
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class QuantizedEmbeddings:
+    """
+    Compressed copy of a normalized embedding matrix for approximate scoring.
+
+    "float16" halves the matrix; "int8" stores each row as int8 codes with a
+    per-row float32 scale (row ~= codes * scale), a quarter of the float32 size.
+    scores() decompresses CHUNK_ROWS rows at a time, so the full float32
+    matrix is never materialized.
+    """
+
+    KINDS = ("float16", "int8")
+    CHUNK_ROWS = 4096
+
+    def __init__(self, kind, codes, scales=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown quantization {kind!r}, expected one of {self.KINDS}")
+        self.kind = kind
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def quantize(cls, kind, embeddings):
+        """Compress a (possibly memory-mapped) float32 matrix chunk by chunk"""
+        if kind == "float16":
+            return cls(kind, np.asarray(embeddings, dtype=np.float16))
         
-        # Handle MOOCs collection refresh
-        if "moocs" in datasets:
-            if "moocs" in existing_collection_names:
-                # Get the collection and delete all existing data
-                mooc_collection = client.get_collection(name="moocs")
-                # Get all document IDs
-                all_ids = mooc_collection.get()["ids"]
-                if all_ids:
-                    # Delete in batches to avoid exceeding the limit
-                    BATCH_SIZE = 5461  # maximum allowed batch size
-                    for i in range(0, len(all_ids), BATCH_SIZE):
-                        batch_ids = all_ids[i:i+BATCH_SIZE]
-                        mooc_collection.delete(ids=batch_ids)
-                        st.write(f"Deleted MOOCs batch from index {i} to {i + len(batch_ids)}")
-                    st.warning("Deleted existing MOOCs data for refresh")
+        codes = np.empty(embeddings.shape, dtype=np.int8)
+        scales = np.empty(len(embeddings), dtype=np.float32)
+        for start in range(0, len(embeddings), cls.CHUNK_ROWS):
+            chunk = np.asarray(embeddings[start:start + cls.CHUNK_ROWS], dtype=np.float32)
+            peak = np.abs(chunk).max(axis=1)
+            peak[peak == 0] = 1.0
+            scales[start:start + len(chunk)] = peak / 127.0
+            codes[start:start + len(chunk)] = np.rint(chunk / scales[start:start + len(chunk), None])
+        return cls(kind, codes, scales)
+
+    @staticmethod
+    def file_names(kind):
+        return (f"embeddings.{kind}.npy", "scales.int8.npy" if kind == "int8" else None)
+
+    def save(self, path):
+        codes_file, scales_file = self.file_names(self.kind)
+        np.save(os.path.join(path, codes_file), self.codes)
+        if scales_file:
+            np.save(os.path.join(path, scales_file), self.scales)
+
+    @classmethod
+    def load(cls, kind, path):
+        """Read a compressed matrix written by save(), or None if this index version has none"""
+        codes_file, scales_file = cls.file_names(kind)
+        if not os.path.exists(os.path.join(path, codes_file)):
+            return None
+        scales = np.load(os.path.join(path, scales_file)) if scales_file else None
+        return cls(kind, np.load(os.path.join(path, codes_file)), scales)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, queries):
+        """Approximate cosine similarities, shape (len(queries), rows)"""
+        result = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), self.CHUNK_ROWS):
+            chunk = self.codes[start:start + self.CHUNK_ROWS].astype(np.float32)
+            result[:, start:start + len(chunk)] = queries @ chunk.T
+        if self.scales is not None:
+            result *= self.scales
+        return result
+
+class EmbeddingIndex:
+    """
+    In-process brute-force vector index for one collection.
+
+    Embeddings are held as a contiguous, L2-normalized float32 matrix with ids,
+    documents and metadata in parallel arrays, so a query is one matrix product
+    plus an argpartition top-k. query() returns the same structure as Chroma's
+    collection.query() so the index can stand in for a Chroma collection.
+
+    With quantization ("float16" or "int8") the first pass scans the compressed
+    copy instead and only the best RESCORE_FACTOR * n_results candidates are
+    re-scored against the float32 rows. Loaded from disk, the float32 matrix
+    stays memory-mapped, so a worker only keeps the compressed copy resident.
+    """
+
+    # Candidates re-scored exactly per requested result, with a floor for small n_results
+    RESCORE_FACTOR = 4
+    MIN_RESCORE_CANDIDATES = 64
+
+    def __init__(self, name, embeddings, ids, documents, metadata, normalized=False, quantization="none"):
+        self.name = name
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.embeddings = embeddings if normalized else np.ascontiguousarray(_normalize_rows(embeddings))
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadata = {field: list(values) for field, values in metadata.items()}
+        self.quantized = None
+        if quantization != "none":
+            self.quantized = QuantizedEmbeddings.quantize(quantization, self.embeddings)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, name, df, embedding_model, quantization="none"):
+        """Encode a dataset's documents into a new index"""
+        spec = VECTOR_COLLECTIONS[name]
+        documents = df[spec["text_field"]].fillna("").tolist()
+        ids = document_ids(df, name)
+        metadata = {field: df[field].tolist() for field in spec["metadata_fields"]}
+        embeddings = cached_encode(bulk_encoder(embedding_model), documents)
+        return cls(name, embeddings, ids, documents, metadata, quantization=quantization)
+
+    @classmethod
+    def from_chroma(cls, name, collection, quantization="none"):
+        """Copy an existing Chroma collection (any version of name) without re-encoding it"""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        fields = VECTOR_COLLECTIONS[name]["metadata_fields"]
+        metadata = {field: [m.get(field, "") for m in data["metadatas"]] for field in fields}
+        return cls(name, data["embeddings"], data["ids"], data["documents"], metadata, quantization=quantization)
+
+    def save(self, path):
+        """Write embeddings.npy, meta.json and every compressed form of the matrix into path"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "embeddings.npy"), self.embeddings)
+        for kind in QuantizedEmbeddings.KINDS:
+            if self.quantized is not None and self.quantized.kind == kind:
+                self.quantized.save(path)
             else:
-                # Create new collection if it doesn't exist
-                mooc_collection = client.create_collection(name="moocs")
-                        
-            # Process the MOOCs data
-            mooc_df = datasets["moocs"]
-                    
-            # Process in even smaller batches for MOOCs
-            batch_size = 1000  # Significantly reduced batch size for MOOCs
-            total_rows = len(mooc_df)
-                    
-            for start_idx in range(0, total_rows, batch_size):
-                end_idx = min(start_idx + batch_size, total_rows)
-                batch_df = mooc_df.iloc[start_idx:end_idx]
-                        
-                # Prepare batch data
-                documents = batch_df["About"].fillna("").tolist()
-                ids = [f"mooc_{i}" for i in range(start_idx, end_idx)]
-                metadatas = batch_df[["Name", "Link"]].to_dict('records')
-                        
-                # Generate embeddings for batch
-                embeddings = embedding_model.encode(documents)
-                embeddings_list = [emb.tolist() for emb in embeddings]
-                        
-                # Log the batch size for debugging
-                st.write(f"MOOCs - Processing batch {start_idx}-{end_idx}: {len(embeddings_list)} embeddings")
-                        
-                # Add batch to collection - make sure we're only submitting the current batch
-                mooc_collection.add(
-                    embeddings=embeddings_list,
-                    documents=documents,
-                    ids=ids,
-                    metadatas=metadatas
-                )
-                        
-                # Show progress
-                progress = min(100, int((end_idx / total_rows) * 100))
-                st.progress(progress / 100)
-            
-            st.success(f"MOOCs refreshed and stored ({total_rows} items)")
-            
+                QuantizedEmbeddings.quantize(kind, self.embeddings).save(path)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"ids": self.ids, "documents": self.documents, "metadata": self.metadata}, f)
+
+    @classmethod
+    def load(cls, name, path, mmap=True, quantization="none"):
+        """
+        Load an index written by save(), memory-mapping the embedding matrix.
+        The compressed matrix is read from path when present, otherwise computed from the float32 one.
+        """
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r" if mmap else None)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        index = cls(name, embeddings, meta["ids"], meta["documents"], meta["metadata"], normalized=True)
+        if quantization != "none":
+            index.quantized = (QuantizedEmbeddings.load(quantization, path)
+                               or QuantizedEmbeddings.quantize(quantization, embeddings))
+        return index
+
+    @property
+    def resident_bytes(self):
+        """Bytes of vector data a query scans: the compressed copy, or the full float32 matrix"""
+        return self.quantized.nbytes if self.quantized is not None else self.embeddings.nbytes
+
+    def _top_k(self, queries, k):
+        """Exact (row index, similarity) top-k per query, most similar first, ties broken by row order"""
+        if self.quantized is None:
+            first_pass, n_candidates = queries @ self.embeddings.T, k
+        else:
+            # First pass on the compressed copy; only the shortlist is re-scored exactly
+            first_pass = self.quantized.scores(queries)
+            n_candidates = min(len(self), max(k * self.RESCORE_FACTOR, self.MIN_RESCORE_CANDIDATES))
+        
+        thresholds = np.partition(first_pass, len(self) - n_candidates, axis=1)[:, len(self) - n_candidates]
+        for query, row, threshold in zip(queries, first_pass, thresholds):
+            # Rows tied with the last candidate are all kept so the result does not depend on partition order
+            candidates = np.flatnonzero(row >= threshold)
+            exact = np.asarray(self.embeddings[candidates], dtype=np.float32) @ query
+            best = np.argsort(-exact, kind="stable")[:k]
+            yield candidates[best], exact[best]
+
+    def query(self, query_embeddings, n_results=10):
+        """Return the n_results nearest documents for each query, in Chroma's query() format"""
+        queries = _normalize_rows(query_embeddings)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        k = min(n_results, len(self))
+        if k == 0:
+            for key in results:
+                results[key] = [[] for _ in range(len(queries))]
+            return results
+
+        for order, similarities in self._top_k(queries, k):
+            results["ids"].append([self.ids[i] for i in order])
+            results["documents"].append([self.documents[i] for i in order])
+            results["metadatas"].append([{field: values[i] for field, values in self.metadata.items()} for i in order])
+            # Squared L2 distance between unit vectors, matching Chroma's default metric
+            results["distances"].append((2.0 - 2.0 * similarities).tolist())
+        return results
+
+class CollectionAliases:
+    """
+    Maps each logical collection name (gt_courses, moocs) to the physical
+    version that queries should read.
+
+    Refreshes build a new version next to the active one and then swap() the
+    alias, so queries keep reading the old version until the new one is
+    complete. The mapping is a JSON file replaced atomically with os.replace
+    and re-read whenever its mtime changes, so every worker process sees a
+    swap on its next query. Names without an alias resolve to themselves.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._aliases = {}
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._aliases = json.load(f)
+            self._mtime = mtime
+        return self._aliases
+
+    def get(self, name):
+        """{"active", "previous", "updated"} for name, or None if it has never been swapped"""
+        return self._load().get(name)
+
+    def resolve(self, name):
+        """Physical version currently serving name"""
+        entry = self.get(name)
+        return entry["active"] if entry else name
+
+    def swap(self, name, version):
+        """Atomically point name at version, remembering the version it replaces"""
+        with self._lock:
+            aliases = dict(self._load())
+            aliases[name] = {
+                "active": version,
+                "previous": self.resolve(name),
+                "updated": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(aliases, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def retained(self, name):
+        """Versions garbage collection must keep: the active one and the one it replaced"""
+        entry = self.get(name)
+        return {entry["active"], entry["previous"]} if entry else {name}
+
+# Separator between a logical collection name and its version suffix
+VERSION_SEPARATOR = "__v"
+
+def new_collection_version(name):
+    """Unique, time-ordered physical name for a new version of a collection"""
+    return f"{name}{VERSION_SEPARATOR}{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+def collection_versions(names, name):
+    """The names that are versions of a logical collection, including the unversioned legacy one"""
+    return sorted(n for n in names if n == name or n.startswith(name + VERSION_SEPARATOR))
+
+chroma_aliases = CollectionAliases(os.path.join(get_abs_path(CHROMA_DB_PATH), "aliases.json"))
+numpy_aliases = CollectionAliases(os.path.join(get_abs_path(NUMPY_INDEX_DIR), "aliases.json"))
+
+def garbage_collect_chroma_versions(client, name):
+    """Delete Chroma versions of name other than the active and previous one; returns the deleted names"""
+    keep = chroma_aliases.retained(name)
+    deleted = [version for version in collection_versions(client.list_collections(), name) if version not in keep]
+    for version in deleted:
+        client.delete_collection(name=version)
+    return deleted
+
+def garbage_collect_numpy_versions(name):
+    """Delete NumPy index versions of name other than the active and previous one; returns the deleted names"""
+    index_dir = get_abs_path(NUMPY_INDEX_DIR)
+    if not os.path.isdir(index_dir):
+        return []
+    keep = numpy_aliases.retained(name)
+    deleted = [version for version in collection_versions(os.listdir(index_dir), name) if version not in keep]
+    for version in deleted:
+        shutil.rmtree(os.path.join(index_dir, version), ignore_errors=True)
+    return deleted
+
+# Loaded (version, EmbeddingIndex) per collection name
+_numpy_indexes = {}
+
+def load_numpy_index(name):
+    """Return the memory-mapped EmbeddingIndex for the active version of a collection, or None if it has not been built"""
+    version = numpy_aliases.resolve(name)
+    loaded = _numpy_indexes.get(name)
+    if loaded is None or loaded[0] != version:
+        path = os.path.join(get_abs_path(NUMPY_INDEX_DIR), version)
+        if not os.path.exists(os.path.join(path, "embeddings.npy")):
+            return None
+        loaded = (version, EmbeddingIndex.load(name, path, quantization=INDEX_QUANTIZATION))
+        _numpy_indexes[name] = loaded
+    return loaded[1]
+
+def build_numpy_index(datasets, embedding_model, from_chroma=False, progress=None):
+    """
+    Write a new EmbeddingIndex version for each course collection under NUMPY_INDEX_DIR
+    and swap it in once complete. With from_chroma=True the vectors are copied from the
+    active Chroma collections instead of re-encoded. progress(message, fraction) is told of each version written.
+    """
+    try:
+        client = setup_vector_db() if from_chroma else None
+        for name in VECTOR_COLLECTIONS:
+            if from_chroma:
+                active = chroma_aliases.resolve(name)
+                if active not in client.list_collections():
+                    continue
+                index = EmbeddingIndex.from_chroma(name, client.get_collection(active))
+            elif name in datasets:
+                index = EmbeddingIndex.build(name, datasets[name], embedding_model)
+            else:
+                continue
+
+            version = new_collection_version(name)
+            path = os.path.join(get_abs_path(NUMPY_INDEX_DIR), version)
+            index.save(path)
+            numpy_aliases.swap(name, version)
+            garbage_collect_numpy_versions(name)
+            report_progress(progress, f"{name} NumPy index version {version} written to {path} ({len(index)} items)")
         return True
     except Exception as e:
-        st.error(f"Error refreshing vector database: {str(e)}")
-        # Print more detailed error information
-        import traceback
-        st.code(traceback.format_exc())
+        logger.exception(f"Error building NumPy index: {str(e)}")
         return False
+
+def cache_stats():
+    """Hit/miss counters of the in-process query embedding and direct-search caches"""
+    return {
+        "query_embeddings": _query_embeddings.stats() if _query_embeddings is not None else None,
+        "direct_search": direct_search_cache.stats()
+    }
+
+def get_vector_collection(dataset_key):
+    """Return the active version of dataset_key's collection from the configured VECTOR_BACKEND, or None"""
+    if VECTOR_BACKEND == "numpy":
+        return load_numpy_index(dataset_key)
+
+    client = setup_vector_db()
+    version = chroma_aliases.resolve(dataset_key)
+    if version not in client.list_collections():
+        return None
+    return client.get_collection(version)
+
+def vector_db_status():
+    """Active, previous and retained versions of every vector collection for both backends"""
+    client = setup_vector_db()
+    chroma_names = client.list_collections()
+    index_dir = get_abs_path(NUMPY_INDEX_DIR)
+    numpy_names = os.listdir(index_dir) if os.path.isdir(index_dir) else []
+
+    def describe(aliases, names, name):
+        entry = aliases.get(name) or {}
+        active = aliases.resolve(name)
+        return {
+            "active": active if active in names else None,
+            "previous": entry.get("previous"),
+            "updated": entry.get("updated"),
+            "versions": collection_versions(names, name)
+        }
+
+    return {
+        "backend": VECTOR_BACKEND,
+        "chroma": {name: describe(chroma_aliases, chroma_names, name) for name in VECTOR_COLLECTIONS},
+        "numpy": {name: describe(numpy_aliases, numpy_names, name) for name in VECTOR_COLLECTIONS},
+        "quantization": INDEX_QUANTIZATION
+    }
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+class KeywordIndex:
+    """
+    Posting lists over the direct-search fields of one dataset.
+
+    Each lowercased word token maps, per field, to the rows containing it and how
+    often it occurs there. matches() answers "which rows contain \\bskill\\b and how
+    many times per field" from the postings; skills that are not a single word
+    (multi-word skills, "c++", "ci/cd") are verified with a regex only on the rows
+    that contain all of their words, and the result is kept for later lookups.
+    """
+
+    MAX_CACHED_PHRASES = 4096
+
+    def __init__(self, df, fields, vocabulary=(), texts=None):
+        self.df = df
+        self.row_labels = df.index
+        # Identifies this build of the index, e.g. in cache keys that must not outlive a dataset reload
+        self.version = uuid.uuid4().hex
+        self.fields = [field for field in fields if field in df.columns]
+        # texts may supply already-lowercased field values, e.g. from a CatalogSnapshot
+        texts = texts or {}
+        self._texts = {
+            field: list(texts[field]) if field in texts else df[field].fillna("").str.lower().tolist()
+            for field in self.fields
+        }
+        self._postings = {}
+        for field, texts in self._texts.items():
+            token_rows = {}
+            for row, text in enumerate(texts):
+                for token in _WORD_PATTERN.findall(text):
+                    counts = token_rows.setdefault(token, {})
+                    counts[row] = counts.get(row, 0) + 1
+            for token, counts in token_rows.items():
+                rows = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+                occurrences = np.fromiter(counts.values(), dtype=np.int32, count=len(counts))
+                self._postings.setdefault(token, {})[field] = (rows, occurrences)
+        self._phrases = {}
+        for skill in vocabulary:
+            self.matches(skill)
+
+    def __len__(self):
+        return len(self.row_labels)
+
+    def positions(self, df):
+        """Row positions of df's rows in this index, or None if df contains rows the index was not built from"""
+        positions = self.row_labels.get_indexer(df.index)
+        if len(positions) and positions.min() < 0:
+            return None
+        return positions
+
+    def matches(self, skill):
+        """
+        Return {field: (rows, occurrences)} for rows whose field contains the skill
+        on word boundaries, with rows sorted ascending.
+        """
+        skill_lower = skill.lower()
+        if _WORD_PATTERN.fullmatch(skill_lower):
+            postings = self._postings.get(skill_lower, {})
+            return {field: postings[field] for field in self.fields if field in postings}
+        if skill_lower in self._phrases:
+            return self._phrases[skill_lower]
+        result = self._match_phrase(skill_lower)
+        if len(self._phrases) < self.MAX_CACHED_PHRASES:
+            self._phrases[skill_lower] = result
+        return result
+
+    def _match_phrase(self, skill_lower):
+        pattern = re.compile(r'\b' + re.escape(skill_lower) + r'\b')
+        tokens = _WORD_PATTERN.findall(skill_lower)
+        result = {}
+        for field, texts in self._texts.items():
+            # Only rows containing every word of the skill can match the phrase
+            candidates = None
+            for token in tokens:
+                rows = self._postings.get(token, {}).get(field, (np.empty(0, dtype=np.int32), None))[0]
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if candidates is None:
+                candidates = np.arange(len(texts), dtype=np.int32)
+
+            rows, occurrences = [], []
+            for row in np.sort(candidates):
+                count = len(pattern.findall(texts[row]))
+                if count:
+                    rows.append(row)
+                    occurrences.append(count)
+            if rows:
+                result[field] = (np.array(rows, dtype=np.int32), np.array(occurrences, dtype=np.int32))
+        return result
+
+    def occurrences(self, skill, field, positions):
+        """Occurrence counts of the skill in field for the rows at positions"""
+        counts = np.zeros(len(self), dtype=np.int32)
+        field_matches = self.matches(skill).get(field)
+        if field_matches is not None:
+            rows, occurrences = field_matches
+            counts[rows] = occurrences
+        return counts[positions]
+
+    def mask(self, skill, positions):
+        """Boolean mask over the rows at positions that contain the skill in any field"""
+        hits = np.zeros(len(self), dtype=bool)
+        for rows, _ in self.matches(skill).values():
+            hits[rows] = True
+        return hits[positions]
+
+def build_keyword_indexes(datasets):
+    """Build a KeywordIndex for each loaded dataset that supports direct search"""
+    indexes = {}
+    for key, fields in DIRECT_SEARCH_FIELDS.items():
+        if key not in datasets:
+            continue
+        catalog = datasets.get("catalog")
+        texts = catalog.lowercase_text if key == "gt_courses" and catalog is not None else None
+        indexes[key] = KeywordIndex(datasets[key], fields, vocabulary=SKILL_VOCABULARY, texts=texts)
+    return indexes
+
+def _read_only(values):
+    array = np.asarray(values)
+    array.flags.writeable = False
+    return array
+
+class CatalogSnapshot:
+    """
+    Per-course columns of the GT catalog, computed once when the datasets load.
+
+    Holds the course prefix and Course Level as improved_direct_search derives
+    them, the major from prefix_to_major, lowercased name/description text, and
+    a row bitmap per major. All arrays are read-only and aligned with the
+    gt_courses rows, so major filtering is a mask union that never writes to
+    the shared dataframe and is safe across request threads.
+    """
+
+    def __init__(self, df, prefix=None):
+        self.row_labels = df.index
+        course_ids = df["Course ID"] if "Course ID" in df.columns else pd.Series("", index=df.index)
+        # prefix may come precomputed from the dataset snapshot
+        if prefix is None:
+            prefix = course_prefixes(course_ids)
+        self.prefix = _read_only(np.asarray(prefix, dtype=object))
+        self.course_level = _read_only(_course_levels(course_ids))
+        # Majors use the whitespace-split prefix, like is_relevant_major_course
+        major_prefix = course_ids.map(lambda x: x.split()[0] if isinstance(x, str) and x.split() else "")
+        self.major = _read_only(major_prefix.map(prefix_to_major).to_numpy(dtype=object))
+        self.lowercase_text = {
+            field: _read_only(df[field].fillna("").str.lower().to_numpy(dtype=object))
+            for field in DIRECT_SEARCH_FIELDS["gt_courses"] if field in df.columns
+        }
+        self.major_rows = {
+            major: _read_only(self.major == major)
+            for major in set(prefix_to_major.values())
+        }
+
+    def __len__(self):
+        return len(self.row_labels)
+
+    def positions(self, df):
+        """Row positions of df's rows in this snapshot, or None if df contains rows it was not built from"""
+        positions = self.row_labels.get_indexer(df.index)
+        if len(positions) and positions.min() < 0:
+            return None
+        return positions
+
+    def relevant_mask(self, relevant_majors):
+        """Boolean mask over the catalog rows whose course belongs to one of relevant_majors"""
+        mask = np.zeros(len(self), dtype=bool)
+        for major in relevant_majors:
+            if major in self.major_rows:
+                mask |= self.major_rows[major]
+        return mask
+
 # Improved direct_search function with better matching and skill weights
-def improved_direct_search(datasets, weighted_skills, dataset_key):
-    """Perform direct keyword search on the dataset with improved relevance"""
+def improved_direct_search(datasets, weighted_skills, dataset_key, vectorized=True):
+    """
+    Perform direct keyword search on the dataset with improved relevance.
+    vectorized=False scores matches row by row; both modes produce the same results.
+    """
     results = []
     
     if dataset_key not in datasets:
@@ -741,7 +1805,7 @@ def improved_direct_search(datasets, weighted_skills, dataset_key):
     
     # Define which fields to search based on dataset type
     if dataset_key == "gt_courses":
-        search_fields = ["Course Name", "Description"]
+        search_fields = DIRECT_SEARCH_FIELDS["gt_courses"]
         metadata_fields = ["Course ID", "Course Name"]
         description_field = "Description"
         # Domain filtering - expanded to include more domains
@@ -749,56 +1813,103 @@ def improved_direct_search(datasets, weighted_skills, dataset_key):
         data_domains = ["CSE", "ISYE", "CS"]
         ml_domains = ["CS", "CSE", "ISYE"]
     elif dataset_key == "moocs":
-        search_fields = ["Name", "About"]
+        search_fields = DIRECT_SEARCH_FIELDS["moocs"]
         metadata_fields = ["Name", "Link"]
         description_field = "About"
     else:
         return results
     
+    # Use the keyword index built by load_datasets when it covers this (possibly filtered) dataframe
+    keyword_index = (datasets.get("keyword_index") or {}).get(dataset_key)
+    positions = keyword_index.positions(df) if keyword_index is not None else None
+    
+    # Precomputed course prefix and level for GT courses
+    catalog = datasets.get("catalog") if dataset_key == "gt_courses" else None
+    catalog_positions = catalog.positions(df) if catalog is not None else None
+    
+    # Row of df for each row of the full indexed dataset (-1 where df filtered it out)
+    if vectorized and positions is not None:
+        df_rows = np.full(len(keyword_index), -1, dtype=np.int64)
+        df_rows[positions] = np.arange(len(df))
+    
     # Search for each skill in the relevant fields
     for skill_item in weighted_skills:
         skill = skill_item["skill"]
         skill_weight = skill_item["weight"]
         skill_lower = skill.lower()
         
+        # Apply different domain boosts based on skill type
+        domain_boost, boost_domains = 0, []
+        if dataset_key == "gt_courses":
+            if skill_lower in ["aws", "cloud", "python", "docker", "kubernetes", "linux", "programming"]:
+                domain_boost, boost_domains = 0.4, tech_domains
+            elif skill_lower in ["data science", "data analysis", "data visualization", "statistics"]:
+                domain_boost, boost_domains = 0.35, data_domains
+            elif skill_lower in ["machine learning", "deep learning", "neural networks", "ai"]:
+                domain_boost, boost_domains = 0.35, ml_domains
+        
+        if vectorized and positions is not None:
+            # Weight-independent score components are cached per skill; only scaling and the threshold run per request
+            rows, components = cached_direct_match_components(
+                keyword_index, catalog, dataset_key, skill, search_fields, description_field, domain_boost, boost_domains
+            )
+            local = df_rows[rows]
+            selected = np.flatnonzero(local >= 0)
+            selected = selected[np.argsort(local[selected], kind="stable")]
+            score = _direct_match_scores([component[selected] for component in components], skill_weight)
+            keep = score >= 0.65
+            if not keep.any():
+                continue
+            survivor_rows = local[selected[keep]]
+            survivors = df.iloc[survivor_rows]
+            levels = None
+            if dataset_key == "gt_courses" and "Course ID" in survivors.columns:
+                if catalog_positions is not None:
+                    levels = catalog.course_level[catalog_positions[survivor_rows]]
+                else:
+                    levels = _course_levels(survivors["Course ID"])
+            results.extend(_direct_match_results(
+                survivors, np.minimum(1.0, score[keep]), skill, skill_weight, metadata_fields, description_field, levels
+            ))
+            continue
+        
         # Create a mask for rows that contain the skill
-        mask = False
-        for field in search_fields:
-            if field in df.columns:
-                # More precise word boundary matching
-                field_mask = df[field].fillna("").str.lower().str.contains(
-                    r'\b' + re.escape(skill_lower) + r'\b', 
-                    na=False, 
-                    regex=True
-                )
-                mask = mask | field_mask
+        if positions is not None:
+            mask = keyword_index.mask(skill, positions)
+        else:
+            mask = False
+            for field in search_fields:
+                if field in df.columns:
+                    # More precise word boundary matching
+                    field_mask = df[field].fillna("").str.lower().str.contains(
+                        r'\b' + re.escape(skill_lower) + r'\b', 
+                        na=False, 
+                        regex=True
+                    )
+                    mask = mask | field_mask
         
         # Get matching rows
         matches = df[mask]
         
+        if vectorized:
+            prefixes = levels = None
+            if catalog_positions is not None:
+                prefixes = catalog.prefix[catalog_positions[mask]]
+                levels = catalog.course_level[catalog_positions[mask]]
+            results.extend(_score_direct_matches(
+                matches, skill, skill_weight, dataset_key, search_fields, metadata_fields,
+                description_field, domain_boost, boost_domains, prefixes=prefixes, levels=levels
+            ))
+            continue
+        
         # Apply domain filtering 
-        if dataset_key == "gt_courses":
+        matches = matches.copy()
+        if dataset_key == "gt_courses" and "Course ID" in matches.columns:
             # Extract course prefix
-            if "Course ID" in matches.columns:
-                matches["course_prefix"] = matches["Course ID"].str.split(" ", n=1).str[0]
-                
-                # Apply different domain boosts based on skill type
-                if skill_lower in ["aws", "cloud", "python", "docker", "kubernetes", "linux", "programming"]:
-                    matches["domain_boost"] = matches["course_prefix"].apply(
-                        lambda prefix: 0.4 if prefix in tech_domains else 0
-                    )
-                elif skill_lower in ["data science", "data analysis", "data visualization", "statistics"]:
-                    matches["domain_boost"] = matches["course_prefix"].apply(
-                        lambda prefix: 0.35 if prefix in data_domains else 0
-                    )
-                elif skill_lower in ["machine learning", "deep learning", "neural networks", "ai"]:
-                    matches["domain_boost"] = matches["course_prefix"].apply(
-                        lambda prefix: 0.35 if prefix in ml_domains else 0
-                    )
-                else:
-                    matches["domain_boost"] = 0
-            else:
-                matches["domain_boost"] = 0
+            matches["course_prefix"] = matches["Course ID"].str.split(" ", n=1).str[0]
+            matches["domain_boost"] = matches["course_prefix"].apply(
+                lambda prefix: domain_boost if prefix in boost_domains else 0
+            )
         else:
             matches["domain_boost"] = 0
         
@@ -862,150 +1973,400 @@ def improved_direct_search(datasets, weighted_skills, dataset_key):
                 results.append(result)
     
     return results
-# Improved semantic search function with better query construction
-def improved_semantic_search(datasets, weighted_skills, job_title, dataset_key, embedding_model):
-    """Perform semantic search with improved query construction"""
+
+def _course_levels(course_ids):
+    """
+    Course Level for each course ID, derived like improved_direct_search does:
+    "Graduate"/"Undergraduate" from the first digit of the course number,
+    "Unknown" if it is not a digit, None if the ID has no number part.
+    """
+    parts = course_ids.map(str).str.split(" ")
+    has_number = (parts.str.len() > 1).to_numpy()
+    first_digit = parts.str[1].fillna("").astype(str).str[:1]
+    is_digit = first_digit.str.isdecimal().to_numpy(dtype=bool)
+    graduate = (first_digit.where(is_digit, "0").map(int) >= 6).to_numpy()
+    levels = np.where(is_digit, np.where(graduate, "Graduate", "Undergraduate"), "Unknown").astype(object)
+    levels[~has_number] = None
+    return levels
+
+def _direct_match_components(matches, skill, search_fields, domain_boost, boost_domains,
+                             occurrences=None, prefixes=None):
+    """
+    Weight-independent parts of the direct-search score for each row of matches.
+
+    Returns (boost, title, description) arrays such that a row scores
+    0.4 * skill_weight + boost + title * skill_weight + description * skill_weight,
+    the same sum improved_direct_search computes row by row. occurrences and
+    prefixes may supply precomputed description match counts and course
+    prefixes aligned with matches.
+    """
+    skill_lower = skill.lower()
+    pattern = r'\b' + re.escape(skill_lower) + r'\b'
+    boost = np.zeros(len(matches))
+    title = np.zeros(len(matches))
+    description = np.zeros(len(matches))
+    
+    if domain_boost and "Course ID" in matches.columns:
+        if prefixes is None:
+            prefixes = matches["Course ID"].str.split(" ", n=1).str[0].to_numpy(dtype=object)
+        boost = np.where(np.isin(prefixes, boost_domains), domain_boost, 0.0)
+    
+    for field in search_fields:
+        if field not in matches.columns:
+            continue
+        if field in ["Course Name", "Name"]:
+            # Word boundary match in the title is worth more than a partial one
+            text = matches[field].map(str).str.lower()
+            exact = text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+            partial = text.str.contains(skill_lower, regex=False).to_numpy(dtype=bool)
+            title = np.where(exact, 0.4, np.where(partial, 0.2, 0.0))
+        elif field in ["Description", "About"]:
+            if occurrences is None:
+                occurrences = matches[field].map(str).str.lower().str.count(pattern).to_numpy()
+            description = np.minimum(0.3, 0.1 * occurrences)
+    return boost, title, description
+
+def _direct_match_scores(components, skill_weight):
+    """Direct-search scores from _direct_match_components output for one skill weight"""
+    boost, title, description = components
+    return 0.4 * skill_weight + boost + title * skill_weight + description * skill_weight
+
+def _direct_match_results(survivors, scores, skill, skill_weight, metadata_fields, description_field, levels=None):
+    """Result dicts for the rows of survivors that passed the direct-search threshold"""
+    scores = scores.tolist()
+    if description_field in survivors.columns:
+        descriptions = survivors[description_field].map(str).tolist()
+    else:
+        descriptions = [""] * len(survivors)
+    fields = [field for field in metadata_fields if field in survivors.columns]
+    metadata = {field: survivors[field].tolist() for field in fields}
+    
     results = []
+    for i in range(len(survivors)):
+        result = {
+            "Score": scores[i],
+            "Match Type": "Direct Match",
+            "Matching Skills": [skill],
+            "Skill Weight": skill_weight,
+            "Description": descriptions[i]
+        }
+        for field in fields:
+            result[field] = metadata[field][i]
+        if levels is not None and levels[i] is not None:
+            result["Course Level"] = levels[i]
+        results.append(result)
+    return results
+
+def _score_direct_matches(matches, skill, skill_weight, dataset_key, search_fields, metadata_fields,
+                          description_field, domain_boost, boost_domains, occurrences=None,
+                          prefixes=None, levels=None):
+    """
+    Columnar scoring for one skill in improved_direct_search.
+
+    Computes the row-by-row score (base, domain boost, title match, description
+    occurrences) as array operations over every candidate and builds result dicts
+    only for rows that pass the 0.65 threshold. occurrences, prefixes and levels
+    may supply precomputed description match counts, course prefixes and Course
+    Levels aligned with matches.
+    """
+    if len(matches) == 0:
+        return []
+    components = _direct_match_components(matches, skill, search_fields, domain_boost, boost_domains,
+                                          occurrences, prefixes)
+    score = _direct_match_scores(components, skill_weight)
     
-    try:
-        # Check for empty dataset
-        if dataset_key not in datasets or datasets[dataset_key] is None or len(datasets[dataset_key]) == 0:
-            return results
-            
-        # Extract just the skills for processing
-        skills = [item["skill"] for item in weighted_skills]
-        skill_weights = {item["skill"]: item["weight"] for item in weighted_skills}
-        
-        # Build a better query that emphasizes high-weight skills
+    # Only materialize results above threshold
+    keep = score >= 0.65
+    if not keep.any():
+        return []
+    survivors = matches[keep]
+    if dataset_key != "gt_courses" or "Course ID" not in survivors.columns:
+        levels = None
+    elif levels is None:
+        levels = _course_levels(survivors["Course ID"])
+    else:
+        levels = levels[keep]
+    return _direct_match_results(survivors, np.minimum(1.0, score[keep]), skill, skill_weight,
+                                 metadata_fields, description_field, levels)
+
+direct_search_cache = LRUCache(DIRECT_SEARCH_CACHE_SIZE)
+
+def cached_direct_match_components(keyword_index, catalog, dataset_key, skill, search_fields, description_field,
+                                   domain_boost, boost_domains):
+    """
+    (rows, components) for a skill over the whole dataset keyword_index was built from:
+    the ascending positions of rows containing the skill and their _direct_match_components.
+    Cached per (index version, dataset, skill) in direct_search_cache, since none of it depends on skill weight.
+    """
+    key = (keyword_index.version, dataset_key, skill.lower())
+    entry = direct_search_cache.get(key)
+    if entry is None:
+        rows = np.flatnonzero(keyword_index.mask(skill, np.arange(len(keyword_index))))
+        matches = keyword_index.df.iloc[rows]
+        occurrences = keyword_index.occurrences(skill, description_field, rows)
+        prefixes = None
+        catalog_positions = catalog.positions(matches) if catalog is not None else None
+        if catalog_positions is not None:
+            prefixes = catalog.prefix[catalog_positions]
+        components = _direct_match_components(matches, skill, search_fields, domain_boost, boost_domains,
+                                              occurrences, prefixes)
+        entry = (_read_only(rows), tuple(_read_only(component) for component in components))
+        direct_search_cache.put(key, entry)
+    return entry
+# Improved semantic search function with better query construction
+def semantic_query_text(weighted_skills, job_title):
+    """Build the composite semantic query that emphasizes high-weight skills"""
+    top_skills = sorted(weighted_skills, key=lambda x: x["weight"], reverse=True)[:5]
+    primary_skills = [item["skill"] for item in top_skills]
+    
+    # More targeted query construction
+    query_parts = []
+    query_parts.append(f"Courses for {job_title}")
+    query_parts.append(f"Skills needed: {', '.join(primary_skills)}")
+    
+    # Add skill-specific context based on top skills
+    for skill in primary_skills[:3]:  # Just use top 3 to avoid query dilution
+        if "python" in skill.lower():
+            query_parts.append("Python programming language courses")
+        elif "machine learning" in skill.lower() or "ai" in skill.lower():
+            query_parts.append("Machine learning and artificial intelligence courses")
+        elif "data" in skill.lower() and ("science" in skill.lower() or "analysis" in skill.lower()):
+            query_parts.append("Data science and analysis courses")
+        elif "cloud" in skill.lower() or "aws" in skill.lower() or "azure" in skill.lower():
+            query_parts.append("Cloud computing and infrastructure courses")
+        elif "web" in skill.lower() or "frontend" in skill.lower() or "javascript" in skill.lower():
+            query_parts.append("Web development courses")
+    
+    # Construct final query
+    return " ".join(query_parts)
+
+def encode_semantic_queries(weighted_skills, job_title, embedding_model, per_skill=True):
+    """
+    Encode the composite query and (with per_skill) one query per weighted skill in a single encode call.
+    Returns (texts, embeddings): row 0 is the composite query, row i + 1 is weighted_skills[i]["skill"].
+
+    Texts are looked up in the query embedding cache first. With REC_COMPOSE_QUERY_VECTORS, an uncached
+    composite query is built from the job title and top skill vectors instead of being encoded.
+    """
+    return encode_semantic_query_batch([(weighted_skills, job_title)], embedding_model, per_skill)[0]
+
+def encode_semantic_query_batch(jobs, embedding_model, per_skill=True):
+    """encode_semantic_queries for a list of (weighted_skills, job_title) jobs with one encode call for all of them"""
+    query_embeddings = get_query_embeddings(embedding_model)
+    plans = []
+    for weighted_skills, job_title in jobs:
+        query_text = semantic_query_text(weighted_skills, job_title)
+        skills = [item["skill"] for item in weighted_skills] if per_skill else []
         top_skills = sorted(weighted_skills, key=lambda x: x["weight"], reverse=True)[:5]
-        primary_skills = [item["skill"] for item in top_skills]
-        
-        # More targeted query construction
-        query_parts = []
-        query_parts.append(f"Courses for {job_title}")
-        query_parts.append(f"Skills needed: {', '.join(primary_skills)}")
-        
-        # Add skill-specific context based on top skills
-        for skill in primary_skills[:3]:  # Just use top 3 to avoid query dilution
-            if "python" in skill.lower():
-                query_parts.append("Python programming language courses")
-            elif "machine learning" in skill.lower() or "ai" in skill.lower():
-                query_parts.append("Machine learning and artificial intelligence courses")
-            elif "data" in skill.lower() and ("science" in skill.lower() or "analysis" in skill.lower()):
-                query_parts.append("Data science and analysis courses")
-            elif "cloud" in skill.lower() or "aws" in skill.lower() or "azure" in skill.lower():
-                query_parts.append("Cloud computing and infrastructure courses")
-            elif "web" in skill.lower() or "frontend" in skill.lower() or "javascript" in skill.lower():
-                query_parts.append("Web development courses")
+        compose = COMPOSE_QUERY_VECTORS and top_skills and query_embeddings.lookup(query_text) is None
+        if compose:
+            needed = skills + [job_title] + [item["skill"] for item in top_skills]
+        else:
+            needed = [query_text] + skills
+        plans.append((query_text, skills, top_skills, job_title, compose, needed))
+    
+    needed = [text for plan in plans for text in plan[-1]]
+    vectors = dict(zip(needed, query_embeddings.encode(embedding_model, needed)))
+    
+    encoded = []
+    for query_text, skills, top_skills, job_title, compose, _ in plans:
+        if compose:
+            # The title carries as much weight as the strongest skill
+            parts = [(vectors[job_title], top_skills[0]["weight"])]
+            parts += [(vectors[item["skill"]], item["weight"]) for item in top_skills]
+            composite = compose_query_vector(parts)
+        else:
+            composite = vectors[query_text]
+        encoded.append(([query_text] + skills, np.stack([composite] + [vectors[skill] for skill in skills])))
+    return encoded
+
+def score_semantic_results(documents, metadatas, weighted_skills, dataset_key):
+    """Score one ranked list of semantic hits (most similar first) into recommendation results"""
+    results = []
+    
+    # Extract just the skills for processing
+    skills = [item["skill"] for item in weighted_skills]
+    skill_weights = {item["skill"]: item["weight"] for item in weighted_skills}
+    
+    for i, (doc, metadata) in enumerate(zip(documents, metadatas)):
+        # Base score with less steep drop-off by rank
+        score = 0.82 - (i * 0.02)
         
-        # Construct final query
-        query_text = " ".join(query_parts)
+        # Find which skills match this result
+        matching_skills = []
+        total_skill_weight = 0
+        for skill in skills:
+            # Using more precise word boundary matching
+            if re.search(rf'\b{re.escape(skill.lower())}\b', doc.lower()):
+                matching_skills.append(skill)
+                # Add weighted score based on skill importance
+                weight = skill_weights.get(skill, 1.0)
+                score += 0.05 * weight
+                total_skill_weight += weight
         
-        # Get vector DB client and relevant collection
-        client = setup_vector_db()
-        collection_names = client.list_collections()
+        # Add skill weight factor to score
+        if total_skill_weight > 0:
+            # Normalize by number of matching skills to avoid bias toward courses that match many low-weight skills
+            avg_skill_weight = total_skill_weight / len(matching_skills) if matching_skills else 0
+            score += min(0.15, avg_skill_weight * 0.1)
         
-        if dataset_key not in collection_names:
-            return results
+        # Domain relevance check for GT courses
+        if dataset_key == "gt_courses" and "Course ID" in metadata:
+            course_id = metadata["Course ID"]
+            course_prefix = course_id.split(" ")[0] if " " in course_id else ""
             
-        collection = client.get_collection(dataset_key)
-        
-        # Generate query embedding
-        query_embedding = embedding_model.encode(query_text).tolist()
-        
-        # Get more results initially for better filtering
-        n_results = min(20, max(7, len(skills) * 3))
+            # Computer Science courses for programming skills
+            if any(s.lower() in ["python", "programming", "software engineering", "coding"] for s in matching_skills):
+                if course_prefix in ["CS", "CSE"]:
+                    score += 0.15
+            
+            # Data science related courses
+            if any(s.lower() in ["data science", "data analysis", "statistics"] for s in matching_skills):
+                if course_prefix in ["ISYE", "CSE", "CS"]:
+                    score += 0.15
         
-        # Query the collection
-        query_results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
+        # Refined threshold based on matching skills
+        score_threshold = 0.7
+        if len(matching_skills) > 0:
+            score_threshold = 0.65
         
-        # Process results
-        if query_results and len(query_results['ids']) > 0 and len(query_results['ids'][0]) > 0:
-            for i in range(len(query_results['ids'][0])):
-                # Base score with less steep drop-off by rank
-                score = 0.82 - (i * 0.02)
-                
-                doc = query_results['documents'][0][i]
-                metadata = query_results['metadatas'][0][i]
-                
-                # Find which skills match this result
-                matching_skills = []
-                total_skill_weight = 0
-                for skill in skills:
-                    # Using more precise word boundary matching
-                    if re.search(rf'\b{re.escape(skill.lower())}\b', doc.lower()):
-                        matching_skills.append(skill)
-                        # Add weighted score based on skill importance
-                        weight = skill_weights.get(skill, 1.0)
-                        score += 0.05 * weight
-                        total_skill_weight += weight
-                
-                # Add skill weight factor to score
-                if total_skill_weight > 0:
-                    # Normalize by number of matching skills to avoid bias toward courses that match many low-weight skills
-                    avg_skill_weight = total_skill_weight / len(matching_skills) if matching_skills else 0
-                    score += min(0.15, avg_skill_weight * 0.1)
-                
-                # Domain relevance check for GT courses
-                if dataset_key == "gt_courses" and "Course ID" in metadata:
-                    course_id = metadata["Course ID"]
-                    course_prefix = course_id.split(" ")[0] if " " in course_id else ""
-                    
-                    # Computer Science courses for programming skills
-                    if any(s.lower() in ["python", "programming", "software engineering", "coding"] for s in matching_skills):
-                        if course_prefix in ["CS", "CSE"]:
-                            score += 0.15
-                    
-                    # Data science related courses
-                    if any(s.lower() in ["data science", "data analysis", "statistics"] for s in matching_skills):
-                        if course_prefix in ["ISYE", "CSE", "CS"]:
-                            score += 0.15
-                    
-                    # Extract course level
+        if score >= score_threshold:
+            result = {
+                "Score": min(1.0, score),
+                "Match Type": "Semantic Match",
+                "Matching Skills": matching_skills,
+                "Description": doc
+            }
+            
+            # Add metadata
+            for key, value in metadata.items():
+                if key not in INTERNAL_METADATA_KEYS:
+                    result[key] = value
+            
+            # Add course level for GT courses
+            if dataset_key == "gt_courses" and "Course ID" in metadata:
+                course_id_parts = metadata["Course ID"].split(" ")
+                if len(course_id_parts) > 1:
                     try:
-                        if " " in course_id:
-                            course_num = int(course_id.split(" ")[1][0])  # First digit 
-                            course_level = "Graduate" if course_num >= 6 else "Undergraduate"
-                        else:
-                            course_level = "Unknown"
+                        course_num = int(course_id_parts[1][0])
+                        result["Course Level"] = "Graduate" if course_num >= 6 else "Undergraduate"
                     except:
-                        course_level = "Unknown"
-                
-                # Refined threshold based on matching skills
-                score_threshold = 0.7
-                if len(matching_skills) > 0:
-                    score_threshold = 0.65
-                
-                if score >= score_threshold:
-                    result = {
-                        "Score": min(1.0, score),
-                        "Match Type": "Semantic Match",
-                        "Matching Skills": matching_skills,
-                        "Description": doc
-                    }
-                    
-                    # Add metadata
-                    for key, value in metadata.items():
-                        result[key] = value
-                    
-                    # Add course level for GT courses
-                    if dataset_key == "gt_courses" and "Course ID" in metadata:
-                        course_id_parts = metadata["Course ID"].split(" ")
-                        if len(course_id_parts) > 1:
-                            try:
-                                course_num = int(course_id_parts[1][0])
-                                result["Course Level"] = "Graduate" if course_num >= 6 else "Undergraduate"
-                            except:
-                                result["Course Level"] = "Unknown"
-                    
-                    results.append(result)
+                        result["Course Level"] = "Unknown"
+            
+            results.append(result)
+    return results
+
+def batched_semantic_search(datasets, weighted_skills, job_title, embedding_model,
+                            dataset_keys=("gt_courses", "moocs"), skill_results=SKILL_QUERY_RESULTS, encoded=None):
+    """
+    Semantic search over several collections with one encode call and one top-k query per collection.
+
+    The composite query and one query per weighted skill are encoded together and sent to each
+    collection as a single multi-query lookup. Returns {dataset_key: {"results", "skill_candidates"}}:
+    results are the scored composite-query hits (what improved_semantic_search returns) and
+    skill_candidates maps each skill to the key_field values of its nearest skill_results courses.
+    skill_results=0 skips the per-skill queries. encoded may pass in the encode_semantic_queries
+    output, so searches of different collections run separately can share one encode.
+    """
+    return multi_semantic_search(datasets, [(weighted_skills, job_title)], embedding_model, dataset_keys,
+                                 skill_results, None if encoded is None else [encoded])[0]
+
+def multi_semantic_search(datasets, jobs, embedding_model, dataset_keys=("gt_courses", "moocs"),
+                          skill_results=SKILL_QUERY_RESULTS, encoded=None):
+    """
+    batched_semantic_search for a list of (weighted_skills, job_title) jobs at once.
+
+    The queries of every job are encoded in one call and stacked into one matrix, so each
+    collection answers the whole batch with a single top-k lookup. Returns one
+    {dataset_key: {"results", "skill_candidates"}} per job; encoded may pass in
+    encode_semantic_query_batch output.
+    """
+    searched = [{key: {"results": [], "skill_candidates": {}} for key in dataset_keys} for _ in jobs]
+    
+    # Only search collections whose dataset is available and non-empty
+    active_keys = [key for key in dataset_keys
+                   if key in datasets and datasets[key] is not None and len(datasets[key]) > 0]
+    if not active_keys or not jobs:
+        return searched
+    
+    per_skill = [skill_results > 0 and len(weighted_skills) > 0 for weighted_skills, _ in jobs]
+    try:
+        if encoded is None:
+            encoded = encode_semantic_query_batch(jobs, embedding_model, any(per_skill))
+        query_embeddings = []
+        for i, (_, embeddings) in enumerate(encoded):
+            per_skill[i] = per_skill[i] and len(embeddings) > 1
+            query_embeddings.append(embeddings if per_skill[i] else embeddings[:1])
     except Exception as e:
-        st.error(f"Error during semantic search: {str(e)}")
+        logger.error(f"Error during semantic search: {str(e)}")
+        return searched
+    
+    # Get more results initially for better filtering
+    n_results = [min(20, max(7, len(weighted_skills) * 3)) for weighted_skills, _ in jobs]
+    top_k = max(max(n, skill_results if skill else 0) for n, skill in zip(n_results, per_skill))
+    # First query row of each job in the stacked matrix
+    starts = np.cumsum([0] + [len(embeddings) for embeddings in query_embeddings])
+    stacked = np.concatenate(query_embeddings)
+    
+    for dataset_key in active_keys:
+        try:
+            # Get the relevant collection from the configured vector backend
+            collection = get_vector_collection(dataset_key)
+            if collection is None:
+                continue
+            
+            # One lookup for the composite and skill queries of every job
+            query_results = collection.query(query_embeddings=stacked.tolist(), n_results=top_k)
+            if not query_results or len(query_results['ids']) == 0:
+                continue
+            
+            key_field = VECTOR_COLLECTIONS[dataset_key]["key_field"]
+            for i, (weighted_skills, _) in enumerate(jobs):
+                documents = query_results['documents'][starts[i]:starts[i + 1]]
+                metadatas = query_results['metadatas'][starts[i]:starts[i + 1]]
+                searched[i][dataset_key]["results"] = score_semantic_results(
+                    documents[0][:n_results[i]], metadatas[0][:n_results[i]], weighted_skills, dataset_key
+                )
+                
+                if per_skill[i]:
+                    for item, skill_metadatas in zip(weighted_skills, metadatas[1:]):
+                        searched[i][dataset_key]["skill_candidates"][item["skill"]] = [
+                            metadata.get(key_field) for metadata in skill_metadatas[:skill_results]
+                        ]
+        except Exception as e:
+            logger.error(f"Error during semantic search: {str(e)}")
+    
+    return searched
+
+def improved_semantic_search(datasets, weighted_skills, job_title, dataset_key, embedding_model):
+    """Perform semantic search with improved query construction"""
+    searched = batched_semantic_search(datasets, weighted_skills, job_title, embedding_model, [dataset_key], skill_results=0)
+    return searched[dataset_key]["results"]
+
+def group_courses_by_skill(weighted_skills, gt_results, mooc_results, semantic=None):
+    """
+    Group recommended courses under the skills they serve.
+    A course belongs to a skill when the skill appears in its "Matching Skills" or, given the
+    batched_semantic_search output as semantic, when it is among that skill's nearest courses.
+    """
+    skill_to_courses = {item["skill"]: {"gt": [], "mooc": []} for item in weighted_skills}
     
-    return results
+    for group, dataset_key, courses in (("gt", "gt_courses", gt_results), ("mooc", "moocs", mooc_results)):
+        key_field = VECTOR_COLLECTIONS[dataset_key]["key_field"]
+        candidates = (semantic or {}).get(dataset_key, {}).get("skill_candidates", {})
+        retrieved = {skill: set(keys) for skill, keys in candidates.items()}
+        
+        for course in courses:
+            course_skills = list(course.get("Matching Skills", []))
+            for skill, keys in retrieved.items():
+                if skill not in course_skills and course.get(key_field) in keys:
+                    course_skills.append(skill)
+            for skill in course_skills:
+                if skill in skill_to_courses:
+                    skill_to_courses[skill][group].append(course)
+    
+    return skill_to_courses
+
 # This function helps combine results from direct and semantic search
 def combine_results(direct_results, semantic_results, key_field):
     """Combine and deduplicate results from different search methods"""
@@ -1129,69 +2490,36 @@ def advanced_filtering(results, dataset_key, weighted_skills, job_title):
             filtered_results.append(result)
     
     return filtered_results
-# Main implementation for course recommendations
-def implement_course_recommendations(job_title, job_description, user_skills=None, seniority_level="Mid-Level"):
-    """
-    Master function to generate course recommendations based on job details
-    """
-    if not job_description.strip():
-        return "Please enter a valid job description."
-    
-    # Connect seniority level from UI to internal representation
-    job_level_mapping = {
-        "Entry-Level": "entry",
-        "Mid-Level": "mid",
-        "Senior": "senior"
-    }
-    job_level = job_level_mapping.get(seniority_level, "mid")
-    
-    # 1. Get relevant majors for this job
-    relevant_majors = get_relevant_majors(job_title)
-    st.write(f"**Relevant Majors for {job_title}:** {', '.join(relevant_majors)}")
-    
-    # 2. Extract and normalize skills
-    normalized_skills = enhanced_skill_extraction(job_title, job_description, user_skills)
-    st.write(f"**Identified Skills:** {', '.join(normalized_skills)}")
-    
-    # 3. Weight skills by importance
-    weighted_skills = weight_skills(normalized_skills, job_title, job_description)
-    
-    # 4. Get datasets
-    datasets = st.session_state.get("datasets", {})
-    embedding_model = load_embedding_model()
-    
-    # 5. Filter Georgia Tech courses by relevant majors
+
+def relevant_datasets_for(datasets, relevant_majors):
+    """The datasets with gt_courses narrowed to courses in relevant_majors"""
     gt_df = datasets.get("gt_courses")
-    if gt_df is not None:
-        # Create a new column indicating whether the course belongs to a relevant major
-        gt_df['is_relevant_major'] = gt_df['Course ID'].apply(
-            lambda x: is_relevant_major_course(x, relevant_majors)
-        )
-        
-        # Filter to only relevant major courses
-        relevant_gt_df = gt_df[gt_df['is_relevant_major']]
-        
-        # Create a temporary dataset with only the relevant courses
-        relevant_datasets = {
-            "gt_courses": relevant_gt_df,
-            "moocs": datasets.get("moocs")  # Keep all MOOCs for now
-        }
-        
-        # Log the filtering results
-        st.write(f"Filtered from {len(gt_df)} courses to {len(relevant_gt_df)} courses in relevant majors")
-    else:
-        relevant_datasets = datasets
-        st.warning("GT courses dataset not available, skipping major filtering")
-    
-    # 6. Perform improved searches on filtered dataset
-    gt_direct = improved_direct_search(relevant_datasets, weighted_skills, "gt_courses")
-    gt_semantic = improved_semantic_search(relevant_datasets, weighted_skills, job_title, "gt_courses", embedding_model)
+    if gt_df is None:
+        logger.warning("GT courses dataset not available, skipping major filtering")
+        return datasets
+    
+    # Filter to only relevant major courses with a read-only mask, so concurrent requests never write to gt_df
+    relevant_gt_df = gt_df[relevant_major_mask(datasets, relevant_majors)]
+    
+    # Log the filtering results
+    logger.info(f"Filtered from {len(gt_df)} courses to {len(relevant_gt_df)} courses in relevant majors")
+    
+    # Create a temporary dataset with only the relevant courses
+    return {
+        "gt_courses": relevant_gt_df,
+        "moocs": datasets.get("moocs"),  # Keep all MOOCs for now
+        "keyword_index": datasets.get("keyword_index"),
+        "catalog": datasets.get("catalog")
+    }
+
+def rank_gt_courses(weighted_skills, job_title, gt_direct, gt_semantic, job_level="mid"):
+    """Combine and filter the GT branch's direct and semantic hits"""
     gt_combined = combine_results(gt_direct, gt_semantic, "Course ID")
     
-    # 7. Apply advanced filtering with job level consideration
+    # 6. Apply advanced filtering
     gt_filtered = advanced_filtering(gt_combined, "gt_courses", weighted_skills, job_title)
     
-    # Apply additional job level weighting based on UI selection
+    # Apply job level weighting based on UI selection
     gt_results = []
     for course in gt_filtered:
         if "Course Level" in course:
@@ -1201,372 +2529,33 @@ def implement_course_recommendations(job_title, job_description, user_skills=Non
             elif job_level == "senior" and course["Course Level"] == "Undergraduate":
                 course["Score"] *= 0.9  # Downweight undergraduate courses for senior level
         gt_results.append(course)
-    
-    # 8. For MOOCs, we can't easily filter by major, so search all MOOCs
-    mooc_direct = improved_direct_search(datasets, weighted_skills, "moocs")
-    mooc_semantic = improved_semantic_search(datasets, weighted_skills, job_title, "moocs", embedding_model)
+    return gt_results
+
+def rank_mooc_courses(weighted_skills, job_title, mooc_direct, mooc_semantic):
+    """Combine and filter the MOOC branch's direct and semantic hits"""
     mooc_combined = combine_results(mooc_direct, mooc_semantic, "Name")
-    mooc_results = advanced_filtering(mooc_combined, "moocs", weighted_skills, job_title)
-    
-    # 9. Group courses by skills they match
-    skill_to_courses = {item["skill"]: {"gt": [], "mooc": []} for item in weighted_skills}
-    
-    # Add GT courses to skill groups
-    for course in gt_results:
-        matching_skills = course.get("Matching Skills", [])
-        for skill in matching_skills:
-            if skill in skill_to_courses:
-                skill_to_courses[skill]["gt"].append(course)
-                
-    # Add MOOC courses to skill groups
-    for course in mooc_results:
-        matching_skills = course.get("Matching Skills", [])
-        for skill in matching_skills:
-            if skill in skill_to_courses:
-                skill_to_courses[skill]["mooc"].append(course)
-    
-    # 10. Format the output
-    output = f"## Course Recommendations for {job_title} ({seniority_level})\n\n"
-    output += f"Based on the identified skills: **{', '.join([item['skill'] for item in weighted_skills])}**\n\n"
-    
-    # Add relevant majors information
-    output += f"**Relevant Academic Areas:** {', '.join(relevant_majors)}\n\n"
-    
-    # Track courses we've already added to avoid duplicates
-    added_gt_courses = set()
-    added_mooc_courses = set()
-    
-    # Add top overall recommended courses first
-    output += "### 🌟 Top Overall Recommended Courses\n\n"
-    
-    # Top Georgia Tech courses
-    if gt_results:
-        output += "#### Georgia Tech Courses:\n\n"
-        top_gt = sorted(gt_results, key=lambda x: -x["Score"])[:5]
-        for course in top_gt:
-            course_id = course["Course ID"]
-            added_gt_courses.add(course_id)
-            
-            # Add course level information
-            course_num = course_id.split(" ")[1] if " " in course_id else ""
-            level_info = ""
-            if course_num:
-                try:
-                    level = int(course_num[0])
-                    if level <= 4:
-                        level_info = " (Undergraduate)"
-                    else:
-                        level_info = " (Graduate)"
-                except:
-                    pass
-            
-            # Add matching skills info
-            matching = ", ".join(course.get("Matching Skills", []))
-            skills_info = f" - Matches: {matching}" if matching else ""
-            
-            # Extract major
-            if " " in course_id:
-                prefix = course_id.split(" ")[0]
-                major = prefix_to_major.get(prefix, "")
-                major_info = f" [{major}]" if major else ""
-            else:
-                major_info = ""
-            
-            output += f"- **{course_id}**: {course['Course Name']}{level_info}{major_info} _{course['Match Type']}_ (Score: {course['Score']:.2f}){skills_info}\n"
-        output += "\n"
-    
-    # Top MOOC courses
-    if mooc_results:
-        output += "#### Online Courses (MOOCs):\n\n"
-        top_mooc = sorted(mooc_results, key=lambda x: -x["Score"])[:5]
-        for course in top_mooc:
-            course_name = course["Name"]
-            added_mooc_courses.add(course_name)
-            
-            # Add matching skills info
-            matching = ", ".join(course.get("Matching Skills", []))
-            skills_info = f" - Matches: {matching}" if matching else ""
-            
-            output += f"- **{course_name}**: [Course Link]({course['Link']}) _{course['Match Type']}_ (Score: {course['Score']:.2f}){skills_info}\n"
-        output += "\n"
-    
-    # Add recommendations by skill - but only for top weighted skills
-    for skill_item in weighted_skills[:min(len(weighted_skills), 6)]:
-        skill = skill_item["skill"]
-        gt_for_skill = skill_to_courses[skill]["gt"]
-        mooc_for_skill = skill_to_courses[skill]["mooc"]
-        
-        if gt_for_skill or mooc_for_skill:
-            output += f"### 🔍 Courses for {skill.upper()}\n\n"
-            
-            # Add Georgia Tech courses for this skill
-            if gt_for_skill:
-                output += "#### Georgia Tech Courses:\n\n"
-                sorted_courses = sorted(gt_for_skill, key=lambda x: -x["Score"])
-                count = 0
-                for course in sorted_courses:
-                    course_id = course["Course ID"]
-                    if course_id not in added_gt_courses and count < 3:
-                        # Extract major and level
-                        if " " in course_id:
-                            prefix = course_id.split(" ")[0]
-                            course_num = course_id.split(" ")[1]
-                            major = prefix_to_major.get(prefix, "")
-                            major_info = f" [{major}]" if major else ""
-                            
-                            level_info = ""
-                            try:
-                                level = int(course_num[0])
-                                if level <= 4:
-                                    level_info = " (Undergraduate)"
-                                else:
-                                    level_info = " (Graduate)"
-                            except:
-                                pass
-                        else:
-                            major_info = ""
-                            level_info = ""
-                        
-                        output += f"- **{course_id}**: {course['Course Name']}{level_info}{major_info} _{course['Match Type']}_ (Score: {course['Score']:.2f})\n"
-                        added_gt_courses.add(course_id)
-                        count += 1
-                output += "\n"
-            
-            # Add MOOC courses for this skill
-            if mooc_for_skill:
-                output += "#### Online Courses (MOOCs):\n\n"
-                sorted_courses = sorted(mooc_for_skill, key=lambda x: -x["Score"])
-                count = 0
-                for course in sorted_courses:
-                    course_name = course["Name"]
-                    if course_name not in added_mooc_courses and count < 3:
-                        output += f"- **{course_name}**: [Course Link]({course['Link']}) _{course['Match Type']}_ (Score: {course['Score']:.2f})\n"
-                        added_mooc_courses.add(course_name)
-                        count += 1
-                output += "\n"
-    
-    if not gt_results and not mooc_results:
-        output += "No matching courses found. Try modifying your job description with more technical details."
-    
-    return output
-
-# Original recommendation function - updated to use the new implementation
-def find_recommended_courses(job_title, job_description, skills=None):
-    """Find courses that match the given job title, description, and skills"""
-    # This function now serves as a wrapper for the new implementation
-    # It maintains compatibility with the old interface
-    return implement_course_recommendations(job_title, job_description, skills)
-    
-# Main UI
-st.title("Job-to-Course Recommendation System")
-st.write("This system analyzes job descriptions to recommend relevant courses from Georgia Tech and MOOCs.")
-
-tab1, tab2, tab3, tab4 = st.tabs(["Get Recommendations", "Settings", "Vector Database", "Job-Major Mapping"])
-
-with tab1:
-    st.write("Enter a job title and description to get recommended courses.")
-    job_title = st.text_input("Enter Job Title", "Data Scientist")
-    job_description = st.text_area("Enter Job Description", "Looking for a data scientist with Python skills, experience in machine learning, and the ability to work with large datasets. Knowledge of data visualization and statistical analysis is required. Experience with deep learning frameworks like TensorFlow or PyTorch is a plus. The ideal candidate should be comfortable with cloud computing platforms and have experience with SQL databases. Knowledge of data engineering principles and ETL pipelines is beneficial.")
-    
-    # Add option for user to explicitly specify skills
-    st.write("Optional: Specify additional skills (comma-separated)")
-    user_skills = st.text_input("Additional Skills", "")
-    
-    # Job seniority level selection
-    seniority_level = st.radio(
-        "Seniority Level:",
-        ["Entry-Level", "Mid-Level", "Senior"],
-        horizontal=True,
-        help="Select the seniority level of the position to get more appropriate course recommendations"
-    )
-    
-    # Show relevant majors based on job title (informational)
-    if job_title:
-        relevant_majors = get_relevant_majors(job_title)
-        major_str = ", ".join(relevant_majors)
-        st.info(f"Relevant academic areas for {job_title}: {major_str}")
-    
-    if st.button("🔍 Find Recommended Courses"):
-        if "datasets" not in st.session_state:
-            st.error("Please load datasets in the Settings tab first!")
-        else:
-            with st.spinner("Finding relevant courses..."):
-                # Use the new recommendation function that filters by major
-                recommendations = implement_course_recommendations(job_title, job_description, user_skills, seniority_level)
-                st.markdown(recommendations)
-                
-                # Add an option to download recommendations as markdown
-                st.download_button(
-                    label="Download Recommendations",
-                    data=recommendations,
-                    file_name=f"{job_title.replace(' ', '_')}_course_recommendations.md",
-                    mime="text/markdown",
-                )
+    return advanced_filtering(mooc_combined, "moocs", weighted_skills, job_title)
 
-with tab2:
-    st.subheader("Configuration")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.write("Dataset Paths")
-        jobskills_path = st.text_input("JobSkills CSV Path", "~/desktop/6365 P/jobskills.csv")
-        gt_courses_path = st.text_input("Georgia Tech Courses CSV Path", "~/desktop/6365 P/gatech_courses.csv")
-        moocs_path = st.text_input("MOOCs CSV Path", "~/desktop/6365 P/moocs.csv")
-    
-    with col2:
-        st.write("LLM API Settings")
-        api_type = st.selectbox(
-            "LLM API Type", 
-            ["ollama", "together", "deepseek", "gemini"],
-            help="Select which API to use for skill extraction"
-        )
-        st.session_state.api_type = api_type
-        
-        if api_type == "ollama":
-            st.session_state.llm_api_url = st.text_input("Ollama API URL", "http://localhost:11434/api/generate")
-            st.session_state.llm_model_name = st.text_input("Ollama Model Name", "llama3.2")
-        elif api_type in ["together", "deepseek", "gemini"]:
-            api_key = st.text_input(f"{api_type.capitalize()} API Key", type="password")
-            st.session_state.api_key = api_key
-            model_options = {
-                "together": ["togethercomputer/llama-2-7b-chat", "togethercomputer/llama-2-70b-chat", "mistralai/Mistral-7B-Instruct-v0.1"],
-                "deepseek": ["deepseek-ai/deepseek-llm-7b-chat", "deepseek-ai/deepseek-coder-6.7b-instruct"],
-                "gemini": ["models/gemini-1.5-pro-latest",
-    "models/gemini-1.5-pro-002",
-    "models/gemini-1.5-flash-latest",
-    "models/gemini-2.0-flash-lite",
-    "models/gemini-2.0-flash"]
-            }
-            st.session_state.llm_model_name = st.selectbox(
-                f"{api_type.capitalize()} Model", 
-                model_options.get(api_type, ["default_model"])
-            )
-    
-    if st.button("Load Datasets"):
-        with st.spinner("Loading datasets..."):
-            st.session_state.datasets = load_datasets(jobskills_path, gt_courses_path, moocs_path)
-            st.success("Datasets loaded successfully!")
-    
-    # Test LLM API
-    if st.button("Test LLM API Connection"):
-        test_description = "Looking for a Python developer with machine learning experience."
-        with st.spinner("Testing API connection..."):
-            skills = extract_skills("Developer", test_description, api_type)
-            if skills:
-                st.success(f"API connection successful! Extracted skills: {', '.join(skills)}")
-            else:
-                st.error("API connection failed. Check your settings and try again.")
+def rank_courses(weighted_skills, job_title, gt_direct, mooc_direct, semantic, job_level="mid"):
+    """Combine and filter the direct and semantic hits of both branches; returns (gt_results, mooc_results, skill_to_courses)"""
+    gt_results = rank_gt_courses(weighted_skills, job_title, gt_direct, semantic["gt_courses"]["results"], job_level)
+    # 7. Combine and filter the MOOC branch
+    mooc_results = rank_mooc_courses(weighted_skills, job_title, mooc_direct, semantic["moocs"]["results"])
+    
+    # 8. Group courses by skills they match or were retrieved for
+    skill_to_courses = group_courses_by_skill(weighted_skills, gt_results, mooc_results, semantic)
+    return gt_results, mooc_results, skill_to_courses
 
-with tab3:
-    st.subheader("Vector Database Management")
-    st.write("Initialize or refresh the vector database with your course data for semantic search.")
-    
-    col1, col2 = st.columns(2)
+def recommend_courses(datasets, weighted_skills, job_title, relevant_majors, embedding_model, job_level="mid"):
+    """
+    Search and rank courses for one posting's weighted skills, GT courses narrowed to relevant_majors;
+    returns (gt_results, mooc_results, skill_to_courses) for build_recommendation_result
+    """
+    relevant_datasets = relevant_datasets_for(datasets, relevant_majors)
     
-    with col1:
-        if st.button("Initialize Vector Database"):
-            if "datasets" not in st.session_state:
-                st.error("Please load datasets first!")
-            else:
-                with st.spinner("Initializing vector database... This may take a few minutes for large datasets."):
-                    embedding_model = load_embedding_model()
-                    success = initialize_vector_database(st.session_state.datasets, embedding_model)
-                    if success:
-                        st.success("Vector database initialized successfully!")
-    
-    with col2:
-        if st.button("Refresh Vector Database"):
-            if "datasets" not in st.session_state:
-                st.error("Please load datasets first!")
-            else:
-                # Confirm refresh dialog
-                refresh_confirm = st.warning("⚠This will delete and rebuild all vector database collections. Continue?")
-                confirm_col1, confirm_col2 = st.columns(2)
-                
-                with confirm_col1:
-                    if st.button("Yes, Refresh Data"):
-                        with st.spinner("Refreshing vector database... This may take a few minutes."):
-                            embedding_model = load_embedding_model()
-                            success = refresh_vector_database(st.session_state.datasets, embedding_model)
-                            if success:
-                                st.success("Vector database refreshed successfully!")
-                
-                with confirm_col2:
-                    if st.button("Cancel"):
-                        st.info("Refresh canceled.")
-    
-    # Add information about when to refresh
-    st.info("**When to refresh?** Refresh your vector database when you have updated your course data or if you notice that search results aren't matching correctly.")
-    
-    # Add selective refresh option
-    st.subheader("Selective Refresh")
-    refresh_options = st.multiselect("Select collections to refresh:", ["gt_courses", "moocs"], 
-                                    help="Choose which collections to refresh instead of refreshing everything")
-    
-    if st.button("Refresh Selected Collections"):
-        if "datasets" not in st.session_state:
-            st.error("Please load datasets first!")
-        elif not refresh_options:
-            st.warning("Please select at least one collection to refresh.")
-        else:
-            # Create a subset of datasets with only the selected collections
-            selected_datasets = {k: st.session_state.datasets[k] for k in refresh_options if k in st.session_state.datasets}
-            
-            with st.spinner(f"Refreshing selected collections: {', '.join(refresh_options)}"):
-                embedding_model = load_embedding_model()
-                success = refresh_vector_database(selected_datasets, embedding_model)
-                if success:
-                    st.success(f"Selected collections refreshed successfully: {', '.join(refresh_options)}")
-with tab4:
-    st.subheader("Job-to-Major Mapping")
-    st.write("Customize which academic majors are relevant for different job titles.")
-    
-    # Show current mappings
-    st.write("### Current Job-Major Mappings")
-    
-    # Allow user to select a job to edit
-    job_options = list(job_to_major.keys())
-    selected_job = st.selectbox("Select Job Title to Edit", job_options)
-    
-    if selected_job:
-        # Show current majors for this job
-        current_majors = job_to_major[selected_job]
-        st.write(f"Current majors for {selected_job}:", ", ".join(current_majors))
-        
-        # Let user edit majors for this job
-        all_majors = sorted(set(major for majors in job_to_major.values() for major in majors))
-        
-        selected_majors = st.multiselect(
-            "Select Relevant Majors", 
-            options=all_majors,
-            default=current_majors
-        )
-        
-        if st.button(f"Update Majors for {selected_job}"):
-            # Update the mapping
-            job_to_major[selected_job] = selected_majors
-            st.success(f"Updated majors for {selected_job}")
-    
-    # Add new job title
-    st.write("### Add New Job Title")
-    new_job_title = st.text_input("New Job Title")
-    
-    if new_job_title:
-        # Get all possible majors to select from
-        all_majors = sorted(set(major for majors in job_to_major.values() for major in majors))
-        
-        new_job_majors = st.multiselect(
-            "Select Relevant Majors for New Job", 
-            options=all_majors
-        )
-        
-        if st.button("Add New Job-Major Mapping"):
-            if new_job_title and new_job_majors:
-                job_to_major[new_job_title] = new_job_majors
-                st.success(f"Added new job mapping for {new_job_title}")
-            else:
-                st.warning("Please provide both job title and majors")
-
-# Add footer
-st.markdown("---")
-st.markdown("💡 **Tip:** For best results, use detailed job descriptions that mention specific technical skills.")
\ No newline at end of file
+    # Encode the queries once for both collections, with per-skill candidates for grouping
+    semantic = batched_semantic_search(relevant_datasets, weighted_skills, job_title, embedding_model)
+    gt_direct = improved_direct_search(relevant_datasets, weighted_skills, "gt_courses")
+    # For MOOCs, we can't easily filter by major, so search all MOOCs
+    mooc_direct = improved_direct_search(datasets, weighted_skills, "moocs")
+    return rank_courses(weighted_skills, job_title, gt_direct, mooc_direct, semantic, job_level)
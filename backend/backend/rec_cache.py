@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import redis
+import redis.exceptions
+from loguru import logger
+
+# How long extracted skill lists stay cached, in seconds (default 7 days)
+SKILL_CACHE_TTL = int(os.environ.get("REC_SKILL_CACHE_TTL", str(7 * 24 * 3600)))
+# Redis server shared by the API workers (see docker-compose); SQLite file used when it is unreachable
+REDIS_URL = os.environ.get("REC_REDIS_URL", "redis://localhost:6379/0")
+SKILL_CACHE_PATH = os.environ.get("REC_SKILL_CACHE_PATH", "~/skill_cache.sqlite")
+# Seconds to connect to Redis and to wait for each reply, so an unreachable server cannot stall a worker
+REDIS_TIMEOUT = float(os.environ.get("REC_REDIS_TIMEOUT", "0.5"))
+# How long whole /rec/getrec responses stay cached, in seconds (default 1 day)
+RESPONSE_CACHE_TTL = int(os.environ.get("REC_RESPONSE_CACHE_TTL", str(24 * 3600)))
+
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace so trivially different submissions share a cache entry"""
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def skill_cache_key(model_name, job_title, job_description):
+    digest = hashlib.sha256(
+        f"{normalize_text(job_title)}\n{normalize_text(job_description)}".encode("utf-8")
+    ).hexdigest()
+    return f"rec:skills:{model_name}:{digest}"
+
+
+class RedisStore:
+    """Key/value store in Redis, with expiry handled by the server"""
+
+    name = "redis"
+
+    def __init__(self, url, timeout=REDIS_TIMEOUT):
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=timeout, socket_timeout=timeout)
+        # Fail fast so the caller can fall back to SQLite
+        self.client.ping()
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+
+class SQLiteStore:
+    """Key/value store in a local SQLite file; expired rows are ignored and removed on read"""
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.expanduser(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            return row[0]
+
+    def set(self, key, value, ttl):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+
+
+def open_store(redis_url=REDIS_URL, sqlite_path=SKILL_CACHE_PATH):
+    """Redis when reachable, otherwise the SQLite file"""
+    try:
+        store = RedisStore(redis_url)
+        logger.info("Using Redis for the recommendation caches")
+        return store
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"Using SQLite for the recommendation caches ({e}), see README for Redis setup")
+        return SQLiteStore(sqlite_path)
+
+
+class SkillCache:
+    """
+    Cache of LLM-extracted skill lists for (job title, job description) pairs.
+
+    Entries are keyed by LLM model name plus a hash of the normalized title and
+    description and expire after ttl seconds. Hit/miss counters are per process.
+    A failing store is logged and treated as a miss, so the cache never breaks a request.
+    """
+
+    def __init__(self, store=None, ttl=SKILL_CACHE_TTL):
+        self._store = store
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def store(self):
+        # Connect lazily so importing the API does not require Redis or create files
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = open_store()
+        return self._store
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, model_name, job_title, job_description):
+        """Cached skill list, or None"""
+        try:
+            value = self.store.get(skill_cache_key(model_name, job_title, job_description))
+        except Exception as e:
+            logger.warning(f"Skill cache read failed: {e}")
+            self._count("errors")
+            value = None
+        if value is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(value)
+
+    def contains(self, model_name, job_title, job_description):
+        """Whether a skill list is cached, without counting a lookup"""
+        try:
+            return self.store.get(skill_cache_key(model_name, job_title, job_description)) is not None
+        except Exception:
+            return False
+
+    def put(self, model_name, job_title, job_description, skills):
+        try:
+            self.store.set(skill_cache_key(model_name, job_title, job_description), json.dumps(skills), self.ttl)
+        except Exception as e:
+            logger.warning(f"Skill cache write failed: {e}")
+            self._count("errors")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self._store.name if self._store is not None else None,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+
+skill_cache = SkillCache()
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call for
+    their key is running wait for it and get its result (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class ResponseCache:
+    """
+    Cache of whole responses: an in-process LRU (front, e.g. rec.LRUCache) in front of the
+    shared store, which holds serialize(value) strings for ttl seconds.
+
+    get_or_compute runs compute at most once per key at a time in this process; concurrent
+    misses on the same key wait for that computation. Store failures are logged and treated
+    as misses, so the cache never breaks a request.
+    """
+
+    def __init__(self, front, store=None, ttl=RESPONSE_CACHE_TTL, serialize=json.dumps, deserialize=json.loads):
+        self.front = front
+        self._store = store
+        self.ttl = ttl
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.store_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = open_store()
+        return self._store
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        """Cached value, or None"""
+        value = self.front.get(key)
+        if value is not None:
+            return value
+        try:
+            stored = self.store.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            self._count("errors")
+            stored = None
+        if stored is None:
+            self._count("misses")
+            return None
+        self._count("store_hits")
+        value = self.deserialize(stored)
+        self.front.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.front.put(key, value)
+        try:
+            self.store.set(key, self.serialize(value), self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+            self._count("errors")
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        """Cached value for key, otherwise compute() stored when cacheable(value)"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def fill():
+            # A call for this key may have finished between the lookup above and this one starting
+            value = self.front.get(key) if key in self.front else None
+            if value is None:
+                value = compute()
+                if cacheable(value):
+                    self.put(key, value)
+            return value
+
+        return self.flight.do(key, fill)
+
+    def stats(self):
+        front = self.front.stats()
+        hits = front["hits"] + self.store_hits
+        lookups = hits + self.misses
+        return {
+            "backend": self._store.name if self._store is not None else None,
+            "ttl": self.ttl,
+            "memory": front,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "coalesced": self.flight.coalesced,
+            "hit_rate": round(hits / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,282 @@
+"""
+Structured recommendation results and their markdown rendering.
+
+The pipeline ranks courses as plain dicts ("Course ID", "Score", "Matching Skills", ...).
+build_recommendation_result turns them into a RecommendationResult once: the top courses are
+sorted, level and major are parsed from the course ID, and the per-skill sections are
+deduplicated against the courses listed above them. The result is immutable, so it can be
+cached, serialized with to_dict/from_dict and rendered to markdown by render_markdown, which
+is itself cached.
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+try:
+    from backend.rec import prefix_to_major
+except ImportError:
+    # Run as a script from this directory (streamlit_app.py, benchmarks.py)
+    from rec import prefix_to_major
+
+# Rendered results kept in the in-process LRU cache
+RENDER_CACHE_SIZE = int(os.environ.get("REC_RENDER_CACHE_SIZE", "1024"))
+
+NO_SKILLS_MESSAGE = "No skills could be extracted from the job description. Please try again with a more detailed description."
+NO_COURSES_MESSAGE = "No matching courses found. Try modifying your job description with more technical details."
+
+# Courses in the top overall lists, per source
+TOP_COURSES = 5
+# Courses per source in each skill section
+SKILL_SECTION_COURSES = 3
+# Skills, by weight, that get their own section
+SKILL_SECTIONS = 6
+
+
+@dataclass(frozen=True)
+class SkillWeight:
+    skill: str
+    weight: float
+
+    def to_dict(self):
+        return {"skill": self.skill, "weight": self.weight}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["skill"], data["weight"])
+
+
+@dataclass(frozen=True)
+class CourseResult:
+    """A recommended Georgia Tech course (source "gt") or MOOC (source "mooc")"""
+    source: str
+    # Course ID for GT courses, course name for MOOCs
+    key: str
+    match_type: str
+    score: float
+    matching_skills: tuple = ()
+    # GT only
+    name: Optional[str] = None
+    level: Optional[str] = None
+    major: Optional[str] = None
+    # MOOCs only
+    link: Optional[str] = None
+
+    def to_dict(self):
+        # Fields that do not apply to the source are left out
+        data = {"source": self.source, "key": self.key, "matchType": self.match_type, "score": self.score,
+                "matchingSkills": list(self.matching_skills)}
+        for field, value in (("name", self.name), ("level", self.level), ("major", self.major), ("link", self.link)):
+            if value is not None:
+                data[field] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["source"], data["key"], data["matchType"], data["score"], tuple(data.get("matchingSkills", ())),
+                   data.get("name"), data.get("level"), data.get("major"), data.get("link"))
+
+
+@dataclass(frozen=True)
+class SkillSection:
+    """
+    Courses listed under one skill, excluding those already listed above it.
+    A source is None when no course of that source serves the skill, and empty
+    when all of them were listed already.
+    """
+    skill: str
+    gt_courses: Optional[tuple] = None
+    moocs: Optional[tuple] = None
+
+    def to_dict(self):
+        return {"skill": self.skill, "gtCourses": _courses_to_dicts(self.gt_courses),
+                "moocs": _courses_to_dicts(self.moocs)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["skill"], _courses_from_dicts(data.get("gtCourses")), _courses_from_dicts(data.get("moocs")))
+
+
+@dataclass(frozen=True)
+class RecommendationResult:
+    """
+    Everything /rec/getrec answers for one job posting; no skills means none could be extracted.
+    skill_source says where the extracted skills came from: "profile", "llm" or "rules".
+    """
+    job_title: str
+    skills: tuple = ()
+    majors: tuple = ()
+    gt_courses: tuple = ()
+    moocs: tuple = ()
+    skill_sections: tuple = ()
+    skill_source: str = ""
+
+    def to_dict(self):
+        return {
+            "jobTitle": self.job_title,
+            "skills": [skill.to_dict() for skill in self.skills],
+            "majors": list(self.majors),
+            "gtCourses": _courses_to_dicts(self.gt_courses),
+            "moocs": _courses_to_dicts(self.moocs),
+            "skillSections": [section.to_dict() for section in self.skill_sections],
+            "skillSource": self.skill_source
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["jobTitle"],
+            tuple(SkillWeight.from_dict(skill) for skill in data.get("skills", ())),
+            tuple(data.get("majors", ())),
+            _courses_from_dicts(data.get("gtCourses", [])),
+            _courses_from_dicts(data.get("moocs", [])),
+            tuple(SkillSection.from_dict(section) for section in data.get("skillSections", ())),
+            data.get("skillSource", "")
+        )
+
+
+def _courses_to_dicts(courses):
+    return None if courses is None else [course.to_dict() for course in courses]
+
+
+def _courses_from_dicts(courses):
+    return None if courses is None else tuple(CourseResult.from_dict(course) for course in courses)
+
+
+# Building results from the ranked course dicts
+
+def skill_weights(weighted_skills):
+    return tuple(SkillWeight(item["skill"], float(item["weight"])) for item in weighted_skills)
+
+
+def gt_course_result(course):
+    """CourseResult of a ranked GT course dict; level and major come from the course ID"""
+    course_id = course["Course ID"]
+    level = major = None
+    if " " in course_id:
+        prefix, course_num = course_id.split(" ")[:2]
+        major = prefix_to_major.get(prefix) or None
+        try:
+            level = "Undergraduate" if int(course_num[0]) <= 4 else "Graduate"
+        except (ValueError, IndexError):
+            pass
+    return CourseResult("gt", course_id, course["Match Type"], float(course["Score"]),
+                        tuple(course.get("Matching Skills", [])), name=str(course["Course Name"]),
+                        level=level, major=major)
+
+
+def mooc_course_result(course):
+    """CourseResult of a ranked MOOC dict"""
+    return CourseResult("mooc", course["Name"], course["Match Type"], float(course["Score"]),
+                        tuple(course.get("Matching Skills", [])), link=str(course["Link"]))
+
+
+def top_gt_courses(gt_results):
+    return tuple(gt_course_result(course) for course in sorted(gt_results, key=lambda x: -x["Score"])[:TOP_COURSES])
+
+
+def top_mooc_courses(mooc_results):
+    return tuple(mooc_course_result(course) for course in sorted(mooc_results, key=lambda x: -x["Score"])[:TOP_COURSES])
+
+
+def build_skill_sections(weighted_skills, skill_to_courses, gt_courses, moocs):
+    """Sections for the top weighted skills that have courses, skipping courses listed in earlier sections"""
+    listed = {"gt": {course.key for course in gt_courses}, "mooc": {course.key for course in moocs}}
+    sections = []
+    for item in weighted_skills[:SKILL_SECTIONS]:
+        skill = item["skill"]
+        by_source = {}
+        for source, key_field, to_result in (("gt", "Course ID", gt_course_result), ("mooc", "Name", mooc_course_result)):
+            courses = skill_to_courses[skill][source]
+            if not courses:
+                by_source[source] = None
+                continue
+            picked = []
+            for course in sorted(courses, key=lambda x: -x["Score"]):
+                if len(picked) == SKILL_SECTION_COURSES:
+                    break
+                if course[key_field] not in listed[source]:
+                    listed[source].add(course[key_field])
+                    picked.append(to_result(course))
+            by_source[source] = tuple(picked)
+        if by_source["gt"] is not None or by_source["mooc"] is not None:
+            sections.append(SkillSection(skill, by_source["gt"], by_source["mooc"]))
+    return tuple(sections)
+
+
+def build_recommendation_result(job_title, weighted_skills, relevant_majors, gt_results, mooc_results, skill_to_courses,
+                                skill_source=""):
+    gt_courses = top_gt_courses(gt_results)
+    moocs = top_mooc_courses(mooc_results)
+    return RecommendationResult(
+        job_title, skill_weights(weighted_skills), tuple(relevant_majors), gt_courses, moocs,
+        build_skill_sections(weighted_skills, skill_to_courses, gt_courses, moocs), skill_source
+    )
+
+
+# Markdown rendering; /rec/getrec/stream sends these sections one by one, render_markdown joins them
+
+def render_skills_section(job_title, skills):
+    output = f"## Course Recommendations for {job_title}\n\n"
+    output += f"Based on the identified skills: **{', '.join([item.skill for item in skills])}**\n\n"
+    return output
+
+
+def render_majors_section(majors):
+    output = f"**Relevant Academic Areas:** {', '.join(majors)}\n\n"
+    output += "### 🌟 Top Overall Recommended Courses\n\n"
+    return output
+
+
+def render_gt_course(course, with_matches=True):
+    level_info = f" ({course.level})" if course.level else ""
+    major_info = f" [{course.major}]" if course.major else ""
+    matching = ", ".join(course.matching_skills) if with_matches else ""
+    skills_info = f" - Matches: {matching}" if matching else ""
+    return f"- **{course.key}**: {course.name}{level_info}{major_info} _{course.match_type}_ (Score: {course.score:.2f}){skills_info}\n"
+
+
+def render_mooc_course(course, with_matches=True):
+    matching = ", ".join(course.matching_skills) if with_matches else ""
+    skills_info = f" - Matches: {matching}" if matching else ""
+    return f"- **{course.key}**: [Course Link]({course.link}) _{course.match_type}_ (Score: {course.score:.2f}){skills_info}\n"
+
+
+def render_gt_section(gt_courses):
+    if not gt_courses:
+        return ""
+    return "#### Georgia Tech Courses:\n\n" + "".join(render_gt_course(course) for course in gt_courses) + "\n"
+
+
+def render_mooc_section(moocs):
+    if not moocs:
+        return ""
+    return "#### Online Courses (MOOCs):\n\n" + "".join(render_mooc_course(course) for course in moocs) + "\n"
+
+
+def render_skill_section(section):
+    output = f"### 🔍 Courses for {section.skill.upper()}\n\n"
+    if section.gt_courses is not None:
+        output += "#### Georgia Tech Courses:\n\n"
+        output += "".join(render_gt_course(course, with_matches=False) for course in section.gt_courses) + "\n"
+    if section.moocs is not None:
+        output += "#### Online Courses (MOOCs):\n\n"
+        output += "".join(render_mooc_course(course, with_matches=False) for course in section.moocs) + "\n"
+    return output
+
+
+def render_closing_section(result):
+    return "" if result.gt_courses or result.moocs else NO_COURSES_MESSAGE
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_markdown(result):
+    """Markdown answer of /rec/getrec for a result"""
+    if not result.skills:
+        return NO_SKILLS_MESSAGE
+    return (render_skills_section(result.job_title, result.skills)
+            + render_majors_section(result.majors)
+            + render_gt_section(result.gt_courses)
+            + render_mooc_section(result.moocs)
+            + "".join(render_skill_section(section) for section in result.skill_sections)
+            + render_closing_section(result))
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+from loguru import logger
+
+# Attempts at warming up before the worker gives up and loads resources on the first request instead
+WARMUP_ATTEMPTS = int(os.environ.get("REC_WARMUP_ATTEMPTS", "3"))
+# Seconds before the second attempt; doubles before each further one
+WARMUP_BACKOFF = float(os.environ.get("REC_WARMUP_BACKOFF", "5"))
+
+
+class WarmupState:
+    """
+    Progress of this worker's warmup, reported by /rec/ready.
+
+    pending -> warming -> ready. A failed attempt is retried after a backoff
+    (status retrying) up to attempts times; after the last one the status is
+    failed. A failed worker still counts as ready: requests load what warmup
+    could not (resources are loaded lazily on first use), and the status and
+    error in the snapshot show that the warmup did not happen.
+    """
+
+    def __init__(self, attempts=WARMUP_ATTEMPTS, backoff=WARMUP_BACKOFF):
+        self.lock = threading.Lock()
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.status = "pending"
+        self.attempt = 0
+        self.steps = {}
+        self.error = None
+        self.started_at = None
+        self.seconds = None
+
+    @property
+    def ready(self):
+        return self.status in ("ready", "disabled", "failed")
+
+    def step(self, name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        with self.lock:
+            self.steps[name] = round(time.perf_counter() - start, 3)
+        return result
+
+    def run(self, warm, sleep=time.sleep):
+        """Call warm(self) until it returns without raising, at most attempts times with exponential backoff"""
+        self.started_at = time.time()
+        for attempt in range(1, self.attempts + 1):
+            self.attempt = attempt
+            self.status = "warming"
+            try:
+                warm(self)
+            except Exception as e:
+                self.error = str(e)
+                if attempt == self.attempts:
+                    self.status = "failed"
+                    logger.exception(f"Recommendation warmup failed after {attempt} attempts, "
+                                     f"resources will load on the first request: {e}")
+                    break
+                delay = self.backoff * 2 ** (attempt - 1)
+                self.status = "retrying"
+                logger.warning(f"Recommendation warmup attempt {attempt} failed, retrying in {delay:g}s: {e}")
+                sleep(delay)
+            else:
+                self.status = "ready"
+                self.error = None
+                logger.info(f"Recommendation warmup finished in {time.time() - self.started_at:.1f}s")
+                break
+        self.seconds = round(time.time() - self.started_at, 3)
+
+    def snapshot(self):
+        with self.lock:
+            return {"ready": self.ready, "status": self.status, "attempt": self.attempt, "steps": dict(self.steps),
+                    "seconds": self.seconds, "error": self.error}
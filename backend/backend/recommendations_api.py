@@ -1,10 +1,30 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import hashlib
+import json
 import os
-from functools import lru_cache
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from flask_cors import CORS
+from loguru import logger
 # Import all the necessary functions from your rec.py
-from backend.rec import (load_embedding_model, setup_vector_db, load_datasets,
-                        get_relevant_majors)
+from backend.rec import (resources, load_embedding_model, load_datasets, VECTOR_COLLECTIONS,
+                        get_relevant_majors, get_vector_collection, get_query_embeddings, vector_db_status, cache_stats,
+                        weight_skills, relevant_datasets_for, improved_direct_search, encode_semantic_queries,
+                        batched_semantic_search, multi_semantic_search, group_courses_by_skill,
+                        rank_gt_courses, rank_mooc_courses, rank_courses,
+                        normalize_skills, fallback_skill_extraction, prefix_to_major, warm_query_embeddings,
+                        LRUCache, EMBEDDING_MODEL_NAME, VECTOR_BACKEND, INDEX_QUANTIZATION, chroma_aliases, numpy_aliases)
+from backend.rec_cache import skill_cache, ResponseCache
+from backend.rec_results import (RecommendationResult, NO_SKILLS_MESSAGE, skill_weights, top_gt_courses,
+                                 top_mooc_courses, build_skill_sections, build_recommendation_result,
+                                 render_skills_section, render_majors_section, render_gt_section,
+                                 render_mooc_section, render_skill_section, render_closing_section, render_markdown)
+from backend.llm_guard import gemini_breaker, CircuitOpenError
+from backend.rec_warmup import WarmupState
+from backend.job_profiles import load_profiles
 
 rec = Blueprint('rec', __name__)
 CORS(rec, resources={r"/*": {"origins": "*"}})
@@ -32,12 +52,49 @@ print(DATASETS_PATH['gt_courses'])
 API_CONFIG = {
     "api_type": "gemini",
     "llm_model_name": "models/gemini-2.0-flash-lite",
-    "api_key": os.environ.get("GEMINI_API_KEY", "")  # Get from environment variable
+    "api_key": os.environ.get("GEMINI_API_KEY", ""),  # Get from environment variable
+    # Optional REST endpoint override, e.g. http://localhost:8089 for fake_llm_server.py
+    "api_endpoint": os.environ.get("GEMINI_API_ENDPOINT", "")
 }
 
-# Cache datasets and models
-@lru_cache(maxsize=1)
-def get_cached_data():
+# Load datasets, model and vector index and run synthetic queries when the blueprint is registered,
+# instead of on the first /rec/getrec; /rec/ready answers 503 until this has finished or failed for good
+# (REC_WARMUP_ATTEMPTS and REC_WARMUP_BACKOFF, see rec_warmup.py)
+WARMUP_ENABLED = os.environ.get("REC_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Synthetic requests run during warmup; skills come from the rule-based extractor, so no LLM calls are made
+WARMUP_QUERIES = [
+    ("Data Scientist", "Python, machine learning, statistics, SQL and data visualization."),
+    ("Software Engineer", "Java, JavaScript, algorithms, data structures, cloud computing and Docker."),
+    ("Cybersecurity Analyst", "Network security, cryptography, Linux and incident response.")
+]
+
+# Skill extractions (LLM calls) run at the same time for one /rec/getrec/batch request
+BATCH_LLM_CONCURRENCY = int(os.environ.get("REC_BATCH_LLM_CONCURRENCY", "8"))
+# Most postings accepted by one /rec/getrec/batch request
+BATCH_MAX_POSTINGS = int(os.environ.get("REC_BATCH_MAX_POSTINGS", "500"))
+
+# Threads shared by all requests for the concurrent parts of the recommendation pipeline
+PIPELINE_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get("REC_PIPELINE_WORKERS", "16")),
+                                   thread_name_prefix="rec-pipeline")
+
+# Postings whose title has a job profile are answered from it without an LLM call when the description
+# is at most this long; longer, custom descriptions still go to the LLM
+PROFILE_MAX_DESCRIPTION = int(os.environ.get("REC_JOB_PROFILE_MAX_DESCRIPTION", "1000"))
+# Skills taken from a profile, as many as the LLM is asked for
+PROFILE_SKILLS = 7
+
+# Bump when RecommendationResult changes shape, so cached responses of the old shape are not read
+RESPONSE_CACHE_FORMAT = 1
+# Whole /rec/getrec results kept in this worker, in front of the Redis copy shared by all workers
+RESPONSE_CACHE_SIZE = int(os.environ.get("REC_RESPONSE_CACHE_SIZE", "256"))
+response_cache = ResponseCache(
+    LRUCache(RESPONSE_CACHE_SIZE),
+    serialize=lambda result: json.dumps(result.to_dict()),
+    deserialize=lambda value: RecommendationResult.from_dict(json.loads(value))
+)
+
+def load_api_datasets():
     print("Loading cached datasets...")
     datasets = load_datasets(
         DATASETS_PATH["jobskills"],
@@ -45,58 +102,48 @@ def get_cached_data():
         DATASETS_PATH["moocs"]
     )
     print(DATASETS_PATH['gt_courses'])
+    # Identifies the loaded CSVs in response cache keys; a missing CSV loads as an empty frame
+    datasets["version"] = ":".join(dataset_file_version(DATASETS_PATH[key]) for key in ("gt_courses", "moocs"))
+    return datasets
 
-    embedding_model = load_embedding_model()
-    return datasets, embedding_model
+def dataset_file_version(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
 
+# The engine's resource registry loads the datasets once per process, next to the model and vector store
+resources.register("datasets", load_api_datasets)
+# Job-title skill profiles built offline from jobskills.csv by job_profiles.py; None when not built
+# (the engine's skill_extractor resource adds their skills to its taxonomy)
+resources.register("job_profiles", load_profiles)
 
-# Import the fixed implementation
-#from api_implement_course_recommendations import api_implement_course_recommendations
+def get_cached_data():
+    return resources.get("datasets"), load_embedding_model()
 
-# This is the complete version of the api_implement_course_recommendations function
-# It ensures we get the same output as the Streamlit version including MOOCs and skill-wise recommendations
 
-def api_implement_course_recommendations(job_title, job_description, user_skills=None, seniority_level="Mid-Level"):
-    """API-specific version that doesn't rely on st.session_state"""
-    from backend.rec import (enhanced_skill_extraction, weight_skills, get_relevant_majors,
-                            is_relevant_major_course, improved_direct_search, 
-                            improved_semantic_search, combine_results, advanced_filtering,
-                            normalize_skills, prefix_to_major)
+def gemini_extract_skills(job_title, job_description):
+    """Ask the configured Gemini model for the job's skills; raises on any API error"""
+    import google.generativeai as genai
     
-    # Map seniority level to internal representation
-    job_level_mapping = {
-        "Entry-Level": "entry",
-        "Mid-Level": "mid",
-        "Senior": "senior"
-    }
-    job_level =  "mid"
-    
-    # Get datasets and embedding model
-    datasets, embedding_model = get_cached_data()
+    # Configure with API key from our config
+    if API_CONFIG["api_endpoint"]:
+        genai.configure(api_key=API_CONFIG["api_key"], transport="rest",
+                        client_options={"api_endpoint": API_CONFIG["api_endpoint"]})
+    else:
+        genai.configure(api_key=API_CONFIG["api_key"])
     
-    # 1. Get relevant majors for this job
-    relevant_majors = get_relevant_majors(job_title)
-    print(f"Relevant Majors for {job_title}: {', '.join(relevant_majors)}")
+    # Create a model instance
+    model = genai.GenerativeModel(
+        model_name=API_CONFIG["llm_model_name"],
+        generation_config={
+            "temperature": 0.1,
+            "max_output_tokens": 250,
+        }
+    )
     
-    # 2. Extract and normalize skills - pass the API config
-    # Create a simple wrapper for extract_skills_gemini
-    def api_extract_skills(job_title, job_description, api_type="gemini"):
-        try:
-            import google.generativeai as genai
-            
-            # Configure with API key from our config
-            genai.configure(api_key=API_CONFIG["api_key"])
-            
-            # Create a model instance
-            model = genai.GenerativeModel(
-                model_name=API_CONFIG["llm_model_name"],
-                generation_config={
-                    "temperature": 0.1,
-                    "max_output_tokens": 250,
-                }
-            )
-            
-            prompt = f"""You are an academic advisor at Georgia Tech with deep knowledge of technical fields and the courses offered.
+    prompt = f"""You are an academic advisor at Georgia Tech with deep knowledge of technical fields and the courses offered.
 
 Task: Analyze this job description for a {job_title} role and:
 1. Extract the top 5-7 most important technical skills required which could be actual subjects. For example, for a cloud related role, operating systems and computer networks are required courses. 
@@ -115,258 +162,374 @@ Skills: [comma-separated list of skills]
 Relevant Majors: [comma-separated list of majors]
 Recommended GT Courses: [Course ID 1]: [Course Name 1], [Course ID 2]: [Course Name 2], etc.
 """
-            
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Extract just the skills list
-            skills_text = ""
-            if "Skills:" in response_text:
-                skills_section = response_text.split("Skills:")[1].split("Relevant Majors:")[0].strip()
-                skills_text = skills_section
-            
-            skills_list = [skill.strip() for skill in skills_text.split(",") if skill.strip()]
-            return skills_list
-            
-        except Exception as e:
-            print(f"Gemini API Error: {str(e)}")
-            # Fallback to hardcoded skills for common job titles
-            if "data scientist" in job_title.lower():
-                return ["python", "machine learning", "statistics", "data analysis", "sql"]
-            elif "software" in job_title.lower() and "engineer" in job_title.lower():
-                return ["software engineering", "python", "algorithms", "data structures", "system design"]
-            elif "network" in job_title.lower():
-                return ["network monitoring", "software engineering", "algorithms", "python", "scalable systems"]
-            else:
-                # Try to extract skills using regex for basic keywords in the job description
-                from backend.rec import fallback_skill_extraction
-                return fallback_skill_extraction(job_description)
-    
-    # Modified enhanced_skill_extraction to use our API wrapper
-    def api_enhanced_skill_extraction(job_title, job_description, user_skills=None):
-        # Get skills from our API wrapper
-        extracted_skills = api_extract_skills(job_title, job_description)
-        
-        # If we couldn't extract skills, try fallback
-        if not extracted_skills:
-            from backend.rec import fallback_skill_extraction
-            extracted_skills = fallback_skill_extraction(job_description)
-        
-        # Include user-provided skills if any
-        if user_skills:
-            if isinstance(user_skills, str):
-                user_skills = [s.strip() for s in user_skills.split(',')]
-            
-            # Add user skills to extracted skills, avoiding duplicates
-            for skill in user_skills:
-                if skill and skill.strip() and skill.strip().lower() not in [s.lower() for s in extracted_skills]:
-                    extracted_skills.append(skill.strip())
-        
-        # Use original normalize_skills function from backend.rec
-        normalized_skills = normalize_skills(extracted_skills)
+    
+    # The client-side timeout stops the HTTP request itself once the caller has given up on it
+    response = model.generate_content(prompt, request_options={"timeout": gemini_breaker.timeout})
+    response_text = response.text.strip()
+    
+    # Extract just the skills list
+    skills_text = ""
+    if "Skills:" in response_text:
+        skills_section = response_text.split("Skills:")[1].split("Relevant Majors:")[0].strip()
+        skills_text = skills_section
+    
+    return [skill.strip() for skill in skills_text.split(",") if skill.strip()]
+
+def api_fallback_skills(job_title, job_description):
+    """Rule-based skills used when the LLM is unavailable"""
+    # The title's job profile, whatever the description's length
+    profiles = resources.get("job_profiles")
+    profile_skills = profiles.skills(job_title, limit=PROFILE_SKILLS) if profiles is not None else None
+    if profile_skills:
+        return profile_skills
+    
+    # Fallback to hardcoded skills for common job titles
+    if "data scientist" in job_title.lower():
+        return ["python", "machine learning", "statistics", "data analysis", "sql"]
+    elif "software" in job_title.lower() and "engineer" in job_title.lower():
+        return ["software engineering", "python", "algorithms", "data structures", "system design"]
+    elif "network" in job_title.lower():
+        return ["network monitoring", "software engineering", "algorithms", "python", "scalable systems"]
+    else:
+        # Try to extract skills using regex for basic keywords in the job description
+        from backend.rec import fallback_skill_extraction
+        return fallback_skill_extraction(job_description, job_title)
+
+# Wrapper around the Gemini skill extraction used by the API
+def api_extract_skills(job_title, job_description, api_type="gemini"):
+    """
+    Extract skills with the configured Gemini model, reusing cached results for the same title and description.
+    The call runs under gemini_breaker: it is abandoned after REC_LLM_TIMEOUT seconds, and while the circuit
+    is open the rule-based fallback answers immediately without contacting Gemini.
+    """
+    cached_skills = skill_cache.get(API_CONFIG["llm_model_name"], job_title, job_description)
+    if cached_skills is not None:
+        return cached_skills
+    
+    try:
+        skills_list = gemini_breaker.call(gemini_extract_skills, job_title, job_description)
+    except CircuitOpenError:
+        return api_fallback_skills(job_title, job_description)
+    except Exception as e:
+        print(f"Gemini API Error: {str(e)}")
+        return api_fallback_skills(job_title, job_description)
+    
+    # Only cache real model output, never the fallbacks
+    if skills_list:
+        skill_cache.put(API_CONFIG["llm_model_name"], job_title, job_description, skills_list)
+    return skills_list
+
+# Import the fixed implementation
+#from api_implement_course_recommendations import api_implement_course_recommendations
+
+# This is the complete version of the api_implement_course_recommendations function
+# It ensures we get the same output as the Streamlit version including MOOCs and skill-wise recommendations
+
+def api_profile_skills(job_title, job_description):
+    """
+    Skills for a posting from its title's job profile, or None when the title has no profile or the
+    description is longer than PROFILE_MAX_DESCRIPTION. Profile skills the description mentions come
+    first, then other known skills it mentions, then the rest of the profile.
+    """
+    profiles = resources.get("job_profiles")
+    if profiles is None or len(job_description) > PROFILE_MAX_DESCRIPTION:
+        return None
+    profile_skills = profiles.skills(job_title)
+    if profile_skills is None:
+        return None
+    
+    description = job_description.lower()
+    mentioned = [skill for skill in profile_skills if re.search(rf"\b{re.escape(skill)}\b", description)]
+    keywords = [skill for skill in normalize_skills(fallback_skill_extraction(description, job_title)) if skill not in profile_skills]
+    return (mentioned + keywords + [skill for skill in profile_skills if skill not in mentioned])[:PROFILE_SKILLS]
+
+def api_posting_skills(job_title, job_description, user_skills=None, use_llm=True):
+    """
+    Skills for one posting: job profile, LLM (or rule-based) extraction plus the user's skills, normalized, at most 10.
+    Returns (skills, skill source): "profile", "llm" or "rules", as RecommendationResult.skill_source.
+    """
+    extracted_skills = []
+    skill_source = "rules"
+    if use_llm:
+        # Common titles come from the job profiles without an LLM call, the rest from our API wrapper
+        extracted_skills = api_profile_skills(job_title, job_description)
+        if extracted_skills:
+            skill_source = "profile"
+        else:
+            extracted_skills = api_extract_skills(job_title, job_description)
+            # The skill cache holds only real model output, never the fallbacks
+            if extracted_skills and skill_cache.contains(API_CONFIG["llm_model_name"], job_title, job_description):
+                skill_source = "llm"
+    
+    # If we couldn't extract skills, try fallback
+    if not extracted_skills:
+        extracted_skills = fallback_skill_extraction(job_description, job_title)
+    
+    # Include user-provided skills if any
+    if user_skills:
+        if isinstance(user_skills, str):
+            user_skills = [s.strip() for s in user_skills.split(',')]
         
-        # Limit to reasonable number
-        return normalized_skills[:10]
+        # Add user skills to extracted skills, avoiding duplicates
+        for skill in user_skills:
+            if skill and skill.strip() and skill.strip().lower() not in [s.lower() for s in extracted_skills]:
+                extracted_skills.append(skill.strip())
+    
+    # Use original normalize_skills function from backend.rec
+    normalized_skills = normalize_skills(extracted_skills)
+    
+    # Limit to reasonable number
+    return normalized_skills[:10], skill_source
+
+def api_recommendation_events(job_title, job_description, user_skills=None, seniority_level="Mid-Level", use_llm=True):
+    """
+    The recommendation pipeline as a stream of (event, data) pairs, each yielded as soon as its stage is done:
+    skills, majors, gt_courses, moocs, one skill event per skill section, then done (or no_skills).
+    Every data dict has the stage's part of the RecommendationResult and its "markdown" chunk; joined in
+    order the chunks are render_markdown of the whole result, which the last event carries as "result".
+    """
+    # Map seniority level to internal representation
+    job_level_mapping = {
+        "Entry-Level": "entry",
+        "Mid-Level": "mid",
+        "Senior": "senior"
+    }
+    job_level =  "mid"
+    
+    # Get datasets and embedding model
+    datasets, embedding_model = get_cached_data()
+    
+    # 1. Get relevant majors for this job
+    relevant_majors = get_relevant_majors(job_title)
+    print(f"Relevant Majors for {job_title}: {', '.join(relevant_majors)}")
+    
+    # The pipeline runs as a small task graph on PIPELINE_POOL. Only this thread waits on futures,
+    # so pool workers never block on each other and concurrent requests cannot deadlock the pool.
+    # 2. While the LLM call is in flight: warm the job title embedding and filter by major here
+    skills_future = PIPELINE_POOL.submit(api_posting_skills, job_title, job_description, user_skills, use_llm)
+    PIPELINE_POOL.submit(warm_query_embeddings, embedding_model, [job_title])
+    
+    # 4. Filter Georgia Tech courses by relevant majors
+    relevant_datasets = relevant_datasets_for(datasets, relevant_majors)
     
     # Continue with the implementation using our modified functions
-    normalized_skills = api_enhanced_skill_extraction(job_title, job_description, user_skills)
+    normalized_skills, skill_source = skills_future.result()
     print(f"Identified Skills: {', '.join(normalized_skills)}")
     
     if not normalized_skills:
-        return "No skills could be extracted from the job description. Please try again with a more detailed description."
+        yield "no_skills", {"result": RecommendationResult(job_title, skill_source=skill_source), "markdown": NO_SKILLS_MESSAGE}
+        return
     
     # 3. Weight skills by importance
     weighted_skills = weight_skills(normalized_skills, job_title, job_description)
     
-    # 4. Filter Georgia Tech courses by relevant majors
-    gt_df = datasets.get("gt_courses")
-    if gt_df is not None:
-        # Create a new column indicating whether the course belongs to a relevant major
-        gt_df['is_relevant_major'] = gt_df['Course ID'].apply(
-            lambda x: is_relevant_major_course(x, relevant_majors)
+    # 5. Perform improved searches on filtered dataset, GT and MOOC branches in parallel
+    gt_direct_future = PIPELINE_POOL.submit(improved_direct_search, relevant_datasets, weighted_skills, "gt_courses")
+    # For MOOCs, we can't easily filter by major, so search all MOOCs
+    mooc_direct_future = PIPELINE_POOL.submit(improved_direct_search, datasets, weighted_skills, "moocs")
+    
+    skills = skill_weights(weighted_skills)
+    yield "skills", {"skills": skills, "markdown": render_skills_section(job_title, skills)}
+    yield "majors", {"majors": relevant_majors, "markdown": render_majors_section(relevant_majors)}
+    
+    # Encode the queries once for both collections, with per-skill candidates for grouping
+    encoded = encode_semantic_queries(weighted_skills, job_title, embedding_model)
+    gt_semantic_future = PIPELINE_POOL.submit(batched_semantic_search, relevant_datasets, weighted_skills, job_title,
+                                              embedding_model, ["gt_courses"], encoded=encoded)
+    mooc_semantic_future = PIPELINE_POOL.submit(batched_semantic_search, datasets, weighted_skills, job_title,
+                                                embedding_model, ["moocs"], encoded=encoded)
+    
+    # 6. Each branch is sent as soon as its own searches are done
+    gt_semantic = gt_semantic_future.result()
+    gt_results = rank_gt_courses(weighted_skills, job_title, gt_direct_future.result(),
+                                 gt_semantic["gt_courses"]["results"], job_level)
+    gt_courses = top_gt_courses(gt_results)
+    yield "gt_courses", {"courses": gt_courses, "markdown": render_gt_section(gt_courses)}
+    
+    # 7. Combine and filter the MOOC branch
+    mooc_semantic = mooc_semantic_future.result()
+    mooc_results = rank_mooc_courses(weighted_skills, job_title, mooc_direct_future.result(),
+                                     mooc_semantic["moocs"]["results"])
+    moocs = top_mooc_courses(mooc_results)
+    yield "moocs", {"courses": moocs, "markdown": render_mooc_section(moocs)}
+    
+    # 8. Group courses by skills they match or were retrieved for
+    skill_to_courses = group_courses_by_skill(weighted_skills, gt_results, mooc_results, {**gt_semantic, **mooc_semantic})
+    skill_sections = build_skill_sections(weighted_skills, skill_to_courses, gt_courses, moocs)
+    for section in skill_sections:
+        yield "skill", {"section": section, "markdown": render_skill_section(section)}
+    
+    result = RecommendationResult(job_title, skills, tuple(relevant_majors), gt_courses, moocs, skill_sections, skill_source)
+    yield "done", {"result": result, "markdown": render_closing_section(result)}
+
+def api_course_recommendations(job_title, job_description, user_skills=None, seniority_level="Mid-Level", use_llm=True):
+    """RecommendationResult of one posting; use_llm=False uses only the rule-based skill extractor"""
+    # Built by the same events /rec/getrec/stream sends
+    for _, data in api_recommendation_events(job_title, job_description, user_skills, seniority_level, use_llm):
+        pass
+    return data["result"]
+
+def api_implement_course_recommendations(job_title, job_description, user_skills=None, seniority_level="Mid-Level",
+                                         use_llm=True):
+    """API-specific version that doesn't rely on st.session_state; markdown of api_course_recommendations"""
+    return render_markdown(api_course_recommendations(job_title, job_description, user_skills, seniority_level, use_llm))
+
+def canonical_user_skills(user_skills):
+    """User skills as api_posting_skills merges them: split on commas, stripped, through normalize_skills"""
+    if isinstance(user_skills, str):
+        user_skills = user_skills.split(',')
+    return normalize_skills([skill.strip() for skill in user_skills or [] if skill and skill.strip()])
+
+def response_cache_key(job_title, job_description, user_skills=None, use_llm=True):
+    """
+    Key of a /rec/getrec answer: the request, canonicalized only in ways the pipeline cannot tell apart
+    (user skills after normalize_skills), plus the loaded datasets, embedding model, active vector index
+    versions, LLM model, job profiles and skill taxonomy it was computed with. Title case and surrounding
+    spaces are folded too: the LLM prompt sees the title as written, so this relies on the skill cache
+    (which folds both) answering a title variant with the first variant's skills. The description is
+    kept as written.
+    """
+    aliases = numpy_aliases if VECTOR_BACKEND == "numpy" else chroma_aliases
+    profiles = resources.get("job_profiles")
+    version = [
+        str(RESPONSE_CACHE_FORMAT), get_cached_data()[0].get("version", ""), EMBEDDING_MODEL_NAME,
+        VECTOR_BACKEND, INDEX_QUANTIZATION, *(aliases.resolve(name) for name in VECTOR_COLLECTIONS),
+        f"{API_CONFIG['api_type']}:{API_CONFIG['llm_model_name']}" if use_llm else "rule-based",
+        profiles.version if profiles is not None else "", resources.get("skill_extractor").version
+    ]
+    canonical = [job_title.strip().lower(), job_description, *canonical_user_skills(user_skills)]
+    digest = hashlib.sha256(json.dumps([version, canonical]).encode("utf-8")).hexdigest()
+    return f"rec:response:{digest}"
+
+def cached_course_recommendations(job_title, job_description, user_skills=None, use_llm=True):
+    """
+    api_course_recommendations through response_cache. Concurrent misses on the same key wait for one
+    computation. Answers built from fallback skills because the LLM failed are not cached.
+    """
+    key = response_cache_key(job_title, job_description, user_skills, use_llm)
+    result = response_cache.get_or_compute(
+        key,
+        lambda: api_course_recommendations(job_title, job_description, user_skills, use_llm=use_llm),
+        # Skills came from a job profile or the LLM, as the pipeline recorded in the result
+        cacheable=lambda result: not use_llm or result.skill_source in ("profile", "llm")
+    )
+    # Titles differing in case or surrounding spaces share an entry; answer with this request's title
+    if result.job_title != job_title:
+        result = replace(result, job_title=job_title)
+    return result
+
+def batch_posting_error(posting):
+    """Why a batch posting cannot be run, or None: title and description must be strings, user skills a string or list of strings"""
+    if not isinstance(posting, dict):
+        return "must be an object with jobTitle, jobDescription and userSkills"
+    for field in ("jobTitle", "jobDescription"):
+        if not isinstance(posting.get(field, ""), str):
+            return f"{field} must be a string"
+    user_skills = posting.get("userSkills")
+    if not (user_skills is None or isinstance(user_skills, str)
+            or (isinstance(user_skills, list) and all(isinstance(skill, str) for skill in user_skills))):
+        return "userSkills must be a comma-separated string or a list of strings"
+    return None
+
+def batch_posting_key(posting):
+    """Identity of a batch posting; user skills are canonicalized, so a list or a string both work"""
+    return (posting.get("jobTitle", ""), posting.get("jobDescription", ""),
+            tuple(canonical_user_skills(posting.get("userSkills", ""))))
+
+def api_batch_course_recommendations(postings, use_llm=True):
+    """
+    Recommendations for many postings ({"jobTitle", "jobDescription", "userSkills"} dicts), returned as
+    {"jobTitle", "recommendations", "result"} dicts in input order, each the same as /rec/getrec would answer.
+
+    Identical postings are computed once. Skill extraction runs on at most BATCH_LLM_CONCURRENCY
+    threads while the major filters are prepared; then the semantic queries of all postings are
+    encoded in one call and each collection answers the whole batch with one top-k lookup.
+    """
+    datasets, embedding_model = get_cached_data()
+    keys = [batch_posting_key(posting) for posting in postings]
+    # The first posting of each key is the one computed; the others differ only in how user skills are written
+    user_skills_by_key = {}
+    for key, posting in zip(keys, postings):
+        user_skills_by_key.setdefault(key, posting.get("userSkills", ""))
+    unique = list(user_skills_by_key)
+    
+    # 1. Extract skills for every distinct posting, filter by major while the LLM calls are in flight
+    with ThreadPoolExecutor(max_workers=max(1, min(BATCH_LLM_CONCURRENCY, len(unique))),
+                            thread_name_prefix="rec-batch-llm") as llm_pool:
+        skill_futures = [llm_pool.submit(api_posting_skills, key[0], key[1], user_skills_by_key[key], use_llm)
+                         for key in unique]
+        relevant_majors = {job_title: get_relevant_majors(job_title) for job_title, _, _ in unique}
+        relevant_by_majors = {}
+        for majors in relevant_majors.values():
+            if tuple(majors) not in relevant_by_majors:
+                relevant_by_majors[tuple(majors)] = relevant_datasets_for(datasets, majors)
+        posting_skills = [future.result() for future in skill_futures]
+    
+    # 2. Weight skills; postings without skills get the single-request answer
+    answers = {}
+    jobs = []
+    skill_sources = {}
+    for key, (skills, skill_source) in zip(unique, posting_skills):
+        skill_sources[key] = skill_source
+        if skills:
+            jobs.append((key, weight_skills(skills, key[0], key[1])))
+        else:
+            answers[key] = RecommendationResult(key[0], skill_source=skill_source)
+    
+    # 3. One encode and one top-k per collection for the whole batch, direct searches meanwhile
+    semantic_future = PIPELINE_POOL.submit(multi_semantic_search, datasets,
+                                           [(weighted_skills, key[0]) for key, weighted_skills in jobs], embedding_model)
+    direct = []
+    for (job_title, _, _), weighted_skills in jobs:
+        relevant_datasets = relevant_by_majors[tuple(relevant_majors[job_title])]
+        direct.append((improved_direct_search(relevant_datasets, weighted_skills, "gt_courses"),
+                       improved_direct_search(datasets, weighted_skills, "moocs")))
+    semantic = semantic_future.result()
+    
+    # 4. Rank and format each posting
+    for (key, weighted_skills), (gt_direct, mooc_direct), searched in zip(jobs, direct, semantic):
+        job_title = key[0]
+        relevant_datasets = relevant_by_majors[tuple(relevant_majors[job_title])]
+        gt_df = relevant_datasets.get("gt_courses")
+        if gt_df is None or len(gt_df) == 0:
+            # The single-request path does not search GT courses when no course is in a relevant major
+            searched["gt_courses"] = {"results": [], "skill_candidates": {}}
+        gt_results, mooc_results, skill_to_courses = rank_courses(
+            weighted_skills, job_title, gt_direct, mooc_direct, searched
         )
-        
-        # Filter to only relevant major courses
-        relevant_gt_df = gt_df[gt_df['is_relevant_major']]
-        
-        # Create a temporary dataset with only the relevant courses
-        relevant_datasets = {
-            "gt_courses": relevant_gt_df,
-            "moocs": datasets.get("moocs")  # Keep all MOOCs for now
-        }
-        
-        # Log the filtering results
-        print(f"Filtered from {len(gt_df)} courses to {len(relevant_gt_df)} courses in relevant majors")
-    else:
-        relevant_datasets = datasets
-        print("GT courses dataset not available, skipping major filtering")
-    
-    # 5. Perform improved searches on filtered dataset
-    gt_direct = improved_direct_search(relevant_datasets, weighted_skills, "gt_courses")
-    gt_semantic = improved_semantic_search(relevant_datasets, weighted_skills, job_title, "gt_courses", embedding_model)
-    gt_combined = combine_results(gt_direct, gt_semantic, "Course ID")
-    
-    # 6. Apply advanced filtering
-    gt_filtered = advanced_filtering(gt_combined, "gt_courses", weighted_skills, job_title)
-    
-    # Apply job level weighting based on UI selection
-    gt_results = []
-    for course in gt_filtered:
-        if "Course Level" in course:
-            # Adjust scores based on seniority level
-            if job_level == "entry" and course["Course Level"] == "Graduate":
-                course["Score"] *= 0.9  # Downweight graduate courses for entry level
-            elif job_level == "senior" and course["Course Level"] == "Undergraduate":
-                course["Score"] *= 0.9  # Downweight undergraduate courses for senior level
-        gt_results.append(course)
-    
-    # 7. For MOOCs, we can't easily filter by major, so search all MOOCs
-    mooc_direct = improved_direct_search(datasets, weighted_skills, "moocs")
-    mooc_semantic = improved_semantic_search(datasets, weighted_skills, job_title, "moocs", embedding_model)
-    mooc_combined = combine_results(mooc_direct, mooc_semantic, "Name")
-    mooc_results = advanced_filtering(mooc_combined, "moocs", weighted_skills, job_title)
-    
-    # 8. Group courses by skills they match
-    skill_to_courses = {item["skill"]: {"gt": [], "mooc": []} for item in weighted_skills}
-    
-    # Add GT courses to skill groups
-    for course in gt_results:
-        matching_skills = course.get("Matching Skills", [])
-        for skill in matching_skills:
-            if skill in skill_to_courses:
-                skill_to_courses[skill]["gt"].append(course)
-                
-    # Add MOOC courses to skill groups
-    for course in mooc_results:
-        matching_skills = course.get("Matching Skills", [])
-        for skill in matching_skills:
-            if skill in skill_to_courses:
-                skill_to_courses[skill]["mooc"].append(course)
-    
-    # 9. Format the output
-    output = f"## Course Recommendations for {job_title}\n\n"
-    output += f"Based on the identified skills: **{', '.join([item['skill'] for item in weighted_skills])}**\n\n"
-    
-    # Add relevant majors information
-    output += f"**Relevant Academic Areas:** {', '.join(relevant_majors)}\n\n"
-    
-    # Track courses we've already added to avoid duplicates
-    added_gt_courses = set()
-    added_mooc_courses = set()
-    
-    # Add top overall recommended courses first
-    output += "### 🌟 Top Overall Recommended Courses\n\n"
-    
-    # Top Georgia Tech courses
-    if gt_results:
-        output += "#### Georgia Tech Courses:\n\n"
-        top_gt = sorted(gt_results, key=lambda x: -x["Score"])[:5]
-        for course in top_gt:
-            course_id = course["Course ID"]
-            added_gt_courses.add(course_id)
-            
-            # Add course level information
-            course_num = course_id.split(" ")[1] if " " in course_id else ""
-            level_info = ""
-            if course_num:
-                try:
-                    level = int(course_num[0])
-                    if level <= 4:
-                        level_info = " (Undergraduate)"
-                    else:
-                        level_info = " (Graduate)"
-                except:
-                    pass
-            
-            # Add matching skills info
-            matching = ", ".join(course.get("Matching Skills", []))
-            skills_info = f" - Matches: {matching}" if matching else ""
-            
-            # Extract major
-            if " " in course_id:
-                prefix = course_id.split(" ")[0]
-                major = prefix_to_major.get(prefix, "")
-                major_info = f" [{major}]" if major else ""
-            else:
-                major_info = ""
-            
-            output += f"- **{course_id}**: {course['Course Name']}{level_info}{major_info} _{course['Match Type']}_ (Score: {course['Score']:.2f}){skills_info}\n"
-        output += "\n"
-    
-    # Top MOOC courses
-    if mooc_results:
-        output += "#### Online Courses (MOOCs):\n\n"
-        top_mooc = sorted(mooc_results, key=lambda x: -x["Score"])[:5]
-        for course in top_mooc:
-            course_name = course["Name"]
-            added_mooc_courses.add(course_name)
-            
-            # Add matching skills info
-            matching = ", ".join(course.get("Matching Skills", []))
-            skills_info = f" - Matches: {matching}" if matching else ""
-            
-            output += f"- **{course_name}**: [Course Link]({course['Link']}) _{course['Match Type']}_ (Score: {course['Score']:.2f}){skills_info}\n"
-        output += "\n"
-    
-    # Add recommendations by skill - but only for top weighted skills
-    for skill_item in weighted_skills[:min(len(weighted_skills), 6)]:
-        skill = skill_item["skill"]
-        gt_for_skill = skill_to_courses[skill]["gt"]
-        mooc_for_skill = skill_to_courses[skill]["mooc"]
-        
-        if gt_for_skill or mooc_for_skill:
-            output += f"### 🔍 Courses for {skill.upper()}\n\n"
-            
-            # Add Georgia Tech courses for this skill
-            if gt_for_skill:
-                output += "#### Georgia Tech Courses:\n\n"
-                sorted_courses = sorted(gt_for_skill, key=lambda x: -x["Score"])
-                count = 0
-                for course in sorted_courses:
-                    course_id = course["Course ID"]
-                    if course_id not in added_gt_courses and count < 3:
-                        # Extract major and level
-                        if " " in course_id:
-                            prefix = course_id.split(" ")[0]
-                            course_num = course_id.split(" ")[1]
-                            major = prefix_to_major.get(prefix, "")
-                            major_info = f" [{major}]" if major else ""
-                            
-                            level_info = ""
-                            try:
-                                level = int(course_num[0])
-                                if level <= 4:
-                                    level_info = " (Undergraduate)"
-                                else:
-                                    level_info = " (Graduate)"
-                            except:
-                                pass
-                        else:
-                            major_info = ""
-                            level_info = ""
-                        
-                        output += f"- **{course_id}**: {course['Course Name']}{level_info}{major_info} _{course['Match Type']}_ (Score: {course['Score']:.2f})\n"
-                        added_gt_courses.add(course_id)
-                        count += 1
-                output += "\n"
-            
-            # Add MOOC courses for this skill
-            if mooc_for_skill:
-                output += "#### Online Courses (MOOCs):\n\n"
-                sorted_courses = sorted(mooc_for_skill, key=lambda x: -x["Score"])
-                count = 0
-                for course in sorted_courses:
-                    course_name = course["Name"]
-                    if course_name not in added_mooc_courses and count < 3:
-                        output += f"- **{course_name}**: [Course Link]({course['Link']}) _{course['Match Type']}_ (Score: {course['Score']:.2f})\n"
-                        added_mooc_courses.add(course_name)
-                        count += 1
-                output += "\n"
-    
-    if not gt_results and not mooc_results:
-        output += "No matching courses found. Try modifying your job description with more technical details."
-    
-    return output
+        answers[key] = build_recommendation_result(
+            job_title, weighted_skills, relevant_majors[job_title], gt_results, mooc_results, skill_to_courses,
+            skill_sources[key]
+        )
+    
+    return [{"jobTitle": key[0], "recommendations": render_markdown(answers[key]), "result": answers[key].to_dict()}
+            for key in keys]
+
+warmup_state = WarmupState()
+
+def warm_up(state=warmup_state):
+    """Load this worker's recommendation resources and run WARMUP_QUERIES through the full pipeline, with retries"""
+    state.run(warm_up_once)
+
+def warm_up_once(state):
+    state.step("datasets", resources.get, "datasets")
+    state.step("job_profiles", resources.get, "job_profiles")
+    state.step("skill_extractor", resources.get, "skill_extractor")
+    embedding_model = state.step("embedding_model", load_embedding_model)
+    state.step("vector_index", lambda: [get_vector_collection(key) for key in VECTOR_COLLECTIONS])
+    state.step("query_embeddings", get_query_embeddings, embedding_model)
+    # First inference, first vector queries and the per-skill direct-search caches
+    for job_title, job_description in WARMUP_QUERIES:
+        state.step(f"query:{job_title}", api_implement_course_recommendations, job_title, job_description,
+                   None, "Mid-Level", False)
+
+@rec.record_once
+def start_warmup(setup_state):
+    # Runs in each worker process once the blueprint is registered on its app
+    if not WARMUP_ENABLED:
+        warmup_state.status = "disabled"
+        return
+    threading.Thread(target=warm_up, name="rec-warmup", daemon=True).start()
 
 @rec.route('/getrec', methods=['POST'])
 def get_recommendations():
@@ -386,16 +549,85 @@ def get_recommendations():
         #print(f"Seniority level: {seniority_level}")
         print(f"API key length: {len(API_CONFIG['api_key'])}")
         
-        # Use our API-specific implementation
-        recommendations = api_implement_course_recommendations(
+        # Use our API-specific implementation, answering repeated requests from the response cache
+        result = cached_course_recommendations(
             job_title,
             job_description,
             user_skills
             #seniority_level
         )
+        recommendations = render_markdown(result)
         
         print(f"Generated recommendations of length: {len(recommendations)}")
-        return jsonify({"recommendations": recommendations})
+        return jsonify({"recommendations": recommendations, "result": result.to_dict()})
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"ERROR: {error_details}")
+        return jsonify({"error": str(e), "details": error_details}), 500
+
+def sse_event(event, data):
+    """One Server-Sent Events message; result types are sent as their to_dict()"""
+    payload = json.dumps(data, default=lambda value: value.to_dict() if hasattr(value, "to_dict") else str(value))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@rec.route('/getrec/stream', methods=['GET', 'POST'])
+def stream_recommendations():
+    """Endpoint streaming course recommendations as Server-Sent Events, one event per finished stage"""
+    data = request.json if request.method == 'POST' else request.args
+    job_title = data.get('jobTitle', '')
+    job_description = data.get('jobDescription', '')
+    user_skills = data.get('userSkills', '')
+    
+    # Get API key from request if provided
+    if 'apiKey' in data and data['apiKey']:
+        API_CONFIG['api_key'] = data['apiKey']
+    
+    def generate():
+        try:
+            for event, event_data in api_recommendation_events(job_title, job_description, user_skills):
+                # The client has every part of the final result from the earlier events
+                event_data.pop("result", None)
+                yield sse_event(event, event_data)
+        except Exception as e:
+            import traceback
+            print(f"ERROR: {traceback.format_exc()}")
+            yield sse_event("error", {"error": str(e)})
+    
+    # Proxies must pass each event on as soon as it is written
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@rec.route('/getrec/batch', methods=['POST'])
+def get_batch_recommendations():
+    """Endpoint to get course recommendations for a list of job postings"""
+    data = request.json or {}
+    postings = data.get('postings')
+    if not isinstance(postings, list) or not postings:
+        return jsonify({"error": "postings must be a non-empty list of {jobTitle, jobDescription, userSkills}"}), 400
+    if len(postings) > BATCH_MAX_POSTINGS:
+        return jsonify({"error": f"at most {BATCH_MAX_POSTINGS} postings per request"}), 400
+    # Reject the batch before running anything, naming the first bad posting
+    for index, posting in enumerate(postings):
+        error = batch_posting_error(posting)
+        if error:
+            return jsonify({"error": f"postings[{index}]: {error}", "index": index}), 400
+    
+    # Get API key from request if provided
+    if 'apiKey' in data and data['apiKey']:
+        API_CONFIG['api_key'] = data['apiKey']
+    
+    try:
+        start = time.perf_counter()
+        results = api_batch_course_recommendations(postings)
+        seconds = time.perf_counter() - start
+        unique = len({batch_posting_key(p) for p in postings})
+        print(f"Batch of {len(postings)} postings ({unique} distinct) in {seconds:.2f}s")
+        return jsonify({
+            "results": results,
+            "stats": {"postings": len(postings), "distinct": unique, "seconds": round(seconds, 3),
+                      "postings_per_sec": round(len(postings) / seconds, 2) if seconds else None}
+        })
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -408,6 +640,31 @@ def api_relevant_majors():
     relevant_majors = get_relevant_majors(job_title)
     return jsonify({"relevantMajors": relevant_majors})
 
+@rec.route('/ready', methods=['GET'])
+def api_ready():
+    """
+    Readiness probe: 200 once this worker is warmed up (or warmup is disabled, or failed every attempt
+    and falls back to loading on the first request), 503 until then
+    """
+    return jsonify(warmup_state.snapshot()), 200 if warmup_state.ready else 503
+
+@rec.route('/vector-status', methods=['GET'])
+def api_vector_status():
+    """Endpoint reporting the active version of each vector collection"""
+    return jsonify(vector_db_status())
+
+@rec.route('/cache-stats', methods=['GET'])
+def api_cache_stats():
+    """Endpoint reporting hit/miss counters of the recommendation caches in this worker"""
+    profiles = resources.get("job_profiles")
+    return jsonify({"skill_extraction": skill_cache.stats(), "responses": response_cache.stats(),
+                    "job_profiles": profiles.stats() if profiles is not None else None, **cache_stats()})
+
+@rec.route('/llm-status', methods=['GET'])
+def api_llm_status():
+    """Endpoint reporting the Gemini circuit breaker state and call counters"""
+    return jsonify(gemini_breaker.stats())
+
 # Add a new route for API configuration
 @rec.route('/configure', methods=['POST'])
 def configure_api():
@@ -424,4 +681,7 @@ def configure_api():
     if 'modelName' in data:
         API_CONFIG['llm_model_name'] = data['modelName']
     
+    if 'apiEndpoint' in data:
+        API_CONFIG['api_endpoint'] = data['apiEndpoint']
+    
     return jsonify({"message": "Configuration updated successfully"})
\ No newline at end of file
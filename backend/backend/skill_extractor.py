@@ -0,0 +1,234 @@
+"""
+Local skill extraction with an Aho-Corasick automaton over a skill taxonomy.
+
+The taxonomy maps every term (a skill name or one of its synonyms) to its canonical skill, the name
+normalize_skills gives it. Terms and text are split into the same word and punctuation tokens, so
+"C++", "CI/CD" and "node.js" match as written and "ml" never matches inside "html". One pass over
+the tokens of a job description finds every taxonomy term in it and collects, per canonical skill,
+the features weight_skills scores: occurrences, first position, and whether it is in the first
+paragraph or the job title. The cost does not grow with the size of the taxonomy.
+
+The built-in taxonomy is only COMMON_SKILLS and SKILL_MAPPINGS, about 80 terms, plus the job
+profiles' skills in the API. Profile skills are mined, not curated, so they go through a stop-list:
+a skill made only of GENERIC_WORDS ("communication", "design", "data testing") is left out. No larger taxonomy ships with the repo: a full one (thousands of skills,
+e.g. exported from ESCO or O*NET) must be supplied as a taxonomy file (REC_SKILL_TAXONOMY), one
+skill per line:
+
+    kubernetes: k8s, kube
+    react/frontend: react.js, reactjs
+"""
+import hashlib
+import json
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+
+# Optional file of extra skills and synonyms, see the module docstring
+SKILL_TAXONOMY_PATH = os.environ.get("REC_SKILL_TAXONOMY", "~/skill_taxonomy.txt")
+
+# Terms from the taxonomy file or job profiles that are ordinary words far more often than skills
+AMBIGUOUS_TERMS = {"go", "less", "rest", "it", "as"}
+
+# Words of job-profile skills that name an activity or area rather than a skill a course teaches;
+# a profile skill made only of these words is not added to the taxonomy
+GENERIC_WORDS = {
+    "analysis", "analytical", "administration", "architecture", "attention", "business", "collaboration",
+    "communication", "communications", "compliance", "computer", "coordination", "customer", "data", "design",
+    "detail", "development", "documentation", "engineering", "experience", "implementation", "integration",
+    "knowledge", "leadership", "learning", "maintenance", "management", "monitoring", "office", "operations",
+    "organization", "organizational", "planning", "presentation", "presentations", "problem", "process",
+    "processes", "project", "projects", "quality", "reporting", "reports", "research", "sales", "service",
+    "skills", "software", "solving", "strategy", "support", "system", "systems", "team", "teamwork",
+    "technical", "testing", "time", "tools", "training", "troubleshooting", "work", "writing"
+}
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def tokenize(text):
+    """Lowercase word tokens, with every punctuation character a token of its own"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def skill_weight(in_title, occurrences, in_first_paragraph):
+    """
+    Importance of a skill for a posting, as weight_skills scores it: 1.0, +0.5 when it is in the title,
+    +0.1 per occurrence (at most +0.3) when it occurs more than once, +0.2 when it is in the first paragraph
+    """
+    weight = 1.0
+    if in_title:
+        weight += 0.5
+    if occurrences > 1:
+        weight += min(0.3, occurrences * 0.1)
+    if in_first_paragraph:
+        weight += 0.2
+    return min(2.0, weight)
+
+
+@dataclass
+class SkillFeatures:
+    """Where one canonical skill (through any of its terms) occurs in a posting"""
+    count: int = 0
+    first_position: int = -1
+    in_first_paragraph: bool = False
+    in_title: bool = False
+
+    @property
+    def weight(self):
+        return skill_weight(self.in_title, self.count, self.in_first_paragraph)
+
+
+def is_generic_term(term):
+    """Whether every word of term is in GENERIC_WORDS"""
+    words = [token for token in tokenize(term) if token.isalnum()]
+    return all(word in GENERIC_WORDS for word in words)
+
+
+def read_taxonomy_file(path):
+    """{term: canonical} from a taxonomy file; empty when there is none"""
+    path = os.path.expanduser(path or "")
+    if not path or not os.path.exists(path):
+        return {}
+    taxonomy = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            canonical, _, synonyms = line.partition(":")
+            canonical = canonical.strip().lower()
+            for term in [canonical] + synonyms.split(","):
+                if term.strip():
+                    taxonomy[term.strip().lower()] = canonical
+    return taxonomy
+
+
+def build_taxonomy(common_skills, skill_mappings, taxonomy_path=SKILL_TAXONOMY_PATH, extra_skills=()):
+    """
+    {term: canonical skill} over common_skills, every synonym and target of skill_mappings, the
+    taxonomy file and extra_skills. Canonical names are mapped as normalize_skills maps them.
+    extra_skills (job-profile skills) that are ambiguous or generic (is_generic_term) are left out.
+    """
+    def canonical(skill):
+        skill = skill.lower().strip()
+        return skill_mappings.get(skill, skill)
+
+    taxonomy = {}
+    for term, target in read_taxonomy_file(taxonomy_path).items():
+        taxonomy[term] = canonical(target)
+    for skill in extra_skills:
+        term = skill.lower().strip()
+        if len(term) > 1 and term not in AMBIGUOUS_TERMS and not is_generic_term(term):
+            taxonomy.setdefault(term, canonical(term))
+    # The built-in skills and synonyms win over everything else
+    for skill in common_skills:
+        taxonomy[skill.lower()] = canonical(skill)
+    for term, target in skill_mappings.items():
+        taxonomy[term.lower()] = target
+        taxonomy[target.lower()] = canonical(target)
+    return taxonomy
+
+
+class SkillExtractor:
+    """Aho-Corasick automaton over the token sequences of a {term: canonical skill} taxonomy"""
+
+    def __init__(self, taxonomy):
+        self.taxonomy = taxonomy
+        self.canonical_skills = set(taxonomy.values())
+        # Identifies the taxonomy in response cache keys
+        self.version = hashlib.sha1(json.dumps(sorted(taxonomy.items())).encode("utf-8")).hexdigest()[:12]
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for term, canonical in taxonomy.items():
+            tokens = tokenize(term)
+            variants = {tuple(tokens), tuple(token for token in tokens if token != "-")}
+            for variant in variants:
+                if variant:
+                    self._add(variant, canonical)
+
+        # Failure links, breadth first: the longest proper suffix of each state that is also a prefix
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                inherited = self._output[self._fail[child]]
+                self._output[child] += tuple(output for output in inherited if output not in self._output[child])
+
+    def _add(self, tokens, canonical):
+        state = 0
+        for token in tokens:
+            child = self._goto[state].get(token)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][token] = child
+            state = child
+        # Each output is (canonical skill, term length in tokens), so matches can report where a term starts
+        if (canonical, len(tokens)) not in self._output[state]:
+            self._output[state] = self._output[state] + ((canonical, len(tokens)),)
+
+    def __len__(self):
+        return len(self.taxonomy)
+
+    def matches(self, tokens):
+        """
+        (start, end, canonical skill) of every taxonomy term in tokens, token indexes inclusive,
+        in order of where they end, longest term first among those ending at the same token
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for canonical, length in output[state]:
+                yield i - length + 1, i, canonical
+
+    def mentions(self, tokens):
+        """
+        (start, canonical skill) of every mention in tokens: overlapping terms of the same skill, such as
+        "python" and "python programming", are one mention, so a skill is counted once per matched span
+        """
+        last_end = {}
+        for start, end, canonical in self.matches(tokens):
+            if start <= last_end.get(canonical, -1):
+                last_end[canonical] = max(end, last_end[canonical])
+                continue
+            last_end[canonical] = end
+            yield start, canonical
+
+    def analyze(self, job_title, job_description):
+        """{canonical skill: SkillFeatures} of every taxonomy skill in the posting, in order of first occurrence"""
+        description = job_description or ""
+        tokens = tokenize(description)
+        newline = description.find("\n")
+        first_paragraph_tokens = len(tokenize(description[:newline])) if newline >= 0 else len(tokens)
+
+        features = {}
+        for position, canonical in self.mentions(tokens):
+            found = features.get(canonical)
+            if found is None:
+                found = features[canonical] = SkillFeatures(first_position=position)
+            found.count += 1
+            if position < first_paragraph_tokens:
+                found.in_first_paragraph = True
+        for _, canonical in self.mentions(tokenize(job_title or "")):
+            features.setdefault(canonical, SkillFeatures()).in_title = True
+        return features
+
+    def extract(self, job_title, job_description, limit=None):
+        """Canonical skills the description mentions, most important first (by weight, then first position)"""
+        features = self.analyze(job_title, job_description)
+        mentioned = [(skill, found) for skill, found in features.items() if found.count]
+        mentioned.sort(key=lambda item: (-item[1].weight, item[1].first_position))
+        return [skill for skill, _ in mentioned[:limit]]
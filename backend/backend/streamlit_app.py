@@ -0,0 +1,305 @@
+"""
+Streamlit front end for the recommendation engine in rec.py. Run from this directory:
+
+    streamlit run streamlit_app.py
+"""
+import streamlit as st
+
+from rec import (job_to_major, VECTOR_BACKEND, load_embedding_model, load_datasets, extract_skills,
+                 enhanced_skill_extraction, weight_skills, get_relevant_majors, recommend_courses,
+                 initialize_vector_database, refresh_vector_database, build_numpy_index, vector_db_status)
+from rec_results import NO_SKILLS_MESSAGE, build_recommendation_result, render_markdown
+
+# Configure page
+st.set_page_config(page_title="Course Recommender", layout="wide")
+
+@st.cache_data
+def cached_datasets(jobskills_path, gt_courses_path, moocs_path):
+    return load_datasets(jobskills_path, gt_courses_path, moocs_path)
+
+def show_progress(message, fraction=None):
+    """Progress callback for the engine's long-running vector database operations"""
+    st.write(message)
+    if fraction is not None:
+        st.progress(fraction)
+
+# Main implementation for course recommendations
+def implement_course_recommendations(job_title, job_description, user_skills=None, seniority_level="Mid-Level"):
+    """
+    Master function to generate course recommendations based on job details
+    """
+    if not job_description.strip():
+        return "Please enter a valid job description."
+    
+    # Connect seniority level from UI to internal representation
+    job_level_mapping = {
+        "Entry-Level": "entry",
+        "Mid-Level": "mid",
+        "Senior": "senior"
+    }
+    job_level = job_level_mapping.get(seniority_level, "mid")
+    
+    # 1. Get relevant majors for this job
+    relevant_majors = get_relevant_majors(job_title)
+    st.write(f"**Relevant Majors for {job_title}:** {', '.join(relevant_majors)}")
+    
+    # 2. Extract and normalize skills
+    normalized_skills = enhanced_skill_extraction(job_title, job_description, user_skills, config=st.session_state)
+    st.write(f"**Identified Skills:** {', '.join(normalized_skills)}")
+    if not normalized_skills:
+        return NO_SKILLS_MESSAGE
+    
+    # 3. Weight skills by importance
+    weighted_skills = weight_skills(normalized_skills, job_title, job_description)
+    
+    # 4. Search and rank with the engine's pipeline, the same one the /rec API runs
+    datasets = st.session_state.get("datasets", {})
+    if datasets.get("gt_courses") is None:
+        st.warning("GT courses dataset not available, skipping major filtering")
+    gt_results, mooc_results, skill_to_courses = recommend_courses(
+        datasets, weighted_skills, job_title, relevant_majors, load_embedding_model(), job_level
+    )
+    
+    # 5. Format the output; the heading also names the selected seniority level
+    result = build_recommendation_result(f"{job_title} ({seniority_level})", weighted_skills, relevant_majors,
+                                         gt_results, mooc_results, skill_to_courses)
+    return render_markdown(result)
+
+# Original recommendation function - updated to use the new implementation
+def find_recommended_courses(job_title, job_description, skills=None):
+    """Find courses that match the given job title, description, and skills"""
+    # This function now serves as a wrapper for the new implementation
+    # It maintains compatibility with the old interface
+    return implement_course_recommendations(job_title, job_description, skills)
+    
+# Main UI
+st.title("Job-to-Course Recommendation System")
+st.write("This system analyzes job descriptions to recommend relevant courses from Georgia Tech and MOOCs.")
+
+tab1, tab2, tab3, tab4 = st.tabs(["Get Recommendations", "Settings", "Vector Database", "Job-Major Mapping"])
+
+with tab1:
+    st.write("Enter a job title and description to get recommended courses.")
+    job_title = st.text_input("Enter Job Title", "Data Scientist")
+    job_description = st.text_area("Enter Job Description", "Looking for a data scientist with Python skills, experience in machine learning, and the ability to work with large datasets. Knowledge of data visualization and statistical analysis is required. Experience with deep learning frameworks like TensorFlow or PyTorch is a plus. The ideal candidate should be comfortable with cloud computing platforms and have experience with SQL databases. Knowledge of data engineering principles and ETL pipelines is beneficial.")
+    
+    # Add option for user to explicitly specify skills
+    st.write("Optional: Specify additional skills (comma-separated)")
+    user_skills = st.text_input("Additional Skills", "")
+    
+    # Job seniority level selection
+    seniority_level = st.radio(
+        "Seniority Level:",
+        ["Entry-Level", "Mid-Level", "Senior"],
+        horizontal=True,
+        help="Select the seniority level of the position to get more appropriate course recommendations"
+    )
+    
+    # Show relevant majors based on job title (informational)
+    if job_title:
+        relevant_majors = get_relevant_majors(job_title)
+        major_str = ", ".join(relevant_majors)
+        st.info(f"Relevant academic areas for {job_title}: {major_str}")
+    
+    if st.button("🔍 Find Recommended Courses"):
+        if "datasets" not in st.session_state:
+            st.error("Please load datasets in the Settings tab first!")
+        else:
+            with st.spinner("Finding relevant courses..."):
+                # Use the new recommendation function that filters by major
+                recommendations = implement_course_recommendations(job_title, job_description, user_skills, seniority_level)
+                st.markdown(recommendations)
+                
+                # Add an option to download recommendations as markdown
+                st.download_button(
+                    label="Download Recommendations",
+                    data=recommendations,
+                    file_name=f"{job_title.replace(' ', '_')}_course_recommendations.md",
+                    mime="text/markdown",
+                )
+
+with tab2:
+    st.subheader("Configuration")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.write("Dataset Paths")
+        jobskills_path = st.text_input("JobSkills CSV Path", "~/desktop/6365 P/jobskills.csv")
+        gt_courses_path = st.text_input("Georgia Tech Courses CSV Path", "~/desktop/6365 P/gatech_courses.csv")
+        moocs_path = st.text_input("MOOCs CSV Path", "~/desktop/6365 P/moocs.csv")
+    
+    with col2:
+        st.write("LLM API Settings")
+        api_type = st.selectbox(
+            "LLM API Type", 
+            ["ollama", "together", "deepseek", "gemini"],
+            help="Select which API to use for skill extraction"
+        )
+        st.session_state.api_type = api_type
+        
+        if api_type == "ollama":
+            st.session_state.llm_api_url = st.text_input("Ollama API URL", "http://localhost:11434/api/generate")
+            st.session_state.llm_model_name = st.text_input("Ollama Model Name", "llama3.2")
+        elif api_type in ["together", "deepseek", "gemini"]:
+            api_key = st.text_input(f"{api_type.capitalize()} API Key", type="password")
+            st.session_state.api_key = api_key
+            model_options = {
+                "together": ["togethercomputer/llama-2-7b-chat", "togethercomputer/llama-2-70b-chat", "mistralai/Mistral-7B-Instruct-v0.1"],
+                "deepseek": ["deepseek-ai/deepseek-llm-7b-chat", "deepseek-ai/deepseek-coder-6.7b-instruct"],
+                "gemini": ["models/gemini-1.5-pro-latest",
+    "models/gemini-1.5-pro-002",
+    "models/gemini-1.5-flash-latest",
+    "models/gemini-2.0-flash-lite",
+    "models/gemini-2.0-flash"]
+            }
+            st.session_state.llm_model_name = st.selectbox(
+                f"{api_type.capitalize()} Model", 
+                model_options.get(api_type, ["default_model"])
+            )
+    
+    if st.button("Load Datasets"):
+        with st.spinner("Loading datasets..."):
+            st.session_state.datasets = cached_datasets(jobskills_path, gt_courses_path, moocs_path)
+            st.success("Datasets loaded successfully!")
+    
+    # Test LLM API
+    if st.button("Test LLM API Connection"):
+        test_description = "Looking for a Python developer with machine learning experience."
+        with st.spinner("Testing API connection..."):
+            skills = extract_skills("Developer", test_description, api_type, st.session_state)
+            if skills:
+                st.success(f"API connection successful! Extracted skills: {', '.join(skills)}")
+            else:
+                st.error("API connection failed. Check your settings and try again.")
+
+with tab3:
+    st.subheader("Vector Database Management")
+    st.write("Initialize or refresh the vector database with your course data for semantic search.")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("Initialize Vector Database"):
+            if "datasets" not in st.session_state:
+                st.error("Please load datasets first!")
+            else:
+                with st.spinner("Initializing vector database... This may take a few minutes for large datasets."):
+                    embedding_model = load_embedding_model()
+                    success = initialize_vector_database(st.session_state.datasets, embedding_model, show_progress)
+                    if success:
+                        st.success("Vector database initialized successfully!")
+    
+    with col2:
+        if st.button("Refresh Vector Database"):
+            if "datasets" not in st.session_state:
+                st.error("Please load datasets first!")
+            else:
+                # Confirm refresh dialog
+                refresh_confirm = st.warning("⚠This will re-embed changed rows and delete removed rows in all vector database collections. Continue?")
+                confirm_col1, confirm_col2 = st.columns(2)
+                
+                with confirm_col1:
+                    if st.button("Yes, Refresh Data"):
+                        with st.spinner("Refreshing vector database... This may take a few minutes."):
+                            embedding_model = load_embedding_model()
+                            success = refresh_vector_database(st.session_state.datasets, embedding_model, show_progress)
+                            if success:
+                                st.success("Vector database refreshed successfully!")
+                
+                with confirm_col2:
+                    if st.button("Cancel"):
+                        st.info("Refresh canceled.")
+    
+    # Active collection versions; refreshes build a shadow version and swap to it when complete
+    if st.button("Show Collection Versions"):
+        st.json(vector_db_status())
+
+    # In-process NumPy index, used when REC_VECTOR_BACKEND=numpy
+    st.subheader("NumPy Index")
+    st.write(f"Active vector backend: **{VECTOR_BACKEND}** (set `REC_VECTOR_BACKEND=numpy` to serve semantic search from the NumPy index)")
+    copy_from_chroma = st.checkbox("Copy vectors from the existing Chroma collections instead of re-encoding")
+    if st.button("Build NumPy Index"):
+        if not copy_from_chroma and "datasets" not in st.session_state:
+            st.error("Please load datasets first!")
+        else:
+            with st.spinner("Building NumPy index..."):
+                embedding_model = load_embedding_model()
+                if build_numpy_index(st.session_state.get("datasets", {}), embedding_model, from_chroma=copy_from_chroma,
+                                     progress=show_progress):
+                    st.success("NumPy index built successfully!")
+
+    # Add information about when to refresh
+    st.info("**When to refresh?** Refresh your vector database when you have updated your course data or if you notice that search results aren't matching correctly.")
+    
+    # Add selective refresh option
+    st.subheader("Selective Refresh")
+    refresh_options = st.multiselect("Select collections to refresh:", ["gt_courses", "moocs"], 
+                                    help="Choose which collections to refresh instead of refreshing everything")
+    
+    if st.button("Refresh Selected Collections"):
+        if "datasets" not in st.session_state:
+            st.error("Please load datasets first!")
+        elif not refresh_options:
+            st.warning("Please select at least one collection to refresh.")
+        else:
+            # Create a subset of datasets with only the selected collections
+            selected_datasets = {k: st.session_state.datasets[k] for k in refresh_options if k in st.session_state.datasets}
+            
+            with st.spinner(f"Refreshing selected collections: {', '.join(refresh_options)}"):
+                embedding_model = load_embedding_model()
+                success = refresh_vector_database(selected_datasets, embedding_model, show_progress)
+                if success:
+                    st.success(f"Selected collections refreshed successfully: {', '.join(refresh_options)}")
+with tab4:
+    st.subheader("Job-to-Major Mapping")
+    st.write("Customize which academic majors are relevant for different job titles.")
+    
+    # Show current mappings
+    st.write("### Current Job-Major Mappings")
+    
+    # Allow user to select a job to edit
+    job_options = list(job_to_major.keys())
+    selected_job = st.selectbox("Select Job Title to Edit", job_options)
+    
+    if selected_job:
+        # Show current majors for this job
+        current_majors = job_to_major[selected_job]
+        st.write(f"Current majors for {selected_job}:", ", ".join(current_majors))
+        
+        # Let user edit majors for this job
+        all_majors = sorted(set(major for majors in job_to_major.values() for major in majors))
+        
+        selected_majors = st.multiselect(
+            "Select Relevant Majors", 
+            options=all_majors,
+            default=current_majors
+        )
+        
+        if st.button(f"Update Majors for {selected_job}"):
+            # Update the mapping
+            job_to_major[selected_job] = selected_majors
+            st.success(f"Updated majors for {selected_job}")
+    
+    # Add new job title
+    st.write("### Add New Job Title")
+    new_job_title = st.text_input("New Job Title")
+    
+    if new_job_title:
+        # Get all possible majors to select from
+        all_majors = sorted(set(major for majors in job_to_major.values() for major in majors))
+        
+        new_job_majors = st.multiselect(
+            "Select Relevant Majors for New Job", 
+            options=all_majors
+        )
+        
+        if st.button("Add New Job-Major Mapping"):
+            if new_job_title and new_job_majors:
+                job_to_major[new_job_title] = new_job_majors
+                st.success(f"Added new job mapping for {new_job_title}")
+            else:
+                st.warning("Please provide both job title and majors")
+
+# Add footer
+st.markdown("---")
+st.markdown("💡 **Tip:** For best results, use detailed job descriptions that mention specific technical skills.")
\ No newline at end of file
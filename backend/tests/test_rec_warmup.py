@@ -0,0 +1,42 @@
+from rec_warmup import WarmupState
+
+
+def failing_warm_up(state):
+    state.step("datasets", lambda: None)
+    raise RuntimeError("vector index unavailable")
+
+
+def test_failed_warmup_is_retried_with_backoff_then_falls_back_to_lazy_loading():
+    state = WarmupState(attempts=3, backoff=2)
+    sleeps = []
+    state.run(failing_warm_up, sleep=sleeps.append)
+    assert sleeps == [2, 4]
+    assert state.status == "failed"
+    # The worker is not left out of the load balancer for good: requests load the resources instead
+    assert state.ready
+    snapshot = state.snapshot()
+    assert snapshot["attempt"] == 3
+    assert snapshot["error"] == "vector index unavailable"
+
+
+def test_warmup_that_recovers_on_a_retry_is_ready():
+    state = WarmupState(attempts=3, backoff=1)
+    calls = []
+
+    def flaky_warm_up(state):
+        calls.append(state.attempt)
+        if len(calls) == 1:
+            raise RuntimeError("model download timed out")
+
+    state.run(flaky_warm_up, sleep=lambda seconds: None)
+    assert calls == [1, 2]
+    assert state.status == "ready"
+    assert state.error is None
+
+
+def test_warming_up_is_not_ready():
+    state = WarmupState(attempts=2, backoff=1)
+    seen = []
+    state.run(lambda state: seen.append(state.ready), sleep=lambda seconds: None)
+    assert seen == [False]
+    assert state.ready
@@ -0,0 +1,44 @@
+from skill_extractor import SkillExtractor, build_taxonomy
+
+COMMON_SKILLS = ["python", "aws", "cloud", "machine learning"]
+SKILL_MAPPINGS = {
+    "python programming": "python",
+    "aws cloud": "aws",
+    "amazon web services": "aws",
+    "ml": "machine learning",
+}
+
+
+def extractor():
+    return SkillExtractor(build_taxonomy(COMMON_SKILLS, SKILL_MAPPINGS, taxonomy_path=None))
+
+
+def counts(text):
+    return {skill: found.count for skill, found in extractor().analyze("", text).items()}
+
+
+def test_overlapping_synonyms_of_one_skill_count_once():
+    assert counts("Experience with python programming required.") == {"python": 1}
+    assert counts("Deploy on aws cloud.") == {"aws": 1, "cloud": 1}
+
+
+def test_separate_mentions_still_count():
+    assert counts("python, python programming and Python 3") == {"python": 3}
+    assert counts("amazon web services and aws") == {"aws": 2}
+
+
+def test_terms_match_whole_tokens():
+    assert counts("html and xml") == {}
+    assert counts("ML engineer") == {"machine learning": 1}
+
+
+def test_generic_profile_skills_are_left_out():
+    taxonomy = build_taxonomy(COMMON_SKILLS, SKILL_MAPPINGS, taxonomy_path=None,
+                              extra_skills=["communication", "Design", "data testing", "go", "terraform", "data pipelines"])
+    assert "terraform" in taxonomy and "data pipelines" in taxonomy
+    assert not {"communication", "design", "data testing", "go"} & set(taxonomy)
+
+
+def test_weight_of_single_mention():
+    features = extractor().analyze("Engineer", "Experience with python programming required.")
+    assert features["python"].weight == 1.2